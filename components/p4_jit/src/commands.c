@@ -144,10 +144,31 @@ typedef struct {
     uint32_t address;
 } cmd_exec_req_t;
 
+// Optional EXEC extension (v1.1): memory appended to the reply after the call
+typedef struct {
+    uint32_t address;
+    uint32_t fetch_address;
+    uint32_t fetch_size;
+} cmd_exec_fetch_req_t;
+
 typedef struct {
     uint32_t return_value;
 } cmd_exec_resp_t;
 
+// EXEC_BATCH (v1.3): one call per row of an args table
+typedef struct {
+    uint32_t address;        // Function to call
+    uint32_t args_address;   // Args block the function reads
+    uint32_t table_address;  // count rows of row_size bytes
+    uint32_t row_size;       // Bytes copied into the args block per call
+    uint32_t count;
+} cmd_exec_batch_req_t;
+
+typedef struct {
+    uint32_t calls;          // Calls made
+    uint32_t return_value;   // Return value of the last call
+} cmd_exec_batch_resp_t;
+
 typedef struct {
     uint32_t dummy; // Empty payload, but structs can't be empty in C standard sometimes, though GCC allows it.
                     // We'll just read 0 bytes payload.
@@ -174,6 +195,40 @@ typedef struct {
 // Firmware version string
 #define FIRMWARE_VERSION "1.0.0"
 
+static void alloc_one(const cmd_alloc_req_t *req, cmd_alloc_resp_t *resp) {
+    ESP_LOGI(TAG, "CMD_ALLOC: Size=%lu, Caps=0x%08lX, Align=%lu",
+             req->size, req->caps, req->alignment);
+
+    // Validate alignment: must be non-zero and power of two
+    if (req->alignment == 0 || (req->alignment & (req->alignment - 1)) != 0) {
+        ESP_LOGE(TAG, "CMD_ALLOC: Invalid alignment %lu (must be non-zero power of two)", req->alignment);
+        resp->address = 0;
+        resp->error_code = ERR_ALLOC_FAIL;
+        return;
+    }
+
+    void *ptr = heap_caps_aligned_alloc(req->alignment, req->size, req->caps);
+
+    if (ptr) {
+        // Track allocation in table
+        if (!alloc_table_add((uint32_t)ptr, req->size)) {
+            // Table full - free memory and fail
+            ESP_LOGE(TAG, "CMD_ALLOC: Allocation table full");
+            heap_caps_free(ptr);
+            resp->address = 0;
+            resp->error_code = ERR_ALLOC_FAIL;
+        } else {
+            ESP_LOGI(TAG, "CMD_ALLOC: Success at %p", ptr);
+            resp->address = (uint32_t)ptr;
+            resp->error_code = 0;
+        }
+    } else {
+        ESP_LOGE(TAG, "CMD_ALLOC: Failed");
+        resp->address = 0;
+        resp->error_code = ERR_ALLOC_FAIL;
+    }
+}
+
 uint32_t dispatch_command(uint8_t cmd_id, uint8_t *payload, uint32_t len, uint8_t *out_payload, uint32_t *out_len) {
     switch (cmd_id) {
         case CMD_PING:
@@ -217,68 +272,49 @@ uint32_t dispatch_command(uint8_t cmd_id, uint8_t *payload, uint32_t len, uint8_
                 ESP_LOGE(TAG, "CMD_ALLOC: Payload too short (%lu)", len);
                 return ERR_UNKNOWN_CMD;
             }
-            cmd_alloc_req_t *req = (cmd_alloc_req_t*)payload;
-
-            ESP_LOGI(TAG, "CMD_ALLOC: Size=%lu, Caps=0x%08lX, Align=%lu",
-                     req->size, req->caps, req->alignment);
-
-            // Validate alignment: must be non-zero and power of two
-            if (req->alignment == 0 || (req->alignment & (req->alignment - 1)) != 0) {
-                ESP_LOGE(TAG, "CMD_ALLOC: Invalid alignment %lu (must be non-zero power of two)", req->alignment);
-                cmd_alloc_resp_t *resp = (cmd_alloc_resp_t*)out_payload;
-                resp->address = 0;
-                resp->error_code = ERR_ALLOC_FAIL;
-                *out_len = sizeof(cmd_alloc_resp_t);
-                return ERR_OK;
-            }
-
-            void *ptr = heap_caps_aligned_alloc(req->alignment, req->size, req->caps);
 
+            // v1.2: the payload may carry several requests, answered in order.
+            // Each one succeeds or fails on its own, as with single requests.
+            uint32_t count = len / sizeof(cmd_alloc_req_t);
+            cmd_alloc_req_t *req = (cmd_alloc_req_t*)payload;
             cmd_alloc_resp_t *resp = (cmd_alloc_resp_t*)out_payload;
 
-            if (ptr) {
-                // Track allocation in table
-                if (!alloc_table_add((uint32_t)ptr, req->size)) {
-                    // Table full - free memory and fail
-                    ESP_LOGE(TAG, "CMD_ALLOC: Allocation table full");
-                    heap_caps_free(ptr);
-                    resp->address = 0;
-                    resp->error_code = ERR_ALLOC_FAIL;
-                } else {
-                    ESP_LOGI(TAG, "CMD_ALLOC: Success at %p", ptr);
-                    resp->address = (uint32_t)ptr;
-                    resp->error_code = 0;
-                }
-            } else {
-                ESP_LOGE(TAG, "CMD_ALLOC: Failed");
-                resp->address = 0;
-                resp->error_code = ERR_ALLOC_FAIL;
+            for (uint32_t i = 0; i < count; i++) {
+                alloc_one(&req[i], &resp[i]);
             }
 
-            *out_len = sizeof(cmd_alloc_resp_t);
+            *out_len = count * sizeof(cmd_alloc_resp_t);
             return ERR_OK;
         }
 
         case CMD_FREE: {
             if (len < sizeof(cmd_free_req_t)) return ERR_UNKNOWN_CMD;
+
+            // v1.1: the payload may carry several addresses, freed in order
+            uint32_t count = len / sizeof(cmd_free_req_t);
             cmd_free_req_t *req = (cmd_free_req_t*)payload;
+            bool all_valid = true;
+
+            for (uint32_t i = 0; i < count; i++) {
+                // Validate address is in allocation table
+                if (!alloc_table_contains(req[i].address)) {
+                    ESP_LOGE(TAG, "CMD_FREE: Address 0x%08lX not in allocation table", req[i].address);
+                    all_valid = false;
+                    continue;
+                }
 
-            // Validate address is in allocation table
-            if (!alloc_table_contains(req->address)) {
-                ESP_LOGE(TAG, "CMD_FREE: Address 0x%08lX not in allocation table", req->address);
-                uint32_t *status = (uint32_t*)out_payload;
-                *status = ERR_INVALID_ADDR;
-                *out_len = 4;
-                return ERR_INVALID_ADDR;
+                // Remove from tracking and free
+                alloc_table_remove(req[i].address);
+                heap_caps_free((void*)req[i].address);
             }
 
-            // Remove from tracking and free
-            alloc_table_remove(req->address);
-            heap_caps_free((void*)req->address);
-
             uint32_t *status = (uint32_t*)out_payload;
-            *status = 0;
             *out_len = 4;
+            if (!all_valid) {
+                *status = ERR_INVALID_ADDR;
+                return ERR_INVALID_ADDR;
+            }
+            *status = 0;
             return ERR_OK;
         }
 
@@ -392,6 +428,62 @@ uint32_t dispatch_command(uint8_t cmd_id, uint8_t *payload, uint32_t len, uint8_
             cmd_exec_resp_t *resp = (cmd_exec_resp_t*)out_payload;
             resp->return_value = ret;
             *out_len = sizeof(cmd_exec_resp_t);
+
+            // Optional fetch: append a memory range (e.g. the args return slot)
+            // so the host doesn't need a separate READ_MEM round-trip
+            if (len >= sizeof(cmd_exec_fetch_req_t)) {
+                cmd_exec_fetch_req_t *fetch = (cmd_exec_fetch_req_t*)payload;
+                uint32_t fetch_size = fetch->fetch_size;
+                size_t max_fetch = protocol_get_max_payload_size();
+                if (max_fetch == 0) max_fetch = 1024 * 1024;  // Fallback default
+                max_fetch -= sizeof(cmd_exec_resp_t);
+
+                if (fetch_size > 0 && fetch_size <= max_fetch &&
+                    alloc_table_validate(fetch->fetch_address, fetch_size)) {
+                    memcpy(out_payload + sizeof(cmd_exec_resp_t), (void*)fetch->fetch_address, fetch_size);
+                    *out_len += fetch_size;
+                } else if (fetch_size > 0) {
+                    ESP_LOGW(TAG, "CMD_EXEC: Fetch 0x%08lX (len=%lu) rejected", fetch->fetch_address, fetch_size);
+                }
+            }
+            return ERR_OK;
+        }
+
+        case CMD_EXEC_BATCH: {
+            if (len < sizeof(cmd_exec_batch_req_t)) return ERR_UNKNOWN_CMD;
+            cmd_exec_batch_req_t *req = (cmd_exec_batch_req_t*)payload;
+
+            if (req->row_size == 0 || req->count > UINT32_MAX / req->row_size ||
+                !alloc_table_validate(req->address, 1) ||
+                !alloc_table_validate(req->args_address, req->row_size) ||
+                !alloc_table_validate(req->table_address, req->row_size * req->count)) {
+                ESP_LOGE(TAG, "CMD_EXEC_BATCH: Invalid request (code 0x%08lX, args 0x%08lX, table 0x%08lX, %lu x %lu)",
+                         req->address, req->args_address, req->table_address, req->count, req->row_size);
+                return ERR_INVALID_ADDR;
+            }
+
+            typedef int (*jit_func_t)(void);
+            jit_func_t func = (jit_func_t)req->address;
+            uint8_t *row = (uint8_t*)req->table_address;
+
+            ESP_LOGI(TAG, "Executing at 0x%08lX (%lu calls)", req->address, req->count);
+
+            // Each row is the args block of one call; it is copied back
+            // afterwards so it carries that call's return slot. A non-zero
+            // return (wrapper status) ends the batch.
+            cmd_exec_batch_resp_t *resp = (cmd_exec_batch_resp_t*)out_payload;
+            resp->calls = 0;
+            resp->return_value = 0;
+            while (resp->calls < req->count && resp->return_value == 0) {
+                memcpy((void*)req->args_address, row, req->row_size);
+                resp->return_value = func();
+                memcpy(row, (void*)req->args_address, req->row_size);
+                row += req->row_size;
+                resp->calls++;
+            }
+            ESP_LOGI(TAG, "Batch done: %lu calls, last returned %ld", resp->calls, (int32_t)resp->return_value);
+
+            *out_len = sizeof(cmd_exec_batch_resp_t);
             return ERR_OK;
         }
 
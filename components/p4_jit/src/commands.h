@@ -11,11 +11,12 @@
 #define CMD_WRITE_MEM   0x20
 #define CMD_READ_MEM    0x21
 #define CMD_EXEC        0x30
+#define CMD_EXEC_BATCH  0x31
 #define CMD_HEAP_INFO   0x40
 
 // Protocol version (increment on breaking changes)
 #define PROTOCOL_VERSION_MAJOR  1
-#define PROTOCOL_VERSION_MINOR  0
+#define PROTOCOL_VERSION_MINOR  3
 
 // Error Codes
 #define ERR_OK          0x00
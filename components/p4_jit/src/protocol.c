@@ -31,12 +31,40 @@ static uint8_t *rx_buffer = NULL;
 static uint8_t *tx_buffer = NULL;
 static size_t max_payload_size = 0;
 
+// Byte sum (mod 2^16) of a packet. Aligned words are summed 4 bytes at a
+// time: the masks split each word into two 16-bit lanes holding byte pairs,
+// which are folded into the 32-bit total before they can overflow.
 static uint16_t calculate_checksum(const uint8_t *data, size_t len) {
-    uint16_t sum = 0;
-    for (size_t i = 0; i < len; i++) {
+    uint32_t sum = 0;
+
+    // Leading bytes up to word alignment
+    while (len > 0 && ((uintptr_t)data & 3)) {
+        sum += *data++;
+        len--;
+    }
+
+    const uint32_t *words = (const uint32_t *)data;
+    size_t n_words = len / 4;
+    while (n_words > 0) {
+        // A lane gains at most 2 * 255 per word, so 128 words fit in 16 bits
+        size_t block = (n_words < 128) ? n_words : 128;
+        uint32_t lanes = 0;
+        for (size_t i = 0; i < block; i++) {
+            uint32_t w;
+            memcpy(&w, words + i, sizeof(w));
+            lanes += (w & 0x00FF00FF) + ((w >> 8) & 0x00FF00FF);
+        }
+        sum += (lanes & 0xFFFF) + (lanes >> 16);
+        words += block;
+        n_words -= block;
+    }
+
+    // Trailing bytes
+    data = (const uint8_t *)words;
+    for (size_t i = 0; i < (len & 3); i++) {
         sum += data[i];
     }
-    return sum;
+    return (uint16_t)sum;
 }
 
 void send_response(uint8_t cmd_id, uint8_t flags, uint8_t *payload, uint32_t len) {
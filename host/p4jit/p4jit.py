@@ -1,5 +1,6 @@
 import os
 import struct
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional, Dict
 
 from .runtime.jit_session import JITSession
@@ -12,6 +13,20 @@ from .utils.logger import setup_logger, INFO_VERBOSE
 
 logger = setup_logger(__name__)
 
+# ndarray subclass carrying .p4_caps, created on first use (NumPy is imported lazily)
+_P4Array = None
+
+def _p4_array_type():
+    global _P4Array
+    if _P4Array is None:
+        import numpy as np
+        
+        class P4Array(np.ndarray):
+            pass
+        
+        _P4Array = P4Array
+    return _P4Array
+
 class JITFunction:
     """
     Represents a specific compiled and loaded function on the device.
@@ -38,9 +53,8 @@ class JITFunction:
         # Create Persistent RemoteFunction
         from .runtime.remote_function import RemoteFunction
         
-        signature = None
-        if self.smart_args and self.binary.metadata:
-             signature = self.binary.metadata
+        # Signature drives SmartArgs and RemoteFunction.pack()
+        signature = self.binary.metadata or None
              
         self.remote_func = RemoteFunction(
             self.session.device,
@@ -59,6 +73,39 @@ class JITFunction:
     def sync_arrays(self, value: bool):
         self.remote_func.sync_enabled = value
 
+    @property
+    def pin_arrays(self):
+        """
+        Enable/Disable keeping array buffers on the device across calls.
+        A pinned array is only re-uploaded when its contents change.
+        """
+        return self.remote_func.pin_enabled
+
+    @pin_arrays.setter
+    def pin_arrays(self, value: bool):
+        self.remote_func.pin_enabled = value
+        if not value:
+            self.remote_func.release_pinned()
+
+    def pack(self, *args) -> bytes:
+        """
+        Pack scalar arguments (pointers as device addresses) into an
+        args blob for calls with smart_args=False.
+        """
+        return self.remote_func.pack(*args)
+
+    def map(self, slots):
+        """
+        Call the function once per row of 32-bit argument slots (legacy
+        layout), batched into one round-trip where the firmware supports it.
+        Returns the args block left by each call (see RemoteFunction.map).
+        """
+        if not self.valid:
+            logger.error("Attempted to call freed JITFunction")
+            raise RuntimeError("JITFunction has been freed and is no longer valid")
+
+        return self.remote_func.map(slots)
+
     def __call__(self, *args) -> Any:
         """
         Execute the function.
@@ -79,8 +126,9 @@ class JITFunction:
 
         try:
             logger.debug(f"Freeing JITFunction resources (Code: 0x{self.code_addr:08x}, Args: 0x{self.args_addr:08x})")
-            self.session.device.free(self.code_addr)
-            self.session.device.free(self.args_addr)
+            self.remote_func.release_pinned()
+            if self.session.device.free_many((self.code_addr, self.args_addr)):
+                logger.warning("Failed to free JITFunction code/args allocations")
         except Exception as e:
             logger.warning(f"Failed to free JITFunction resources: {e}")
             
@@ -101,6 +149,7 @@ class P4JIT:
         self.session.connect(port) # Auto-detect if port is None
 
         # Initialize Builder with config path
+        self.config_path = config_path
         self.builder = Builder(config_path=config_path)
         logger.info("P4JIT Initialized.")
 
@@ -116,12 +165,7 @@ class P4JIT:
         Returns:
             np.ndarray: View of the array with .p4_caps attribute
         """
-        import numpy as np
-        
-        class P4Array(np.ndarray):
-            pass
-        
-        view = array.view(P4Array)
+        view = array.view(_p4_array_type())
         view.p4_caps = caps
         return view
 
@@ -141,6 +185,41 @@ class P4JIT:
                 
         return stats
 
+    def precompile(self, functions, use_firmware_elf: bool = True):
+        """
+        Run the preliminary build (Pass 1) of several functions ahead of
+        their load() calls, in parallel across source directories.
+        
+        The probe sizes and object files land in the compile cache, so each
+        later load() skips Pass 1 and its Pass 2 only re-links.
+        Requires the compile cache (build.cache).
+        
+        Args:
+            functions: (source, function_name) pairs
+        """
+        if self.builder.compiler.cache is None:
+            logger.warning("precompile() needs the compile cache (build.cache), skipping")
+            return
+        
+        # Builds in one directory rewrite its generated wrapper, so each
+        # directory is probed by a single worker
+        by_dir = {}
+        for source, function_name in functions:
+            by_dir.setdefault(os.path.dirname(os.path.abspath(source)), []).append(
+                (source, function_name))
+        
+        def probe_dir(items):
+            # Own Builder per worker: a Builder's builds share one scratch directory
+            builder = Builder(config_path=self.config_path)
+            for source, function_name in items:
+                builder.wrapper.probe_size(source, function_name, use_firmware_elf=use_firmware_elf)
+        
+        logger.info(f"Precompiling {sum(map(len, by_dir.values()))} function(s) "
+                    f"in {len(by_dir)} source director{'y' if len(by_dir) == 1 else 'ies'}...")
+        with ThreadPoolExecutor(max_workers=min(len(by_dir), os.cpu_count() or 1) or 1) as pool:
+            for future in [pool.submit(probe_dir, items) for items in by_dir.values()]:
+                future.result()
+
     def load(self, 
              source: str, 
              function_name: str,
@@ -169,30 +248,28 @@ class P4JIT:
         logger.log(INFO_VERBOSE, f"Pass 1: Preliminary Build (Opt: -{optimization})")
         
         # Pass 1: Build with default/requested addresses to get size
-        temp_bin = self.builder.wrapper.build_with_wrapper(
+        # (reused while the sources are unchanged)
+        code_size, alloc_args_size = self.builder.wrapper.probe_size(
             source=source,
             function_name=function_name,
+            use_firmware_elf=use_firmware_elf,
             base_address=base_address,
-            arg_address=arg_address,
-            output_dir=output_dir,
-            use_firmware_elf=use_firmware_elf
+            arg_address=arg_address
         )
         
         # 2. Allocate
         logger.log(INFO_VERBOSE, f"Allocating device memory (Align: {alignment})...")
 
         # Calculate sizes
-        # temp_bin.total_size includes text, data, rodata.
-        alloc_code_size = temp_bin.total_size + 64 # Safety padding
+        # code_size (total_size) includes text, data, rodata.
+        alloc_code_size = code_size + 64 # Safety padding
 
-        # Args size comes from metadata
-        alloc_args_size = temp_bin.metadata['addresses']['args_array_bytes']
-
-        real_code_addr = self.session.device.allocate(alloc_code_size, code_caps, alignment)
-        real_args_addr = None
+        # One request for both blocks (allocate_many frees both on failure)
+        real_code_addr, real_args_addr = self.session.device.allocate_many([
+            (alloc_code_size, code_caps, alignment),
+            (alloc_args_size, data_caps, alignment),
+        ])
         try:
-            real_args_addr = self.session.device.allocate(alloc_args_size, data_caps, alignment)
-
             logger.info(f"  Code Allocated: 0x{real_code_addr:08X} ({alloc_code_size} bytes)")
             logger.info(f"  Args Allocated: 0x{real_args_addr:08X} ({alloc_args_size} bytes)")
 
@@ -213,15 +290,7 @@ class P4JIT:
         except Exception:
             # Clean up allocations on failure to prevent memory leak
             logger.warning("Load failed, freeing allocated memory...")
-            try:
-                self.session.device.free(real_code_addr)
-            except Exception as e:
-                logger.debug(f"Failed to free code allocation: {e}")
-            if real_args_addr is not None:
-                try:
-                    self.session.device.free(real_args_addr)
-                except Exception as e:
-                    logger.debug(f"Failed to free args allocation: {e}")
+            self.session.device.free_many((real_code_addr, real_args_addr))
             raise
 
         # 5. Instantiate
@@ -1,3 +1,3 @@
-from .device_manager import DeviceManager
+from .device_manager import DeviceManager, DevicePool
 from .jit_session import JITSession
 from .remote_function import RemoteFunction
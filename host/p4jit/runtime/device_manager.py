@@ -2,7 +2,7 @@ import struct
 import time
 import serial
 import sys
-from typing import Optional, Tuple, Dict
+from typing import Optional, Sequence, Tuple, Dict, List
 from p4jit.utils.logger import setup_logger, INFO_VERBOSE
 
 logger = setup_logger(__name__)
@@ -16,22 +16,42 @@ CMD_FREE = 0x11
 CMD_WRITE_MEM = 0x20
 CMD_READ_MEM = 0x21
 CMD_EXEC = 0x30
+CMD_EXEC_BATCH = 0x31
 CMD_HEAP_INFO = 0x40
 
 ERR_OK = 0x00
 
 # Expected protocol version (must match device)
 PROTOCOL_VERSION_MAJOR = 1
-PROTOCOL_VERSION_MINOR = 0
+PROTOCOL_VERSION_MINOR = 3
 
 # Default chunk size for large transfers (64KB - header overhead)
 # Will be adjusted based on device_info['max_payload_size'] if available
 DEFAULT_CHUNK_SIZE = 64 * 1024 - 16  # Account for header overhead
 HEADER_OVERHEAD = 16  # Space reserved for packet headers
 
+# Driver queue sizes requested on connect (honoured by pyserial on Windows
+# only, where they default to 4 KB): a whole read reply and write chunk fit
+SERIAL_RX_BUFFER_SIZE = 1024 * 1024
+SERIAL_TX_BUFFER_SIZE = 64 * 1024
+
 # Request flags (must match device-side REQ_FLAG_*)
 REQ_FLAG_SKIP_BOUNDS = 0x01
 
+# Payloads at least this large are checksummed with NumPy (imported on first use)
+_NUMPY_SUM_MIN = 1024
+
+def _byte_sum(data) -> int:
+    """
+    Sum of the bytes of data, for packet checksums. A Python-level sum of
+    a 64 KB write chunk takes longer than NumPy by an order of magnitude,
+    time during which nothing is written to the link.
+    """
+    if len(data) < _NUMPY_SUM_MIN:
+        return sum(data)
+    import numpy as np
+    return int(np.frombuffer(data, dtype=np.uint8).sum(dtype=np.uint64))
+
 class DeviceManager:
     """
     Handles low-level communication with the ESP32-P4 JIT firmware.
@@ -54,6 +74,12 @@ class DeviceManager:
         # Device info (populated by get_info())
         self.device_info: Optional[Dict] = None
 
+        # Commands whose response hasn't been read yet (see _send_packet)
+        self._pending: List[int] = []
+
+        # Args blocks written with write_args: address -> (code address, blob)
+        self._args_written: Dict[int, Tuple[int, bytes]] = {}
+
     def connect(self):
         if self.port:
             # 1. Check if ANY instance is already connected to this port and force disconnect
@@ -72,6 +98,9 @@ class DeviceManager:
 
             logger.info(f"Connecting to {self.port} at {self.baudrate} baud...")
             self.serial = serial.Serial(self.port, self.baudrate, timeout=1.0)
+            if hasattr(self.serial, 'set_buffer_size'):
+                self.serial.set_buffer_size(rx_size=SERIAL_RX_BUFFER_SIZE,
+                                            tx_size=SERIAL_TX_BUFFER_SIZE)
             
             # Register this connection
             DeviceManager._active_connections[self.port] = self
@@ -81,6 +110,8 @@ class DeviceManager:
         if self.serial and self.serial.is_open:
             logger.info(f"Disconnecting {self.port}...")
             self.serial.close()
+            self._pending.clear()
+            self._args_written.clear()
             
             # Unregister
             if self.port and self.port in DeviceManager._active_connections:
@@ -89,27 +120,93 @@ class DeviceManager:
                      
             logger.info("Disconnected.")
 
-    def _send_packet(self, cmd_id: int, payload: bytes) -> bytes:
+    def _send_packet(self, cmd_id: int, payload: bytes, data: bytes = b'', defer: bool = False,
+                     out: Optional[memoryview] = None) -> bytes:
+        """
+        Send a command and return the response payload.
+        The request payload is payload followed by data; data (e.g. a slice
+        of the caller's buffer) is written as is instead of being copied
+        into one joined payload. A response payload of exactly len(out)
+        bytes is received straight into out, which is then returned.
+
+        With defer=True the response is not awaited; it is read (and any
+        device error raised) once the next packet has been sent, so the
+        device processes one command while the next is on the wire. The
+        device answers strictly in order, so responses never interleave.
+        """
         if not self.serial or not self.serial.is_open:
             raise RuntimeError("Device not connected")
 
+        pending, self._pending = self._pending, []
+        self._write_packet(cmd_id, payload, data)
+
+        # Responses of earlier deferred packets come first
+        error = self._read_responses(pending)
+
+        if defer:
+            self._pending.append(cmd_id)
+            if error:
+                raise error
+            return b''
+
+        try:
+            resp_payload = self._read_response(cmd_id, out)
+        except RuntimeError:
+            if error:
+                raise error
+            raise
+        if error:
+            raise error
+        return resp_payload
+
+    def sync(self):
+        """Wait for the responses of deferred writes, raising the first device error."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        error = self._read_responses(pending)
+        if error:
+            raise error
+
+    def _read_responses(self, cmd_ids: List[int]) -> Optional[RuntimeError]:
+        """
+        Read the responses to cmd_ids in order. All of them are read even
+        after an error so the stream stays in sync; the first error is
+        returned rather than raised.
+        """
+        error = None
+        for cmd_id in cmd_ids:
+            try:
+                self._read_response(cmd_id)
+            except RuntimeError as e:
+                error = error or e
+        return error
+
+    def _write_packet(self, cmd_id: int, payload: bytes, data: bytes):
+        """Frame and send one request packet."""
         # 1. Construct Header
         # Magic (2), Cmd (1), Flags (1), Len (4)
-        header = struct.pack('<2sBB I', MAGIC, cmd_id, 0x00, len(payload))
+        header = struct.pack('<2sBB I', MAGIC, cmd_id, 0x00, len(payload) + len(data))
         
         # 2. Calculate Checksum
         checksum = sum(header)
         if payload:
-            checksum += sum(payload)
+            checksum += _byte_sum(payload)
+        if data:
+            checksum += _byte_sum(data)
         checksum &= 0xFFFF
 
         # 3. Send
-        logger.debug(f">> CMD {cmd_id:02X} | Len: {len(payload)} | Pay: {payload.hex()[:20]}...")
+        logger.debug(f">> CMD {cmd_id:02X} | Len: {len(payload) + len(data)} | Pay: {bytes(payload[:10]).hex()}...")
         self.serial.write(header)
         if payload:
             self.serial.write(payload)
+        if data:
+            self.serial.write(data)
         self.serial.write(struct.pack('<H', checksum))
 
+    def _read_response(self, cmd_id: int, out: Optional[memoryview] = None) -> bytes:
+        """Receive and validate the response to cmd_id (see _send_packet for out)."""
         # 4. Receive Response
         # Read Magic
         magic = self.serial.read(2)
@@ -135,7 +232,16 @@ class DeviceManager:
 
         # Read Payload (loop until all bytes received for large/slow transfers)
         resp_payload = b''
-        if resp_len > 0:
+        if out is not None and resp_flags != 0x02 and resp_len == len(out):
+            received = 0
+            while received < resp_len:
+                n = self.serial.readinto(out[received:])
+                if not n:
+                    logger.error(f"Timeout waiting for payload. Expected {resp_len}, got {received}")
+                    raise RuntimeError(f"Timeout waiting for payload. Expected {resp_len}, got {received}")
+                received += n
+            resp_payload = out
+        elif resp_len > 0:
             while len(resp_payload) < resp_len:
                 chunk = self.serial.read(resp_len - len(resp_payload))
                 if not chunk:
@@ -155,7 +261,7 @@ class DeviceManager:
         resp_header_full = MAGIC + resp_header_data
         calc_checksum = sum(resp_header_full)
         if resp_payload:
-            calc_checksum += sum(resp_payload)
+            calc_checksum += _byte_sum(resp_payload)
         calc_checksum &= 0xFFFF
 
         if calc_checksum != resp_checksum:
@@ -255,18 +361,61 @@ class DeviceManager:
             
         addr, err = struct.unpack('<I I', resp)
         if err != 0:
-            logger.error(f"Wrapper: Allocation Failed! requested_size={size}")
-            logger.error("Tip: Check if available memory is sufficient.")
-            try:
-                stats = self.get_heap_info()
-                logger.info("[Heap Status]")
-                for k, v in stats.items():
-                    logger.info(f"  {k}: {v}")
-            except:
-                pass
-            raise MemoryError(f"Allocation failed on device. Error: {err}")
+            self._report_alloc_failure(size, err)
+            
+        self._track_allocation(addr, size, caps, alignment)
+        return addr
+
+    def allocate_many(self, requests: Sequence[Tuple[int, int, int]]) -> List[int]:
+        """
+        Allocate several blocks with a single ALLOC request (protocol v1.2).
+        Older firmware only serves the first request, so it gets one request each.
+        
+        All or nothing: if any allocation fails, the ones that succeeded
+        are freed again before MemoryError is raised.
+        
+        Args:
+            requests: (size, caps, alignment) tuples
             
-        # Track allocation
+        Returns:
+            list: Addresses, in request order
+        """
+        requests = list(requests)
+        
+        if len(requests) < 2 or (self.device_info or {}).get('protocol_version_minor', 0) < 2:
+            addresses = []
+            try:
+                for size, caps, alignment in requests:
+                    addresses.append(self.allocate(size, caps, alignment))
+            except Exception:
+                self.free_many(addresses)
+                raise
+            return addresses
+        
+        payload = b''.join(struct.pack('<I I I', *request) for request in requests)
+        
+        logger.log(INFO_VERBOSE, f"Allocating {len(requests)} blocks "
+                                 f"({sum(request[0] for request in requests)} bytes)")
+        resp = self._send_packet(CMD_ALLOC, payload)
+        
+        if len(resp) < 8 * len(requests):
+            raise RuntimeError("Invalid response length for ALLOC")
+        
+        addresses = []
+        failure = None
+        for (size, caps, alignment), (addr, err) in zip(requests, struct.iter_unpack('<I I', resp)):
+            if err != 0:
+                failure = failure or (size, err)
+                continue
+            self._track_allocation(addr, size, caps, alignment)
+            addresses.append(addr)
+        
+        if failure:
+            self.free_many(addresses)
+            self._report_alloc_failure(*failure)
+        return addresses
+
+    def _track_allocation(self, addr: int, size: int, caps: int, alignment: int):
         self.allocations[addr] = {
             'size': size,
             'caps': caps,
@@ -274,7 +423,19 @@ class DeviceManager:
         }
         
         logger.debug(f"Allocated {size} bytes at 0x{addr:08X}")
-        return addr
+
+    def _report_alloc_failure(self, size: int, err: int):
+        """Log the failed request and the heap status, then raise MemoryError."""
+        logger.error(f"Wrapper: Allocation Failed! requested_size={size}")
+        logger.error("Tip: Check if available memory is sufficient.")
+        try:
+            stats = self.get_heap_info()
+            logger.info("[Heap Status]")
+            for k, v in stats.items():
+                logger.info(f"  {k}: {v}")
+        except:
+            pass
+        raise MemoryError(f"Allocation failed on device. Error: {err}")
 
     def free(self, address: int):
         if address not in self.allocations:
@@ -285,9 +446,53 @@ class DeviceManager:
         self._send_packet(CMD_FREE, payload)
         
         # Remove from tracking
+        self._forget_args(address, address + self.allocations[address]['size'])
         del self.allocations[address]
         logger.debug(f"Freed memory at 0x{address:08X}")
 
+    def create_pool(self, size: int, caps: int, alignment: int = 16) -> 'DevicePool':
+        """
+        Reserve one allocation to carve short-lived buffers out of (see DevicePool).
+        """
+        return DevicePool(self, size, caps, alignment)
+
+    def free_many(self, addresses: Sequence[int]) -> List[int]:
+        """
+        Free several allocations with a single FREE request (protocol v1.1).
+        Older firmware only frees the first address, so it gets one request each.
+        
+        Best effort: addresses that cannot be freed are skipped, not raised.
+        
+        Returns:
+            list: Addresses that were not freed (for a rejected batch request,
+            every address in it, as the device does not say which one failed)
+        """
+        failed = [address for address in addresses if address not in self.allocations]
+        addresses = [address for address in addresses if address in self.allocations]
+
+        if len(addresses) < 2 or (self.device_info or {}).get('protocol_version_minor', 0) < 1:
+            for address in addresses:
+                try:
+                    self.free(address)
+                except Exception as e:
+                    logger.debug(f"Failed to free 0x{address:08X}: {e}")
+                    failed.append(address)
+            return failed
+
+        payload = struct.pack(f'<{len(addresses)}I', *addresses)
+        try:
+            self._send_packet(CMD_FREE, payload)
+        except Exception as e:
+            logger.debug(f"Batched free of {len(addresses)} allocations failed: {e}")
+            failed.extend(addresses)
+        finally:
+            # The device frees every tracked address even if one is rejected
+            for address in addresses:
+                self._forget_args(address, address + self.allocations[address]['size'])
+                del self.allocations[address]
+        logger.debug(f"Freed {len(addresses)} allocations")
+        return failed
+
     def _get_chunk_size(self) -> int:
         """Get optimal chunk size based on device info."""
         if self.device_info and 'max_payload_size' in self.device_info:
@@ -301,15 +506,22 @@ class DeviceManager:
             return min(device_max, DEFAULT_CHUNK_SIZE)
         return DEFAULT_CHUNK_SIZE
 
-    def write_memory(self, address: int, data: bytes, skip_bounds: bool = False):
+    def write_memory(self, address: int, data: bytes, skip_bounds: bool = False, wait: bool = True):
         """
         Write memory to device with automatic chunking for large transfers.
+        Chunks are pipelined: the next chunk is sent before the previous
+        one's acknowledgement is read.
 
         Args:
             address: Memory address to write to
-            data: Bytes to write
+            data: Bytes to write (any byte-sized bytes-like object; chunks
+                  of a memoryview are sliced without copying)
             skip_bounds: If True, skip allocation table validation (for writing
                         to external memory regions like camera buffers)
+            wait: If False, return without waiting for the last acknowledgement.
+                  It is collected by the next command (or sync()), which is
+                  then the one raising a device-side write error. data may
+                  be reused as soon as this returns.
         """
         if not skip_bounds:
             # Host-side validation
@@ -327,6 +539,7 @@ class DeviceManager:
 
         total_len = len(data)
         logger.log(INFO_VERBOSE, f"Writing {total_len} bytes to 0x{address:08X}")
+        self._forget_args(address, address + total_len)
 
         # Get chunk size from device info
         chunk_size = self._get_chunk_size()
@@ -346,16 +559,55 @@ class DeviceManager:
                 logger.debug(f"  Chunk {chunk_num}: {chunk_len} bytes @ 0x{chunk_addr:08X}")
 
             # New format: address(4) + flags(1) + reserved(3) + data
-            payload = struct.pack('<I B 3x', chunk_addr, flags) + chunk
-            self._send_packet(CMD_WRITE_MEM, payload)
-
+            # (the chunk is sent from the caller's buffer, not joined to the header)
             offset += chunk_len
+            self._send_packet(CMD_WRITE_MEM, struct.pack('<I B 3x', chunk_addr, flags), chunk,
+                              defer=offset < total_len or not wait)
+
             chunk_num += 1
 
         if chunk_num > 1:
             logger.log(INFO_VERBOSE, f"Write complete: {chunk_num} chunks transferred")
 
-    def read_memory(self, address: int, size: int, skip_bounds: bool = False) -> bytes:
+    def write_args(self, address: int, data: bytes, code_address: int) -> bool:
+        """
+        Write an args blob for the code at code_address, skipping the write
+        when the block still holds the same blob from the previous write_args.
+        
+        The wrapper only writes its return slots, so the block keeps the blob
+        as long as no other code runs on it. The record is dropped by any
+        write_memory or free overlapping the block or the code, by EXEC_BATCH
+        on the block and by running other code (which may share the block).
+        
+        Args:
+            address: Args block address
+            data: Args blob (bytes-like)
+            code_address: Address of the code that will read the block
+            
+        Returns:
+            bool: True if the blob was written, False if it was unchanged
+        """
+        record = self._args_written.get(address)
+        if record is not None and record[0] == code_address and record[1] == data:
+            return False
+        self.write_memory(address, data)
+        self._args_written[address] = (code_address, bytes(data))
+        return True
+
+    def _forget_args(self, start: int, end: int):
+        """Drop write_args records whose block or code overlaps [start, end)."""
+        for address, (code_address, blob) in list(self._args_written.items()):
+            if (address < end and start < address + len(blob)) or start <= code_address < end:
+                del self._args_written[address]
+
+    def _forget_args_of_other_code(self, code_address: int):
+        """Drop write_args records of code other than the one about to run."""
+        for address, (owner, _) in list(self._args_written.items()):
+            if owner != code_address:
+                del self._args_written[address]
+
+    def read_memory(self, address: int, size: int, skip_bounds: bool = False,
+                    out: Optional[memoryview] = None) -> bytes:
         """
         Read memory from device.
 
@@ -364,6 +616,8 @@ class DeviceManager:
             size: Number of bytes to read
             skip_bounds: If True, skip allocation table validation (for reading
                         external memory like camera buffers)
+            out: Byte memoryview of size bytes to receive the contents
+                 (see read_memory_into); returned instead of new bytes
 
         Returns:
             bytes: Memory contents
@@ -389,9 +643,114 @@ class DeviceManager:
 
         # New format: address(4) + size(4) + flags(1) + reserved(3)
         payload = struct.pack('<I I B 3x', address, size, flags)
-        return self._send_packet(CMD_READ_MEM, payload)
+        return self._send_packet(CMD_READ_MEM, payload, out=out)
+
+    def read_memory_into(self, address: int, out, skip_bounds: bool = False) -> memoryview:
+        """
+        Read memory from device into a caller-supplied buffer.
+        The reply is received directly into out, so no intermediate bytes
+        object is created (e.g. refreshing a NumPy array in place).
+
+        Args:
+            address: Memory address to read from
+            out: Writable, contiguous bytes-like object; its size in bytes
+                 is the number of bytes read
+            skip_bounds: See read_memory()
+
+        Returns:
+            memoryview: Byte view of out
+
+        Raises:
+            RuntimeError: If the reply is not exactly the size of out
+        """
+        view = memoryview(out).cast('B')
+        if view.readonly:
+            raise TypeError("read_memory_into() needs a writable buffer")
+        data = self.read_memory(address, len(view), skip_bounds, out=view)
+        if data is not view:
+            # Reply of another length: received as bytes, out left untouched
+            logger.error(f"Read from 0x{address:08X} returned {len(data)} bytes, expected {len(view)}")
+            raise RuntimeError(f"Read from 0x{address:08X} returned {len(data)} bytes, expected {len(view)}")
+        return view
 
     def execute(self, address: int) -> int:
+        self._check_exec_address(address)
+
+        logger.log(INFO_VERBOSE, f"Executing at 0x{address:08X}")
+        self._forget_args_of_other_code(address)
+        payload = struct.pack('<I', address)
+        resp = self._send_packet(CMD_EXEC, payload)
+        
+        ret_val = struct.unpack('<i', resp[:4])[0]  # Signed to preserve negative returns
+        logger.debug(f"Execution finished. Return Value: {ret_val}")
+        return ret_val
+
+    def call_and_fetch(self, address: int, fetch_address: int, fetch_size: int) -> Tuple[int, bytes]:
+        """
+        Execute code and read back a memory range in the same round-trip.
+
+        The device appends the range to its EXEC reply (protocol v1.1). Older
+        firmware ignores the request, in which case the range is read with a
+        separate READ_MEM.
+
+        Args:
+            address: Address to execute
+            fetch_address: Start of the range to return (e.g. the args return slot)
+            fetch_size: Number of bytes to return
+
+        Returns:
+            tuple: (return_value, fetched bytes)
+        """
+        self._check_exec_address(address)
+
+        logger.log(INFO_VERBOSE, f"Executing at 0x{address:08X} (fetch {fetch_size} bytes from 0x{fetch_address:08X})")
+        self._forget_args_of_other_code(address)
+        payload = struct.pack('<III', address, fetch_address, fetch_size)
+        resp = self._send_packet(CMD_EXEC, payload)
+
+        ret_val = struct.unpack('<i', resp[:4])[0]
+        logger.debug(f"Execution finished. Return Value: {ret_val}")
+
+        data = resp[4:4 + fetch_size]
+        if len(data) != fetch_size:
+            data = self.read_memory(fetch_address, fetch_size)
+        return ret_val, data
+
+    def execute_batch(self, address: int, args_address: int, table_address: int,
+                      row_size: int, count: int) -> Tuple[int, int]:
+        """
+        Execute code once per row of an args table, in one round-trip (protocol v1.3).
+
+        Before each call the device copies the next row_size-byte row of the
+        table into the args block, and afterwards copies the args block back
+        over the row. The batch stops at the first non-zero return value.
+
+        Args:
+            address: Address to execute
+            args_address: Args block the code reads
+            table_address: Device table of count rows
+            row_size: Bytes per row
+            count: Number of calls
+
+        Returns:
+            tuple: (calls made, return value of the last call)
+        """
+        self._check_exec_address(address)
+
+        logger.log(INFO_VERBOSE, f"Executing at 0x{address:08X} ({count} calls, table 0x{table_address:08X})")
+        self._forget_args_of_other_code(address)
+        self._forget_args(args_address, args_address + row_size)
+        payload = struct.pack('<IIIII', address, args_address, table_address, row_size, count)
+        resp = self._send_packet(CMD_EXEC_BATCH, payload)
+
+        if len(resp) < 8:
+            raise RuntimeError("Invalid response length for EXEC_BATCH")
+
+        calls, ret_val = struct.unpack('<Ii', resp[:8])
+        logger.debug(f"Batch finished after {calls} call(s). Last Return Value: {ret_val}")
+        return calls, ret_val
+
+    def _check_exec_address(self, address: int):
         # Validation
         valid = False
         for start, info in self.allocations.items():
@@ -410,14 +769,6 @@ class DeviceManager:
             logger.error(f"Segmentation Fault: Execute at 0x{address:08X} not in valid region")
             raise PermissionError(f"Segmentation Fault: Execute at 0x{address:08X} not in valid region")
 
-        logger.log(INFO_VERBOSE, f"Executing at 0x{address:08X}")
-        payload = struct.pack('<I', address)
-        resp = self._send_packet(CMD_EXEC, payload)
-        
-        ret_val = struct.unpack('<i', resp)[0]  # Signed to preserve negative returns
-        logger.debug(f"Execution finished. Return Value: {ret_val}")
-        return ret_val
-
     def get_heap_info(self) -> Dict[str, int]:
         """
         Get heap memory statistics from the device.
@@ -443,3 +794,50 @@ class DeviceManager:
             'free_internal': free_internal,
             'total_internal': total_internal
         }
+
+
+class DevicePool:
+    """
+    Bump allocator over a single device allocation.
+    
+    Buffers that are created and released together (e.g. the code, args and
+    data of one test) share one heap block, so they pay the heap's
+    per-allocation overhead once and cannot fragment it. Individual buffers
+    are never freed; reset() rewinds the whole pool and free() returns it.
+    """
+    def __init__(self, device: DeviceManager, size: int, caps: int, alignment: int = 16):
+        self.device = device
+        self.size = size
+        self.base = device.allocate(size, caps, alignment)
+        self.cursor = self.base
+        logger.debug(f"Pool of {size} bytes at 0x{self.base:08X}")
+
+    def alloc(self, size: int, alignment: int = 16) -> int:
+        """
+        Carve a buffer out of the pool.
+        
+        Args:
+            size: Size in bytes
+            alignment: Address alignment (a power of two)
+            
+        Returns:
+            int: Address of the buffer
+        """
+        if self.base is None:
+            raise ValueError("Pool has been freed")
+        addr = (self.cursor + alignment - 1) & ~(alignment - 1)
+        if addr + size > self.base + self.size:
+            raise MemoryError(f"Pool exhausted: {size} bytes requested, "
+                              f"{self.base + self.size - addr} available")
+        self.cursor = addr + size
+        return addr
+
+    def reset(self):
+        """Release every buffer carved out so far."""
+        self.cursor = self.base
+
+    def free(self):
+        """Return the pool's allocation to the device heap."""
+        if self.base is not None:
+            self.device.free(self.base)
+            self.base = None
@@ -1,21 +1,46 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import serial.tools.list_ports
 from .device_manager import DeviceManager
 from .remote_function import RemoteFunction
 from ..utils.logger import setup_logger, INFO_VERBOSE
+from ..utils.file_io import write_text
 
 logger = setup_logger(__name__)
 
+# Port of the last auto-detected device, tried first on the next connect
+LAST_PORT_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'p4jit', 'last_port')
+
+def _read_last_port():
+    try:
+        with open(LAST_PORT_FILE, 'r') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def _save_last_port(port):
+    try:
+        os.makedirs(os.path.dirname(LAST_PORT_FILE), exist_ok=True)
+        write_text(LAST_PORT_FILE, port)
+    except OSError as e:
+        logger.debug(f"Failed to remember port {port}: {e}")
+
 class JITSession:
     """
     Orchestrates the JIT session, handling device discovery and function loading.
     """
     def __init__(self):
         self.device = DeviceManager()
+        
+        # Persistent args buffers: function name -> (address, allocation record,
+        # (size, caps, alignment)); the record tells a reused address apart
+        self._args_buffers = {}
 
     def connect(self, port: str = None):
         """
         Connect to the device. If port is not specified, attempts to auto-detect
-        by sending PING to available ports.
+        by sending PING to all available ports concurrently.
         """
         if port:
             self.device.port = port
@@ -32,34 +57,106 @@ class JITSession:
                 raise
         else:
             logger.info("Auto-detecting JIT device...")
-            found = False
-            ports = list(serial.tools.list_ports.comports())
+            ports = [p.device for p in serial.tools.list_ports.comports()]
             
             if not ports:
                 logger.warning("No serial ports found on the system.")
             
-            for p in ports:
-                try:
-                    logger.debug(f"Probing {p.device}...")
-                    self.device.port = p.device
-                    self.device.connect()
-                    if self.device.ping():
-                        # Query device info and validate protocol version
-                        self.device.get_info()
-                        found = True
-                        logger.info(f"Found JIT Device at {p.device}")
-                        break
-                    self.device.disconnect()
-                except Exception as e:
-                    logger.debug(f"Probe failed for {p.device}: {e}")
-                    try:
-                        self.device.disconnect()
-                    except:
-                        pass
+            # Try the port that worked last time before scanning everything
+            device = None
+            last_port = _read_last_port()
+            if last_port in ports:
+                device = self._probe_ports([last_port])
+                ports.remove(last_port)
+            if device is None and ports:
+                device = self._probe_ports(ports)
             
-            if not found:
+            if device is None:
                 logger.critical("Could not find JIT Device on any port")
                 raise RuntimeError("Could not find JIT Device on any port")
+            
+            self.device = device
+            logger.info(f"Found JIT Device at {device.port}")
+            if device.port != last_port:
+                _save_last_port(device.port)
+
+    def _probe_ports(self, ports):
+        """
+        PING all ports concurrently, each with its own DeviceManager, so the
+        timeouts of silent ports overlap instead of adding up.
+        
+        Returns:
+            DeviceManager: Connected manager of the first responding device, or None
+        """
+        winner = []
+        lock = threading.Lock()
+        stop = threading.Event()
+        
+        def probe(port):
+            if stop.is_set():
+                return None
+            device = DeviceManager(port, self.device.baudrate)
+            try:
+                logger.debug(f"Probing {port}...")
+                device.connect()
+                if device.ping():
+                    # Query device info and validate protocol version
+                    device.get_info()
+                    with lock:
+                        if not winner:
+                            winner.append(device)
+                            return device
+            except Exception as e:
+                logger.debug(f"Probe failed for {port}: {e}")
+            try:
+                device.disconnect()
+            except Exception:
+                pass
+            return None
+        
+        pool = ThreadPoolExecutor(max_workers=len(ports))
+        try:
+            for future in as_completed([pool.submit(probe, port) for port in ports]):
+                device = future.result()
+                if device is not None:
+                    return device
+            return None
+        finally:
+            # Probes still waiting on a timeout clean up after themselves
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def args_buffer(self, name: str, size: int, caps: int, alignment: int = 128) -> int:
+        """
+        Device args buffer for the function called name, allocated on the
+        first request and returned again by later ones. Rebuilding and
+        reloading a function (e.g. while tuning it interactively) keeps its
+        args address instead of allocating a new buffer each time.
+        
+        The buffer is replaced (the old one freed) when size, caps or
+        alignment change, and reallocated if it was freed meanwhile or the
+        session reconnected.
+        
+        Functions loaded with the same buffer share their args block, so
+        only the most recently loaded one should be called; unchanged args
+        are still re-sent after the other one ran (see DeviceManager.write_args).
+        
+        Returns:
+            int: Buffer address
+        """
+        layout = (size, caps, alignment)
+        entry = self._args_buffers.get(name)
+        if entry is not None:
+            addr, record, entry_layout = entry
+            if self.device.allocations.get(addr) is record:
+                if entry_layout == layout:
+                    logger.log(INFO_VERBOSE, f"Reusing args buffer of '{name}' at 0x{addr:08X}")
+                    return addr
+                self.device.free(addr)
+        
+        addr = self.device.allocate(size, caps, alignment)
+        self._args_buffers[name] = (addr, self.device.allocations.get(addr), layout)
+        return addr
 
     def load_function(self, binary_object, args_addr: int, smart_args: bool = False) -> RemoteFunction:
         """
@@ -79,21 +176,21 @@ class JITSession:
         
         # 2. Return Wrapper
         # Pass metadata (signature) if available, required for smart_args
+        # and RemoteFunction.pack()
         signature = None
-        if smart_args:
-            if not hasattr(binary_object, 'metadata') or not binary_object.metadata:
+        if not hasattr(binary_object, 'metadata') or not binary_object.metadata:
+            if smart_args:
                 # Try to load from file if not in object
                 # This is a fallback, ideally metadata is attached during build
                 logger.warning("SmartArgs requested but binary metadata missing.")
-                pass
-            else:
-                # Extract signature from metadata
-                # Metadata structure: {'functions': [{'name': '...', ...}], ...}
-                # We need the full signature which is usually in signature.json
-                # BinaryObject.metadata currently stores what MetadataGenerator produces
-                # which includes 'parameters' and 'return_type' at the top level for the single wrapped function
-                signature = binary_object.metadata
-                logger.debug(f"Loaded signature for SmartArgs: {signature.get('name', 'unknown')}")
+        else:
+            # Extract signature from metadata
+            # Metadata structure: {'functions': [{'name': '...', ...}], ...}
+            # We need the full signature which is usually in signature.json
+            # BinaryObject.metadata currently stores what MetadataGenerator produces
+            # which includes 'parameters' and 'return_type' at the top level for the single wrapped function
+            signature = binary_object.metadata
+            logger.debug(f"Loaded signature: {signature.get('name', 'unknown')}")
         
         return RemoteFunction(self.device, binary_object.entry_address, args_addr, 
                               signature=signature, smart_args=smart_args)
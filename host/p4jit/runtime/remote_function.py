@@ -1,7 +1,7 @@
 import struct
 from typing import Any, Optional, Dict
-from .smart_args import SmartArgs
 from ..utils.logger import setup_logger, INFO_VERBOSE
+from ..utils.c_types import args_struct, slot_value
 
 logger = setup_logger(__name__)
 
@@ -11,7 +11,7 @@ class RemoteFunction:
     """
     def __init__(self, device_manager, code_addr: int, args_addr: int, 
                  signature: Optional[Dict[str, Any]] = None, smart_args: bool = False,
-                 sync_arrays: bool = True):
+                 sync_arrays: bool = True, pin_arrays: bool = False):
         self.dm = device_manager
         self.code_addr = code_addr
         self.args_addr = args_addr
@@ -20,6 +20,89 @@ class RemoteFunction:
         
         # PERSISTENT CONFIGURATION
         self.sync_enabled = sync_arrays
+        self.pin_enabled = pin_arrays
+        
+        # Device buffers of pinned arrays, reused across calls (see SmartArgs)
+        self._pinned = {}
+        
+        # Args layout is fixed per function: precompile its struct once
+        self._packer = None
+        if signature and 'parameters' in signature:
+            self._packer = args_struct(signature['parameters'])
+        
+        # Reused for every smart-args call; only read by the write that follows
+        # packing, so it never needs to outlive a call
+        self._args_scratch = bytearray(self._packer.size) if self._packer else None
+
+    def pack(self, *args) -> bytes:
+        """
+        Pack scalar arguments into an args blob for a legacy-mode call,
+        e.g. func(func.pack(np.int32(3), 1.5)).
+        Pointer parameters take device addresses (ints).
+        Requires the function signature (binary metadata).
+        """
+        if self._packer is None:
+            raise ValueError("pack() requires the function signature (binary metadata)")
+        formats = self._packer.format[1:]
+        if len(args) != len(formats):
+            raise ValueError(f"Expected {len(formats)} arguments, got {len(args)}")
+        return self._packer.pack(*map(slot_value, args, formats))
+
+    def map(self, slots):
+        """
+        Call the function once per row of argument slots, e.g.
+        func.map(np.array([[addr, 32], [addr, 64]], dtype=np.uint32)).
+        
+        Rows use the legacy-mode args layout (32-bit slots from slot 0).
+        With protocol v1.3 all rows are uploaded as one table and run with a
+        single EXEC_BATCH round-trip; older firmware gets one call per row.
+        Requires the function signature (binary metadata).
+        
+        Args:
+            slots: 2-D array of 32-bit values (calls x slots)
+            
+        Returns:
+            np.ndarray: uint32 (calls x args_array_size) args blocks as left
+            by each call; return values are in their return slots
+        """
+        import numpy as np
+        from .memory_caps import MALLOC_CAP_SPIRAM, MALLOC_CAP_8BIT
+        
+        if not self.signature or 'addresses' not in self.signature:
+            raise ValueError("map() requires the function signature (binary metadata)")
+        slots = np.asarray(slots)
+        if slots.ndim != 2 or slots.dtype.itemsize != 4:
+            raise ValueError(f"Expected a 2-D array of 32-bit slots, got {slots.dtype} {slots.shape}")
+        n_slots = self.signature['addresses']['args_array_size']
+        if slots.shape[1] > n_slots:
+            raise ValueError(f"Rows have {slots.shape[1]} slots, args array holds {n_slots}")
+        
+        table = np.zeros((len(slots), n_slots), dtype=np.uint32)
+        table[:, :slots.shape[1]] = slots.view(np.uint32)
+        row_size = n_slots * 4
+        
+        if len(table) > 1 and (self.dm.device_info or {}).get('protocol_version_minor', 0) >= 3:
+            table_addr = self.dm.allocate(table.nbytes, MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT, 16)
+            try:
+                self.dm.write_memory(table_addr, memoryview(table).cast('B'), wait=False)
+                calls, status = self.dm.execute_batch(
+                    self.code_addr, self.args_addr, table_addr, row_size, len(table))
+                self.dm.read_memory_into(table_addr, table[:calls])
+            finally:
+                self.dm.free(table_addr)
+        else:
+            calls, status = 0, 0
+            for row in table:
+                self.dm.write_memory(self.args_addr, memoryview(row).cast('B'))
+                status = self.dm.execute(self.code_addr)
+                self.dm.read_memory_into(self.args_addr, row)
+                calls += 1
+                if status != 0:
+                    break
+        
+        if status != 0:
+            raise RuntimeError(f"Call {calls - 1} of {len(table)} failed with status {status}")
+        return table
 
     def __call__(self, *args) -> Any:
         """
@@ -32,42 +115,69 @@ class RemoteFunction:
                 logger.error("Smart args enabled but no signature provided")
                 raise ValueError("Smart args enabled but no signature provided")
             
+            # Imported on first use: keeps NumPy out of processes that never
+            # make smart-args calls (e.g. build-only scripts)
+            from .smart_args import SmartArgs
+            
             # FRESH HANDLER PER CALL
-            # Pass the persistent configuration 'self.sync_enabled'
-            handler = SmartArgs(self.dm, self.signature, sync_enabled=self.sync_enabled)
+            # Pass the persistent configuration 'self.sync_enabled' and pinned buffers
+            handler = SmartArgs(self.dm, self.signature, sync_enabled=self.sync_enabled,
+                                pinned=self._pinned if self.pin_enabled else None)
             
             try:
                 # Pack arguments using SmartArgs
                 logger.log(INFO_VERBOSE, "Packing arguments...")
-                args_blob = handler.pack(*args)
+                args_blob = handler.pack(*args, out=self._args_scratch)
                 
                 # Write Arguments
                 self.dm.write_memory(self.args_addr, args_blob)
                 
-                # Execute
-                self.dm.execute(self.code_addr)
+                # Execute; the return slot comes back in the same reply
+                return_slot = handler.return_slot(self.args_addr)
+                if return_slot is None:
+                    self.dm.execute(self.code_addr)
+                    raw_return = None
+                else:
+                    _, raw_return = self.dm.call_and_fetch(self.code_addr, *return_slot)
                 
                 # Sync Back using the fresh handler
                 handler.sync_back()
                 
-                # Read and convert return value
-                return handler.get_return_value(self.args_addr)
+                # Convert return value
+                return handler.get_return_value(self.args_addr, raw_return)
                 
             finally:
                 # Cleanup allocated memory
                 handler.cleanup()
                 
         else:
-            # Legacy mode: Expect single bytes argument
-            if len(args) != 1 or not isinstance(args[0], bytes):
+            # Legacy mode: Expect single bytes-like argument (bytes, memoryview,
+            # a contiguous NumPy array of 32-bit slots, ...)
+            if len(args) != 1:
                 raise ValueError("In legacy mode (smart_args=False), expected single bytes argument")
             
-            args_blob = args[0]
+            # Flat byte view: no copy, and len() counts bytes
+            try:
+                args_blob = memoryview(args[0]).cast('B')
+            except TypeError:
+                raise ValueError("In legacy mode (smart_args=False), expected single bytes argument") from None
             
-            # 1. Write Arguments
-            self.dm.write_memory(self.args_addr, args_blob)
+            # 1. Write Arguments (skipped when the block still holds them)
+            if not self.dm.write_args(self.args_addr, args_blob, self.code_addr):
+                logger.debug("Arguments unchanged, skipping upload")
             
             # 2. Execute
             result = self.dm.execute(self.code_addr)
             
             return result
+
+    def release_pinned(self):
+        """Free the device buffers of pinned arrays."""
+        if not self._pinned:
+            return
+        addresses = [entry['addr'] for entry in self._pinned.values()]
+        self._pinned.clear()
+        logger.debug(f"Releasing {len(addresses)} pinned array buffer(s)")
+        failed = self.dm.free_many(addresses)
+        if failed:
+            logger.warning(f"Failed to free {len(failed)} pinned array buffer(s)")
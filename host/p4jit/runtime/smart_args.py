@@ -1,13 +1,194 @@
 import struct
+import functools
 import numpy as np
-import yaml
 import os
-from typing import Any, List, Dict, Optional
+from types import MappingProxyType
+from typing import Any, List, Dict, Optional, Tuple
 from .memory_caps import MALLOC_CAP_SPIRAM, MALLOC_CAP_8BIT
 from ..utils.logger import setup_logger, INFO_VERBOSE
+from ..utils.yaml_loader import load_yaml
+from ..utils.c_types import is_64bit_type, args_struct, slot_value
 
 logger = setup_logger(__name__)
 
+# Alignment of each array inside a per-call device buffer
+ARENA_ALIGNMENT = 16
+
+# Standard C type spellings -> NumPy dtype name, on top of the YAML type_map
+_C_TYPE_ALIASES = MappingProxyType({
+    'int': 'int32',
+    'signed int': 'int32',
+    'unsigned int': 'uint32',
+    'short': 'int16',
+    'unsigned short': 'uint16',
+    'long': 'int32',
+    'unsigned long': 'uint32',
+    'char': 'int8',
+    'unsigned char': 'uint8',
+    # 64-bit types
+    'long long': 'int64',
+    'long long int': 'int64',
+    'unsigned long long': 'uint64',
+    'unsigned long long int': 'uint64',
+    'int64_t': 'int64',
+    'uint64_t': 'uint64',
+})
+
+@functools.lru_cache(maxsize=4)
+def _load_type_maps(config_path, mtime_ns):
+    """
+    Parse the NumPy type mapping and derive the reverse map (C type -> NumPy dtype).
+    
+    Returns:
+        tuple: (type_map, reverse_type_map, reverse_dtypes) as read-only
+        mappings; reverse_dtypes holds the np.dtype objects for reverse_type_map
+    """
+    type_map = load_yaml(config_path)['type_map']
+    
+    # Reverse map for return value conversion (C type -> NumPy dtype)
+    reverse_type_map = {v: k for k, v in type_map.items()}
+    
+    # Add standard C types aliases
+    reverse_type_map.update(_C_TYPE_ALIASES)
+    
+    # np.dtype construction from a string is not free; do it once per entry
+    reverse_dtypes = {c_type: np.dtype(dtype_str) for c_type, dtype_str in reverse_type_map.items()}
+    
+    return (MappingProxyType(dict(type_map)), MappingProxyType(reverse_type_map),
+            MappingProxyType(reverse_dtypes))
+
+def _return_spec(return_type, reverse_dtypes):
+    """
+    Decoding of a return type: (byte count, struct, converter), or None for void.
+    64-bit types use 2 consecutive slots.
+    """
+    if return_type == 'void':
+        return None
+    
+    if '*' in return_type:
+        # Pointer -> return address (uint32)
+        return 4, struct.Struct('<I'), np.uint32
+    
+    if is_64bit_type(return_type):
+        if 'double' in return_type:
+            return 8, struct.Struct('<d'), np.float64
+        elif 'unsigned' in return_type or 'uint' in return_type:
+            return 8, struct.Struct('<Q'), np.uint64
+        else:
+            return 8, struct.Struct('<q'), np.int64
+    
+    if 'float' in return_type:
+        return 4, struct.Struct('<f'), np.float32
+    
+    # 32-bit integers
+    dtype = reverse_dtypes.get(return_type)
+    return 4, struct.Struct('<i'), dtype.type if dtype is not None else int
+
+def _any_dtype(arr):
+    """Dtype check for void* and types without a NumPy mapping."""
+
+def _dtype_check(expected_dtype):
+    """
+    Build the dtype check for a pointer to expected_dtype.
+    Native builtin dtypes are singletons, so the common case is an identity
+    hit; otherwise only the element size must agree.
+    """
+    itemsize = expected_dtype.itemsize
+    
+    def check(arr):
+        dtype = arr.dtype
+        if dtype is not expected_dtype and dtype.itemsize != itemsize:
+            logger.error(f"Dtype Mismatch: Expected {expected_dtype}, got {dtype}")
+            raise TypeError(f"Array dtype mismatch: expected {expected_dtype}, got {dtype}")
+    return check
+
+def _warn_python_type(arg):
+    logger.warning(f"Using standard python types ({type(arg)}) is deprecated. Please use np.int32, np.float32 etc.")
+
+# NumPy scalar type struct packs as is for each slot format (no widening,
+# and unsigned types never need wrapping)
+_NATIVE_SCALARS = {
+    'f': np.float32,
+    'd': np.float64,
+    'i': np.int32,
+    'q': np.int64,
+    'I': np.uint32,
+    'Q': np.uint64,
+}
+
+def _compile_value_slots(arg_specs):
+    """
+    Generate a function mapping the call arguments to slot values.
+    
+    Value arguments are converted inline for their slot format, so a call runs
+    straight-line code with no per-argument dispatch. Arguments that already
+    have the slot's NumPy scalar type skip conversion. Pointer slots are
+    returned as 0 and filled in once their buffers are uploaded.
+    """
+    names = [f'a{i}' for i in range(len(arg_specs))]
+    lines = [f"def value_slots({', '.join(names)}):"]
+    slots = []
+    for name, spec in zip(names, arg_specs):
+        if not isinstance(spec, str):
+            slots.append('0')
+            continue
+        if spec in ('f', 'd'):
+            convert = f"float({name})"
+        elif spec in ('i', 'q'):
+            convert = f"int({name})"
+        else:
+            # Unsigned slots wrap negative values (see slot_value)
+            convert = f"_slot_value({name}, {spec!r})"
+        lines.append(f"    if {name}.__class__ is not _native[{spec!r}]:")
+        # Enforce NumPy types
+        lines.append(f"        if not isinstance({name}, _numpy_types): _warn_python_type({name})")
+        lines.append(f"        {name} = {convert}")
+        slots.append(name)
+    lines.append(f"    return [{', '.join(slots)}]")
+    
+    namespace = {
+        '_native': _NATIVE_SCALARS,
+        '_numpy_types': (np.generic, np.ndarray),
+        '_warn_python_type': _warn_python_type,
+        '_slot_value': slot_value,
+    }
+    exec('\n'.join(lines), namespace)
+    return namespace['value_slots']
+
+@functools.lru_cache(maxsize=128)
+def _call_plan(param_key, return_type, config_key):
+    """
+    Resolve every per-signature decision once: args struct, how each
+    argument is handled and how the return value is decoded.
+    
+    Args:
+        param_key (tuple): ((type, category), ...) of the parameters
+        return_type (str): C return type
+        config_key (tuple): (numpy_types.yaml path, mtime_ns)
+        
+    Returns:
+        tuple: (packer, arg_specs, pointer_args, value_slots, return_spec).
+        arg_specs holds, per argument, the dtype check for pointers and the
+        slot format for values; pointer_args the pointer indices and
+        value_slots the generated converter (see _compile_value_slots).
+    """
+    _, _, reverse_dtypes = _load_type_maps(*config_key)
+    packer = args_struct([{'type': t, 'category': c} for t, c in param_key])
+    
+    arg_specs = []
+    for (param_type, category), fmt in zip(param_key, packer.format[1:]):
+        if category == 'pointer':
+            # If it's void*, we accept any type, otherwise check match
+            base_c_type = param_type.replace('*', '').strip()
+            expected_dtype = reverse_dtypes.get(base_c_type) if base_c_type != 'void' else None
+            arg_specs.append(_dtype_check(expected_dtype) if expected_dtype is not None else _any_dtype)
+        else:
+            arg_specs.append(fmt)
+    
+    pointer_args = tuple(i for i, spec in enumerate(arg_specs) if not isinstance(spec, str))
+    return (packer, tuple(arg_specs), pointer_args, _compile_value_slots(arg_specs),
+            _return_spec(return_type, reverse_dtypes))
+
 class SmartArgs:
     """
     Handles automatic argument processing for remote functions.
@@ -16,24 +197,33 @@ class SmartArgs:
     - Reads and converts return values.
     - Manages memory cleanup.
     - Handles automatic sync-back of arrays if enabled.
+    - Optionally keeps array buffers on the device across calls (pinning).
     """
 
-    # Types that require 64-bit (2 slots / 8 bytes)
-    _64BIT_TYPES = {'int64_t', 'uint64_t', 'int64', 'uint64', 'double',
-                   'long long', 'unsigned long long', 'long long int',
-                   'unsigned long long int'}
-
-    def __init__(self, device_manager, signature: Dict[str, Any], sync_enabled: bool = True):
+    def __init__(self, device_manager, signature: Dict[str, Any], sync_enabled: bool = True,
+                 pinned: Optional[Dict[int, Dict[str, Any]]] = None):
         self.dm = device_manager
         self.signature = signature
         # Configuration
         self.sync_enabled = sync_enabled
         
+        # Device buffers kept across calls, id(array) -> entry. Owned (and
+        # eventually freed) by the caller; None disables pinning.
+        self.pinned = pinned
+        
         # State
         self.allocations: List[int] = []
         self.tracked_arrays: List[Dict[str, Any]] = []
         self._load_config()
         
+        # Type decisions are made once per signature, not on every call
+        param_key = tuple((p['type'], p['category']) for p in signature['parameters'])
+        (self._packer, self._arg_specs, self._pointer_args,
+         self._value_slots, self._return_spec) = _call_plan(
+            param_key, signature['return_type'], self._config_key
+        )
+        self._return_offset = self._get_return_offset()
+        
     def _load_config(self):
         """Load NumPy type mapping configuration."""
         # Assuming config is at ../../../config/numpy_types.yaml relative to this file
@@ -42,37 +232,21 @@ class SmartArgs:
             base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
             config_path = os.path.join(base_dir, 'config', 'numpy_types.yaml')
             
-            with open(config_path, 'r') as f:
-                self.type_map = yaml.safe_load(f)['type_map']
-                
-            # Reverse map for return value conversion (C type -> NumPy dtype)
-            self.reverse_type_map = {v: k for k, v in self.type_map.items()}
-            
-            # Add standard C types aliases
-            self.reverse_type_map['int'] = 'int32'
-            self.reverse_type_map['signed int'] = 'int32'
-            self.reverse_type_map['unsigned int'] = 'uint32'
-            self.reverse_type_map['short'] = 'int16'
-            self.reverse_type_map['unsigned short'] = 'uint16'
-            self.reverse_type_map['long'] = 'int32'
-            self.reverse_type_map['unsigned long'] = 'uint32'
-            self.reverse_type_map['char'] = 'int8'
-            self.reverse_type_map['unsigned char'] = 'uint8'
-            # 64-bit types
-            self.reverse_type_map['long long'] = 'int64'
-            self.reverse_type_map['long long int'] = 'int64'
-            self.reverse_type_map['unsigned long long'] = 'uint64'
-            self.reverse_type_map['unsigned long long int'] = 'uint64'
-            self.reverse_type_map['int64_t'] = 'int64'
-            self.reverse_type_map['uint64_t'] = 'uint64'
+            # Shared read-only maps, built once per config modification
+            self._config_key = (config_path, os.stat(config_path).st_mtime_ns)
+            self.type_map, self.reverse_type_map, _ = _load_type_maps(*self._config_key)
         except Exception as e:
             logger.error(f"Failed to load numpy type config: {e}")
             raise e
 
-    def pack(self, *args) -> bytes:
+    def pack(self, *args, out: Optional[bytearray] = None) -> bytes:
         """
         Process arguments and pack them into a binary blob.
         Allocates memory for arrays and pointers.
+        
+        If out (a bytearray of the packed size) is given, the blob is written
+        into it and a memoryview of it is returned; the view is only valid
+        until out is packed into again.
         """
         parameters = self.signature['parameters']
         
@@ -80,183 +254,229 @@ class SmartArgs:
             logger.error(f"Argument mismatch: Expected {len(parameters)}, got {len(args)}")
             raise ValueError(f"Expected {len(parameters)} arguments, got {len(args)}")
             
-        packed_args = []
+        if logger.isEnabledFor(INFO_VERBOSE):
+            for i, param in enumerate(parameters):
+                logger.log(INFO_VERBOSE, f"Processing Arg {i} ({param['name']}): Type={param['type']}, Cat={param['category']}")
         
-        for i, (arg, param) in enumerate(zip(args, parameters)):
-            param_type = param['type']
-            category = param['category']
-            
-            logger.log(INFO_VERBOSE, f"Processing Arg {i} ({param['name']}): Type={param_type}, Cat={category}")
-            
-            if category == 'pointer':
-                packed_val = self._handle_pointer(arg, param_type)
-                packed_args.append(packed_val)
-            else:
-                packed_val = self._handle_value(arg, param_type)
-                packed_args.append(packed_val)
-                
-        # Pack all arguments into the args buffer
+        # Validate and convert everything before touching device memory
+        slot_values = self._value_slots(*args)
+        if not self._pointer_args:
+            return self._pack_slots(slot_values, out)
+        
+        arrays = [
+            (i, args[i], *self._handle_pointer(args[i], parameters[i]['type'], self._arg_specs[i]))
+            for i in self._pointer_args
+        ]
+        
+        # Device addresses of the uploaded arrays go into the pointer slots
+        for i, addr in self._upload_arrays(arrays):
+            slot_values[i] = addr
+        
+        return self._pack_slots(slot_values, out)
+
+    def _pack_slots(self, slot_values: List, out: Optional[bytearray]):
+        """Pack slot values into a new blob, or into out (returns a view of it)."""
         # The wrapper expects arguments at 4-byte aligned slots
-        buffer = b''
-        for val in packed_args:
-            buffer += val
-            
-        return buffer
+        if out is None:
+            return self._packer.pack(*slot_values)
+        self._packer.pack_into(out, 0, *slot_values)
+        return memoryview(out)
 
-    def _handle_pointer(self, arg: Any, param_type: str) -> bytes:
-        """Handle pointer arguments (NumPy arrays)."""
+    def _handle_pointer(self, arg: Any, param_type: str, check_dtype=_any_dtype):
+        """
+        Validate a pointer argument (NumPy array).
+        check_dtype is the parameter's dtype check from the call plan.
+        
+        Returns:
+            tuple: (flattened array, memory caps for its device buffer)
+        """
         if not isinstance(arg, np.ndarray):
             logger.error(f"Type Mismatch: Expected NumPy array for {param_type}, got {type(arg)}")
             raise TypeError(f"Expected NumPy array for pointer argument (type {param_type}), got {type(arg)}")
             
-        # Check dtype match
-        base_c_type = param_type.replace('*', '').strip()
-        
-        # If it's void*, we accept any type, otherwise check match
-        if base_c_type != 'void':
-            expected_dtype_str = self.reverse_type_map.get(base_c_type)
-            if expected_dtype_str:
-                expected_dtype = np.dtype(expected_dtype_str)
-                if arg.dtype != expected_dtype:
-                     if arg.dtype.itemsize != expected_dtype.itemsize:
-                         logger.error(f"Dtype Mismatch: Expected {expected_dtype}, got {arg.dtype}")
-                         raise TypeError(f"Array dtype mismatch: expected {expected_dtype}, got {arg.dtype}")
+        check_dtype(arg)
         
-        # Flatten array to ensure contiguous memory
-        flat_arr = arg.ravel()
-
-        # Allocate memory on device
-        size_bytes = flat_arr.nbytes
+        # Flatten array to ensure contiguous memory. 1-D contiguous arrays
+        # (the common case) are used as is; ravel() is a view unless arg is strided
+        if arg.ndim == 1 and arg.flags.c_contiguous:
+            flat_arr = arg
+        else:
+            flat_arr = arg.ravel()
 
         # Check for .p4_caps attribute, otherwise use default SPIRAM
         if hasattr(arg, 'p4_caps'):
             caps = arg.p4_caps
-            logger.log(INFO_VERBOSE, f"Allocating array buffer: {size_bytes} bytes (caps=0x{caps:X} from .p4_caps)")
+            logger.log(INFO_VERBOSE, f"Array buffer: {flat_arr.nbytes} bytes (caps=0x{caps:X} from .p4_caps)")
         else:
             caps = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT
-            logger.log(INFO_VERBOSE, f"Allocating array buffer: {size_bytes} bytes (default SPIRAM)")
+            logger.log(INFO_VERBOSE, f"Array buffer: {flat_arr.nbytes} bytes (default SPIRAM)")
+        
+        return flat_arr, caps
 
-        addr = self.dm.allocate(size_bytes, caps, 16)
-        self.allocations.append(addr)
+    def _upload_arrays(self, arrays):
+        """
+        Allocate device buffers for array arguments and upload them.
         
-        # Write data
-        self.dm.write_memory(addr, flat_arr.tobytes())
+        Arrays sharing the same caps are carved out of one allocation
+        (ARENA_ALIGNMENT-aligned offsets) and uploaded with one write, so a
+        call costs one ALLOC, WRITE_MEM and FREE per distinct caps value
+        instead of per array. With pinning enabled each array keeps its own
+        buffer across calls instead (see _upload_pinned).
         
-        # Track for Sync-Back (if enabled)
-        if self.sync_enabled:
-             self.tracked_arrays.append({
-                 'addr': addr,
-                 'array': arg,           # Reference to original array
-                 'size': size_bytes,     # Size in bytes
-                 'shape': arg.shape,     # Original shape
-                 'dtype': arg.dtype      # Original dtype
-             })
+        Args:
+            arrays (list): (arg index, original array, flat array, caps)
+            
+        Returns:
+            list: (arg index, device address) pairs
+        """
+        addresses = []
+        if self.pinned is not None:
+            for i, arg, flat_arr, caps in arrays:
+                addr, entry = self._upload_pinned(arg, flat_arr, caps)
+                self._track(arg, flat_arr, addr, entry)
+                addresses.append((i, addr))
+            return addresses
         
-        # Return address as 32-bit integer
-        return struct.pack('<I', addr)
-
-    def _is_64bit_type(self, type_str: str) -> bool:
-        """Check if a type requires 64-bit (2 slots)."""
-        clean_type = type_str.replace('const', '').replace('volatile', '').strip()
-        return clean_type in self._64BIT_TYPES
-
-    def _handle_value(self, arg: Any, param_type: str) -> bytes:
-        """Handle scalar value arguments."""
-        # Enforce NumPy types
-        if not isinstance(arg, (np.generic, np.ndarray)):
-            logger.warning(f"Using standard python types ({type(arg)}) is deprecated. Please use np.int32, np.float32 etc.")
-
-        # Handle 64-bit types (use 2 slots / 8 bytes)
-        if self._is_64bit_type(param_type):
-            if 'double' in param_type:
-                # Double: pack as 64-bit float (little-endian)
-                return struct.pack('<d', float(arg))
-            elif 'unsigned' in param_type or 'uint' in param_type:
-                # Unsigned 64-bit integer
-                return struct.pack('<Q', int(arg) & 0xFFFFFFFFFFFFFFFF)
+        arenas = {}
+        for item in arrays:
+            arenas.setdefault(item[3], []).append(item)
+        
+        for caps, items in arenas.items():
+            offsets = []
+            total = 0
+            for _, _, flat_arr, _ in items:
+                total = (total + ARENA_ALIGNMENT - 1) & ~(ARENA_ALIGNMENT - 1)
+                offsets.append(total)
+                total += flat_arr.nbytes
+            
+            logger.log(INFO_VERBOSE, f"Allocating {total} bytes for {len(items)} array(s) (caps=0x{caps:X})")
+            base = self.dm.allocate(total, caps, ARENA_ALIGNMENT)
+            self.allocations.append(base)
+            
+            # One upload per buffer: a lone array is sent straight from its
+            # own memory, several are staged into one contiguous image first
+            if len(items) == 1:
+                self.dm.write_memory(base, memoryview(items[0][2].view(np.uint8)))
             else:
-                # Signed 64-bit integer
-                return struct.pack('<q', int(arg))
+                image = bytearray(total)
+                for (_, _, flat_arr, _), offset in zip(items, offsets):
+                    image[offset:offset + flat_arr.nbytes] = memoryview(flat_arr.view(np.uint8))
+                self.dm.write_memory(base, image)
+            
+            for (i, arg, flat_arr, _), offset in zip(items, offsets):
+                addr = base + offset
+                self._track(arg, flat_arr, addr)
+                addresses.append((i, addr))
+        
+        return addresses
 
-        # 32-bit types (1 slot / 4 bytes)
-        if 'float' in param_type:
-            return struct.pack('<f', float(arg))
-        elif 'unsigned' in param_type or 'uint' in param_type:
-            # Unsigned 32-bit integer
-            return struct.pack('<I', int(arg) & 0xFFFFFFFF)
+    def _upload_pinned(self, arg: np.ndarray, flat_arr: np.ndarray, caps: int):
+        """
+        Give a pinned array its own long-lived device buffer.
+        
+        The buffer is reused while the array's size and caps stay the same,
+        and only re-uploaded when the host contents differ from what the
+        device holds (as of the last upload or sync-back).
+        
+        Returns:
+            tuple: (device address, pinned entry)
+        """
+        key = id(arg)
+        entry = self.pinned.get(key)
+        if entry is not None and (entry['size'] != flat_arr.nbytes or entry['caps'] != caps):
+            self.dm.free(entry['addr'])
+            del self.pinned[key]
+            entry = None
+        
+        if entry is None:
+            addr = self.dm.allocate(flat_arr.nbytes, caps, ARENA_ALIGNMENT)
+            entry = {
+                'array': arg,  # Keeps id(arg) from being reused while pinned
+                'addr': addr,
+                'size': flat_arr.nbytes,
+                'caps': caps,
+                'data': None,  # Device contents, if known
+            }
+            self.pinned[key] = entry
+        
+        # Compared and uploaded through a byte view; a bytes copy is only
+        # taken as the new snapshot of the device contents
+        view = memoryview(flat_arr.view(np.uint8))
+        if entry['data'] is not None and view == entry['data']:
+            logger.log(INFO_VERBOSE, f"Pinned array at 0x{entry['addr']:08X} unchanged, skipping upload")
         else:
-            # Signed 32-bit integer
-            return struct.pack('<i', int(arg))
+            logger.log(INFO_VERBOSE, f"Uploading pinned array to 0x{entry['addr']:08X}")
+            self.dm.write_memory(entry['addr'], view)
+            if self.sync_enabled:
+                entry['data'] = view.tobytes()
+        
+        # Without sync-back the device may change the buffer unseen
+        if not self.sync_enabled:
+            entry['data'] = None
+        return entry['addr'], entry
+
+    def _track(self, arg: np.ndarray, flat_arr: np.ndarray, addr: int, pinned_entry=None):
+        """Track an uploaded array for Sync-Back (if enabled)."""
+        if not self.sync_enabled:
+            return
+        self.tracked_arrays.append({
+            'addr': addr,
+            'array': arg,             # Reference to original array
+            'size': flat_arr.nbytes,  # Size in bytes
+            'shape': arg.shape,       # Original shape
+            'dtype': arg.dtype,       # Original dtype
+            # Contiguous arrays are refreshed with a raw byte copy
+            'fast': arg.flags.c_contiguous and arg.flags.writeable,
+            'pinned': pinned_entry,
+        })
 
-    def _get_args_array_size(self) -> int:
-        """Get the args array size from signature metadata."""
-        # Try to get from signature's addresses metadata
+    def _get_return_offset(self) -> int:
+        """Byte offset of the return value in the args array, from signature metadata."""
+        nbytes = self._return_spec[0] if self._return_spec else 4
+        
+        # Slot recorded by the metadata generator
+        result = self.signature.get('result')
+        if result and 'slot' in result:
+            return result['slot'] * 4
+        
+        # Otherwise the return value occupies the last slot(s) of the args array
+        array_size = 32  # Default fallback
         if 'addresses' in self.signature:
             addrs = self.signature['addresses']
             if 'args_array_size' in addrs:
-                return addrs['args_array_size']
-            if 'args_array_bytes' in addrs:
-                return addrs['args_array_bytes'] // 4
-        # Default fallback
-        return 32
+                array_size = addrs['args_array_size']
+            elif 'args_array_bytes' in addrs:
+                array_size = addrs['args_array_bytes'] // 4
+        return array_size * 4 - nbytes
 
-    def get_return_value(self, args_addr: int) -> Any:
-        """
-        Read and convert return value from the args array.
-        64-bit types use 2 consecutive slots.
+    def return_slot(self, args_addr: int) -> Optional[Tuple[int, int]]:
         """
-        return_type = self.signature['return_type']
+        Location of the return value inside the args array.
 
-        if return_type == 'void':
+        Returns:
+            tuple: (address, size in bytes), or None for void functions
+        """
+        if self._return_spec is None:
             return None
+        return args_addr + self._return_offset, self._return_spec[0]
 
-        # Determine if 64-bit return type
-        is_64bit = self._is_64bit_type(return_type)
-
-        # Get actual array size from signature
-        array_size = self._get_args_array_size()
-
-        # Calculate return offset based on actual array size
-        # 64-bit uses last 2 slots, 32-bit uses last slot
-        if is_64bit:
-            return_slot = array_size - 2
-            return_offset = return_slot * 4
-            raw_bytes = self.dm.read_memory(args_addr + return_offset, 8)
-        else:
-            return_slot = array_size - 1
-            return_offset = return_slot * 4
-            raw_bytes = self.dm.read_memory(args_addr + return_offset, 4)
-
-        if '*' in return_type:
-            # Pointer -> return address (uint32)
-            val = struct.unpack('<I', raw_bytes)[0]
-            return np.uint32(val)
-
-        elif is_64bit:
-            # 64-bit types
-            if 'double' in return_type:
-                val = struct.unpack('<d', raw_bytes)[0]
-                return np.float64(val)
-            elif 'unsigned' in return_type or 'uint' in return_type:
-                val = struct.unpack('<Q', raw_bytes)[0]
-                return np.uint64(val)
-            else:
-                val = struct.unpack('<q', raw_bytes)[0]
-                return np.int64(val)
-
-        elif 'float' in return_type:
-            val = struct.unpack('<f', raw_bytes)[0]
-            return np.float32(val)
+    def get_return_value(self, args_addr: int, raw_bytes: Optional[bytes] = None) -> Any:
+        """
+        Read and convert return value from the args array.
+        64-bit types use 2 consecutive slots.
 
-        else:
-            # 32-bit integers
-            val_i32 = struct.unpack('<i', raw_bytes)[0]
+        Args:
+            args_addr: Address of the args array
+            raw_bytes: Return slot contents already fetched with the call
+                (see DeviceManager.call_and_fetch); read from device if None
+        """
+        if self._return_spec is None:
+            return None
+        _, decoder, convert = self._return_spec
 
-            if return_type in self.reverse_type_map:
-                dtype_str = self.reverse_type_map[return_type]
-                return np.dtype(dtype_str).type(val_i32)
-            else:
-                return val_i32
+        if raw_bytes is None:
+            raw_bytes = self.dm.read_memory(*self.return_slot(args_addr))
+        return convert(decoder.unpack_from(raw_bytes)[0])
 
     def sync_back(self):
         """
@@ -266,27 +486,36 @@ class SmartArgs:
             return
 
         for item in self.tracked_arrays:
+            pinned_entry = item['pinned']
             try:
-                # 1. Read modified data
                 logger.log(INFO_VERBOSE, f"Syncing back array from 0x{item['addr']:08X}")
-                raw_bytes = self.dm.read_memory(item['addr'], item['size'])
-                
-                # 2. Create a view of the new data with correct type/shape
-                new_data = np.frombuffer(raw_bytes, dtype=item['dtype']).reshape(item['shape'])
-                
-                # 3. Update original array in-place
-                np.copyto(item['array'], new_data)
+                if item['fast']:
+                    # Same layout on both sides: the reply is received
+                    # straight into the original array (no bytes in between)
+                    view = self.dm.read_memory_into(item['addr'], item['array'].reshape(-1).view(np.uint8))
+                    if pinned_entry is not None:
+                        pinned_entry['data'] = view.tobytes()
+                else:
+                    # 1. Read modified data
+                    raw_bytes = self.dm.read_memory(item['addr'], item['size'])
+                    if pinned_entry is not None:
+                        pinned_entry['data'] = raw_bytes
+                    
+                    # 2. Update original array in-place
+                    new_data = np.frombuffer(raw_bytes, dtype=item['dtype']).reshape(item['shape'])
+                    np.copyto(item['array'], new_data)
             except Exception as e:
+                if pinned_entry is not None:
+                    pinned_entry['data'] = None
                 logger.warning(f"Failed to sync back memory at 0x{item['addr']:08x}: {e}")
 
     def cleanup(self):
         """Free all allocated memory."""
         logger.log(INFO_VERBOSE, f"Cleaning up {len(self.allocations)} temporary allocations")
-        for addr in self.allocations:
-            try:
-                self.dm.free(addr)
-            except Exception as e:
-                logger.warning(f"Failed to free memory at 0x{addr:08x}: {e}")
+        failed = self.dm.free_many(self.allocations)
+        if failed:
+            logger.warning(f"Failed to free {len(failed)} temporary allocation(s): "
+                           + ", ".join(f"0x{addr:08x}" for addr in failed))
         
         # Clear all state
         self.allocations.clear()
@@ -1,11 +1,16 @@
-import json
+import hashlib
 import shutil
 import subprocess
+import tempfile
 import os
 from ..utils.logger import setup_logger, INFO_VERBOSE, logging
+from ..utils.json_writer import write_json
 
 logger = setup_logger(__name__)
 
+# Disassembly listings keyed by ELF contents (see BinaryObject.disassemble)
+DISASM_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'p4jit', 'disasm')
+
 class BinaryObject:
     """
     Result object containing binary and all metadata.
@@ -22,10 +27,9 @@ class BinaryObject:
         self._entry_address = entry_address
         self._sections = sections
         self._symbols = symbols
-        self._sections = sections
-        self._symbols = symbols
         self._output_dir = output_dir
         self.metadata = {} # Extra metadata (e.g. from wrapper)
+        self.dependencies = None # Files compiled into it (see Compiler.dependencies_of)
         
         # Build full path to objdump
         toolchain_path = config['toolchain']['path']
@@ -34,7 +38,7 @@ class BinaryObject:
         
     @property
     def data(self):
-        """Raw binary data as bytes."""
+        """Raw binary data (bytes-like)."""
         return self._data
         
     @property
@@ -82,28 +86,67 @@ class BinaryObject:
         """Save metadata as JSON."""
         os.makedirs(os.path.dirname(path) if os.path.dirname(path) else '.', exist_ok=True)
         metadata = self.get_metadata_dict()
-        with open(path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        write_json(path, metadata)
             
     def disassemble(self, output=None, source_intermix=True):
         """
         Disassemble binary.
+        Plain listings are cached by ELF contents, so an unchanged binary
+        is not run through objdump again. Source-intermixed listings also
+        depend on the source files and are always regenerated.
         """
-        cmd = [self._objdump, '-d']
-        if source_intermix:
-            cmd.append('-S')
-        cmd.append(self._elf_path)
-        
-        logger.log(INFO_VERBOSE, f"Disassembling {os.path.basename(self._elf_path)}")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        cache_path = None if source_intermix else self._disasm_cache_path()
+        text = self._read_cached(cache_path) if cache_path else None
+        
+        if text is None:
+            cmd = [self._objdump, '-d']
+            if source_intermix:
+                cmd.append('-S')
+            cmd.append(self._elf_path)
+            
+            logger.log(INFO_VERBOSE, f"Disassembling {os.path.basename(self._elf_path)}")
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            text = result.stdout
+            if cache_path and result.returncode == 0:
+                self._store_cached(cache_path, text)
         
         if output:
             os.makedirs(os.path.dirname(output) if os.path.dirname(output) else '.', exist_ok=True)
             with open(output, 'w') as f:
-                f.write(result.stdout)
+                f.write(text)
             logger.info(f"Disassembly saved to {output}")
         else:
-            logger.info(result.stdout)
+            logger.info(text)
+            
+    def _disasm_cache_path(self):
+        """Cache entry for this ELF and objdump (None if the ELF is unreadable)."""
+        h = hashlib.sha256(self._objdump.encode())
+        try:
+            with open(self._elf_path, 'rb') as f:
+                h.update(f.read())
+        except OSError:
+            return None
+        return os.path.join(DISASM_CACHE_DIR, f'{h.hexdigest()}.txt')
+        
+    def _read_cached(self, path):
+        try:
+            with open(path) as f:
+                text = f.read()
+        except OSError:
+            return None
+        logger.log(INFO_VERBOSE, f"Disassembly cache hit: {os.path.basename(self._elf_path)}")
+        return text
+        
+    def _store_cached(self, path, text):
+        """Atomically add a listing to the cache."""
+        try:
+            os.makedirs(DISASM_CACHE_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix='.txt.tmp', dir=DISASM_CACHE_DIR)
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Failed to store disassembly in cache: {e}")
             
     def print_sections(self):
         """Print section information."""
@@ -141,7 +184,7 @@ class BinaryObject:
         logger.info(f"  Total: {self.total_size} bytes")
         
     def get_data(self):
-        """Get raw binary data as bytes."""
+        """Get raw binary data (bytes-like)."""
         return self._data
         
     def get_metadata_dict(self):
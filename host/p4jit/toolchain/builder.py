@@ -1,24 +1,29 @@
-import yaml
 import tempfile
 import shutil
 import atexit
 import os
-import glob
+from functools import cached_property
 from ..utils.logger import setup_logger, INFO_VERBOSE
+from ..utils.yaml_loader import load_yaml
 
-from .compiler import Compiler
-from .linker_gen import LinkerGenerator
-from .binary_processor import BinaryProcessor
-from .symbol_extractor import SymbolExtractor
-from .validator import Validator
 from .binary_object import BinaryObject
-from .wrapper_builder import WrapperBuilder
 
 logger = setup_logger(__name__)
 
 # Track all temp directories for cleanup
 _temp_dirs_to_cleanup = []
 
+# Process-wide temp root; each Builder gets a subdirectory on first build
+_shared_temp_root = None
+
+def _get_temp_root():
+    """Create the shared temp root on first use."""
+    global _shared_temp_root
+    if _shared_temp_root is None:
+        _shared_temp_root = tempfile.mkdtemp(prefix='esp32_build_')
+        _temp_dirs_to_cleanup.append(_shared_temp_root)
+    return _shared_temp_root
+
 def _cleanup_temp_dirs():
     """Cleanup all registered temp directories on exit."""
     for temp_dir in _temp_dirs_to_cleanup:
@@ -52,24 +57,55 @@ class Builder:
         Initialize builder with configuration.
         """
         self.config = self._load_config(config_path)
-        self.compiler = Compiler(self.config)
         
+        # Source discovery results: dir -> ((mtime, extensions), files)
+        self._discover_cache = {}
+        
+    # Toolchain helpers are created (and their modules imported) on first use,
+    # so importing/constructing a Builder stays cheap for callers that only
+    # need part of it.
+    
+    @cached_property
+    def temp_dir(self):
+        """Per-Builder scratch directory (created on first build)."""
+        temp_dir = tempfile.mkdtemp(dir=_get_temp_root())
+        logger.debug(f"Builder using temp directory: {temp_dir}")
+        return temp_dir
+    
+    @cached_property
+    def compiler(self):
+        from .compiler import Compiler
+        return Compiler(self.config)
+    
+    @cached_property
+    def linker_gen(self):
+        from .linker_gen import LinkerGenerator
         template_path = os.path.join(
             os.path.dirname(__file__), 
             '..', 'templates', 'linker.ld.template'
         )
-        self.linker_gen = LinkerGenerator(template_path)
-        
-        self.processor = BinaryProcessor(self.config)
-        self.extractor = SymbolExtractor(self.config)
-        self.validator = Validator(self.config)
-        
-        self.temp_dir = tempfile.mkdtemp(prefix='esp32_build_')
-        _temp_dirs_to_cleanup.append(self.temp_dir)
-        logger.debug(f"Builder using temp directory: {self.temp_dir}")
-        
-        # Add wrapper builder for automatic wrapper generation
-        self.wrapper = WrapperBuilder(self, self.config)
+        return LinkerGenerator(template_path)
+    
+    @cached_property
+    def processor(self):
+        from .binary_processor import BinaryProcessor
+        return BinaryProcessor(self.config)
+    
+    @cached_property
+    def extractor(self):
+        from .symbol_extractor import SymbolExtractor
+        return SymbolExtractor(self.config)
+    
+    @cached_property
+    def validator(self):
+        from .validator import Validator
+        return Validator(self.config)
+    
+    @cached_property
+    def wrapper(self):
+        """Wrapper builder for automatic wrapper generation."""
+        from .wrapper_builder import WrapperBuilder
+        return WrapperBuilder(self, self.config)
         
     def _load_config(self, config_path):
         """Load YAML configuration file."""
@@ -82,8 +118,7 @@ class Builder:
             # e.g. /path/to/project/config/toolchain.yaml -> /path/to/project
             base_dir = os.path.dirname(os.path.dirname(config_path))
             
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_yaml(config_path)
             
         # Post-process paths to ensure they are absolute
         # Fix firmware_elf path relative to project root
@@ -108,24 +143,33 @@ class Builder:
     def _discover_source_files(self, source_dir):
         """
         Discover all compilable source files in directory.
+        Results are reused until the directory's mtime changes
+        (adding/removing/renaming a file bumps it).
         """
-        compile_extensions = self.config['extensions']['compile'].keys()
-        discovered_files = []
-        
-        for ext in compile_extensions:
-            pattern = os.path.join(source_dir, f'*{ext}')
-            found = glob.glob(pattern)
-            discovered_files.extend(found)
+        compile_extensions = self.config['extensions']['compile']
+        stamp = (os.stat(source_dir).st_mtime_ns, tuple(compile_extensions))
+        cached = self._discover_cache.get(source_dir)
+        if cached and cached[0] == stamp:
+            return list(cached[1])
+        
+        # Single directory read; hidden files are skipped like glob does
+        discovered_files = [
+            entry.path for entry in os.scandir(source_dir)
+            if not entry.name.startswith('.') and entry.is_file()
+            and os.path.splitext(entry.name)[1] in compile_extensions
+        ]
         
         # Sort for deterministic build order
         discovered_files.sort()
         
+        self._discover_cache[source_dir] = (stamp, tuple(discovered_files))
         return discovered_files
-            
+    
     def build(self, source, entry_point, base_address, 
-              optimization=None, output_dir='build', use_firmware_elf=True):
+              optimization=None, output_dir='build', use_firmware_elf=True, linker_symbols=None):
         """
         Build position-specific binary from multiple source files.
+        linker_symbols: optional absolute addresses (name -> int) defined at link time.
         """
         if optimization is None:
             optimization = self.config['compiler']['optimization']
@@ -151,34 +195,20 @@ class Builder:
             )
         
         logger.info(f"Discovered {len(discovered_files)} source file(s) in {source_dir}")
-        for src in discovered_files:
-            logger.log(INFO_VERBOSE, f"  - {os.path.basename(src)}")
-        
-        # Compile each source file to object file
-        obj_files = []
-        for src_file in discovered_files:
-            basename = os.path.basename(src_file)
-            name_only = os.path.splitext(basename)[0]
-            obj_path = os.path.join(self.temp_dir, f'{name_only}.o')
-            
-            logger.log(INFO_VERBOSE, f"Compiling {basename}...")
-            
-            try:
-                self.compiler.compile(
-                    source=src_file,
-                    output=obj_path,
-                    optimization=optimization
-                )
-                obj_files.append(obj_path)
-            except RuntimeError as e:
-                logger.error(f"Failed to compile {basename}")
-                raise e
+        if logger.isEnabledFor(INFO_VERBOSE):
+            for src in discovered_files:
+                logger.log(INFO_VERBOSE, f"  - {os.path.basename(src)}")
+        
+        # Compile all sources (unchanged ones come from the object cache)
+        obj_files = self.compiler.compile_many(discovered_files, self.temp_dir, optimization)
         
         # Generate linker script
         linker_script = self.linker_gen.generate(
             entry_point=entry_point,
             base_address=base_addr,
-            memory_size=self.config['memory']['max_size']
+            memory_size=self.config['memory']['max_size'],
+            output_path=os.path.join(self.temp_dir, 'linker.ld'),
+            symbols=linker_symbols
         )
         logger.debug(f"Generated linker script: {linker_script}")
         
@@ -188,21 +218,19 @@ class Builder:
             obj_files=obj_files,
             linker_script=linker_script,
             output=os.path.join(self.temp_dir, 'output.elf'),
-            use_firmware_elf=use_firmware_elf
+            use_firmware_elf=use_firmware_elf,
+            optimization=optimization
         )
         
         # Extract binary
         logger.log(INFO_VERBOSE, "Extracting binary...")
-        raw_bin = self.compiler.extract_binary(
-            elf_file=elf_file,
-            output=os.path.join(self.temp_dir, 'output.bin')
-        )
+        raw_bin = self.compiler.extract_binary(elf_file=elf_file)
         
         # Process sections and symbols
         sections = self.processor.extract_sections(elf_file)
         padded_bin = self.processor.pad_bss(raw_bin, sections)
         symbols = self.extractor.extract_all_symbols(elf_file)
-        entry_addr = self.extractor.get_function_address(elf_file, entry_point)
+        entry_addr = self.extractor.get_function_address(elf_file, entry_point, symbols)
         
         if entry_addr is None:
             logger.error(f"Entry point '{entry_point}' not found in compiled binary")
@@ -212,7 +240,7 @@ class Builder:
         
         logger.info("Build validation passed")
         
-        return BinaryObject(
+        binary = BinaryObject(
             binary_data=padded_bin,
             config=self.config,
             elf_path=elf_file,
@@ -223,3 +251,5 @@ class Builder:
             symbols=symbols,
             output_dir=output_dir
         )
+        binary.dependencies = self.compiler.dependencies_of(obj_files)
+        return binary
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from ..utils.logger import setup_logger, INFO_VERBOSE
+
+logger = setup_logger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'p4jit', 'objs')
+
+class CompileCache:
+    """
+    Content-addressed store for compiled object files.
+    Objects are keyed by source contents and compiler settings, so an
+    unchanged translation unit is never recompiled.
+    
+    Each key also records the files the compiler read (its dependency list,
+    e.g. from gcc -MD) with their digests; a changed or missing dependency
+    makes the entry a miss, wherever the header lives.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        os.makedirs(self.cache_dir, exist_ok=True)
+        logger.debug(f"Compile cache directory: {self.cache_dir}")
+
+    @staticmethod
+    def digest_files(paths):
+        """
+        Hash the contents of several files into one digest.
+
+        Args:
+            paths (list): File paths (hashed in the given order)
+
+        Returns:
+            str: Hex digest
+        """
+        h = hashlib.sha256()
+        for path in paths:
+            h.update(os.path.basename(path).encode())
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        return h.hexdigest()
+
+    @staticmethod
+    def file_digests(paths):
+        """
+        Hash each file separately.
+
+        Args:
+            paths (iterable): File paths
+
+        Returns:
+            dict: Path -> hex digest, or None if a file cannot be read
+        """
+        digests = {}
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    digests[path] = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                return None
+        return digests
+
+    @classmethod
+    def digests_match(cls, digests):
+        """True if every file still has the digest recorded by file_digests()."""
+        return isinstance(digests, dict) and cls.file_digests(digests) == digests
+
+    def make_key(self, source, *parts):
+        """
+        Build cache key for a source file.
+
+        Args:
+            source (str): Path to source file
+            *parts: Extra values affecting the object (flags, compiler path, ...)
+
+        Returns:
+            str: Hex digest identifying the object file
+        """
+        h = hashlib.sha256()
+        h.update(self.digest_files([source]).encode())
+        for part in parts:
+            h.update(b'|')
+            h.update(str(part).encode())
+        return h.hexdigest()
+
+    def _path(self, key, digests):
+        # The object is addressed by its dependency digests too, so a record
+        # and an object stored by different processes never mix
+        h = hashlib.sha256(key.encode())
+        h.update(json.dumps(digests, sort_keys=True).encode())
+        return os.path.join(self.cache_dir, f'{h.hexdigest()}.o')
+
+    def fetch(self, key, output):
+        """
+        Copy cached object to output path, if its dependencies are unchanged.
+
+        Returns:
+            list: Dependency paths of the object on a cache hit, else None
+        """
+        record = self.load_record(key)
+        if not isinstance(record, dict) or not self.digests_match(record.get('deps')):
+            return None
+        cached = self._path(key, record['deps'])
+        if not os.path.exists(cached):
+            return None
+        shutil.copyfile(cached, output)
+        logger.log(INFO_VERBOSE, f"Compile cache hit: {os.path.basename(output)}")
+        return list(record['deps'])
+
+    def store(self, key, obj_path, deps):
+        """
+        Atomically add a freshly compiled object to the cache.
+
+        Args:
+            key (str): Key from make_key()
+            obj_path (str): Compiled object
+            deps (list): Files the compiler read (objects without one are not stored)
+        """
+        digests = self.file_digests(deps) if deps else None
+        if digests is None:
+            logger.debug(f"No dependency list for {obj_path}, not caching it")
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(suffix='.o.tmp', dir=self.cache_dir)
+            os.close(fd)
+            shutil.copyfile(obj_path, tmp_path)
+            os.replace(tmp_path, self._path(key, digests))
+        except OSError as e:
+            logger.debug(f"Failed to store {obj_path} in compile cache: {e}")
+            return
+        self.store_record(key, {'deps': digests})
+
+    def load_record(self, key):
+        """
+        Small JSON record saved with store_record().
+
+        Returns:
+            The stored value, or None on a miss
+        """
+        try:
+            with open(os.path.join(self.cache_dir, f'{key}.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store_record(self, key, value):
+        """Atomically save a JSON-serializable value under key."""
+        try:
+            fd, tmp_path = tempfile.mkstemp(suffix='.json.tmp', dir=self.cache_dir)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, os.path.join(self.cache_dir, f'{key}.json'))
+        except OSError as e:
+            logger.debug(f"Failed to store record {key} in compile cache: {e}")
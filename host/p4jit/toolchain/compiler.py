@@ -1,9 +1,87 @@
 import subprocess
 import os
+import re
+import shutil
+import tempfile
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from elftools.common.exceptions import ELFError
+from elftools.elf.constants import SH_FLAGS
+from elftools.elf.elffile import ELFFile
 from ..utils.logger import setup_logger, INFO_VERBOSE
+from .compile_cache import CompileCache
 
 logger = setup_logger(__name__)
 
+@functools.lru_cache(maxsize=256)
+def _include_flag(source_dir):
+    """Include flag for a source directory (shared by all its sources)."""
+    return f'-I{source_dir}'
+
+# CPython only starts children with posix_spawn (instead of fork+exec) when
+# close_fds is False; our fds are non-inheritable (PEP 446), so nothing leaks.
+# Windows keeps the default.
+_SPAWN_KWARGS = {} if os.name == 'nt' else {'close_fds': False}
+
+def _run_tool(cmd, cwd=None):
+    """
+    Run a toolchain command. Stdout is never used; stderr is kept as raw
+    bytes and only decoded when the command fails.
+    """
+    return subprocess.run(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, cwd=cwd, **_SPAWN_KWARGS
+    )
+
+def _stderr_text(result):
+    """Decode stderr of a failed command."""
+    return result.stderr.decode('utf-8', errors='replace')
+
+def _dep_path(output):
+    """Dependency file gcc -MD writes for an object (its path with a .d suffix)."""
+    return os.path.splitext(output)[0] + '.d'
+
+def _read_dep_file(path, base_dir):
+    """
+    Prerequisites of a make-style dependency file (gcc -MD, as --MD).
+    Relative paths are taken relative to base_dir, the compiler's working
+    directory.
+    
+    Returns:
+        list: Absolute paths, or None if the file cannot be read
+    """
+    try:
+        with open(path, encoding='utf-8', errors='surrogateescape') as f:
+            text = f.read()
+    except OSError:
+        return None
+    deps = []
+    for rule in text.replace('\\\r\n', ' ').replace('\\\n', ' ').splitlines():
+        # 'target: prereq ...'; the target may hold a drive letter (C:\...)
+        sep = re.search(r':(\s|$)', rule)
+        if not sep:
+            continue
+        for token in re.findall(r'(?:\\.|[^\s\\])+', rule[sep.end():]):
+            token = re.sub(r'\\([ #])', r'\1', token).replace('$$', '$')
+            deps.append(os.path.abspath(os.path.join(base_dir, token)))
+    return deps
+
+def _scan_toolchain(toolchain_path):
+    """
+    List the toolchain bin directory once.
+    
+    Returns:
+        dict: File name -> path
+    """
+    try:
+        with os.scandir(toolchain_path) as it:
+            return {entry.name: entry.path for entry in it}
+    except OSError as e:
+        raise FileNotFoundError(f"Toolchain directory not accessible: {toolchain_path} ({e})") from e
+
+def _lookup_tool(tools, exe):
+    """Find a tool in a toolchain listing (Windows binaries carry .exe)."""
+    return tools.get(exe) or tools.get(f'{exe}.exe')
+
 class Compiler:
     """Handles compilation and linking operations with multi-file support."""
     
@@ -12,22 +90,66 @@ class Compiler:
         self.toolchain_path = config['toolchain']['path']
         self.prefix = config['toolchain']['prefix']
         
+        # One directory read resolves every tool, so a bad toolchain path
+        # fails here instead of at the first compile
+        tools = _scan_toolchain(self.toolchain_path)
+        
         # Build compiler paths from config
         self.compilers = {}
         for name, exe in config['toolchain']['compilers'].items():
-            self.compilers[name] = os.path.join(self.toolchain_path, exe)
+            path = _lookup_tool(tools, exe)
+            if path is None:
+                raise FileNotFoundError(
+                    f"Compiler '{exe}' not found in {self.toolchain_path}\n"
+                    f"Toolchain contents: {sorted(tools)}"
+                )
+            self.compilers[name] = path
         
-        # Build other tool paths
-        self.objcopy = os.path.join(self.toolchain_path, f"{self.prefix}-objcopy")
-        self.objdump = os.path.join(self.toolchain_path, f"{self.prefix}-objdump")
-        self.readelf = os.path.join(self.toolchain_path, f"{self.prefix}-readelf")
-        self.size = os.path.join(self.toolchain_path, f"{self.prefix}-size")
+        # Build other tool paths (not run by the build itself, so not required)
+        self.objcopy = self._tool_path(tools, f"{self.prefix}-objcopy")
+        self.objdump = self._tool_path(tools, f"{self.prefix}-objdump")
+        self.readelf = self._tool_path(tools, f"{self.prefix}-readelf")
+        self.size = self._tool_path(tools, f"{self.prefix}-size")
         
-    def compile(self, source, output, optimization='O2'):
+        self.lto = config['compiler'].get('lto', False)
+        # One section per function/object lets --gc-sections drop unused code
+        self.section_split = config['compiler'].get(
+            'section_split', config['linker'].get('garbage_collection', False)
+        )
+        
+        # Fixed parts of the gcc/g++ command line, built once:
+        # <compiler> <prefix> -O<n> -g -I<dir> -c <source> -o <output> <suffix>
+        arch = config['compiler']['arch']
+        abi = config['compiler']['abi']
+        self._cc_prefix = [f'-march={arch}', f'-mabi={abi}']
+        # Pass architecture to assembler
+        self._cc_suffix = [f'-Wa,-march={arch}'] + list(config['compiler']['flags'])
+        if self.section_split:
+            self._cc_suffix += ['-ffunction-sections', '-fdata-sections']
+        if self.lto:
+            self._cc_suffix.append('-flto=auto')
+        
+        # Content-addressed object cache (skips recompiling unchanged sources)
+        build_config = config.get('build', {})
+        self.cache = None
+        if build_config.get('cache', False):
+            self.cache = CompileCache(build_config.get('cache_dir'))
+        
+        # Object path -> files its last compile read (None if unknown)
+        self.dependencies = {}
+        
+    def _tool_path(self, tools, exe):
+        """Resolved tool path, or the expected location if it is missing."""
+        return _lookup_tool(tools, exe) or os.path.join(self.toolchain_path, exe)
+        
+    def _build_cmd(self, source, output, optimization):
         """
-        Compile source file to object file.
+        Build compile command for a source file.
         Automatically selects compiler based on file extension.
         Include path is derived from source file directory.
+        
+        Returns:
+            tuple: (cmd list, compiler name)
         """
         # Get file extension
         ext = os.path.splitext(source)[1]
@@ -44,8 +166,7 @@ class Compiler:
         compiler_path = self.compilers[compiler_name]
         
         # Derive include directory from source file
-        source_dir = os.path.dirname(os.path.abspath(source))
-        include_flag = f'-I{source_dir}'
+        include_flag = _include_flag(os.path.dirname(os.path.abspath(source)))
         
         # Build command based on compiler type
         if compiler_name == 'as':
@@ -54,44 +175,224 @@ class Compiler:
                 compiler_path,
                 include_flag,
                 source,
-                '-o', output
+                '-o', output,
+                '--MD', _dep_path(output)
             ]
         else:
             # gcc or g++ - full compilation flags
-            arch = self.config['compiler']['arch']
-            abi = self.config['compiler']['abi']
-            flags = self.config['compiler']['flags']
-            
             cmd = [
                 compiler_path,
-                f'-march={arch}',
-                f'-mabi={abi}',
+                *self._cc_prefix,
                 f'-{optimization}',
                 '-g',
                 include_flag,
                 '-c',
                 source,
                 '-o', output,
-                f'-Wa,-march={arch}' # Pass architecture to assembler
-            ] + flags
+                *self._cc_suffix,
+                '-MD'  # Dependency list (<output>.d) for the caches
+            ]
+            
+        return cmd, compiler_name
         
-        logger.log(INFO_VERBOSE, f"Compiling {os.path.basename(source)} with {compiler_name}...")
-        logger.debug(f"Command: {' '.join(cmd)}")
+    def compile(self, source, output, optimization='O2'):
+        """
+        Compile source file to object file.
+        """
+        return self._compile_jobs([(source, output)], optimization)[0]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+    def compile_many(self, sources, output_dir, optimization='O2'):
+        """
+        Compile several source files concurrently.
         
-        if result.returncode != 0:
-            logger.error(f"Compilation failed:\n{result.stderr}")
+        Each source is compiled to <output_dir>/<name>.o. The number of
+        parallel compiler processes defaults to the CPU count and can be
+        overridden with the P4JIT_JOBS environment variable.
+        
+        Args:
+            sources (list): Source file paths
+            output_dir (str): Directory for object files
+            optimization (str): Optimization level (e.g. 'O2')
+            
+        Returns:
+            list: Object file paths, in the order of sources
+        """
+        jobs = [
+            (source, os.path.join(output_dir, f'{os.path.splitext(os.path.basename(source))[0]}.o'))
+            for source in sources
+        ]
+        return self._compile_jobs(jobs, optimization)
+        
+    def dependencies_of(self, obj_files):
+        """
+        Files read to compile the given objects (sources and every included
+        header), or None if the list is unknown for any of them.
+        """
+        deps = set()
+        for obj in obj_files:
+            obj_deps = self.dependencies.get(obj)
+            if obj_deps is None:
+                return None
+            deps.update(obj_deps)
+        return sorted(deps)
+        
+    def _cache_key(self, source, cmd, output):
+        """
+        Build object cache key: source contents, the full command line (minus
+        the output paths) and the compiler binary mtime. Included headers are
+        checked by the cache against the dependency list of the stored object.
+        """
+        compiler_path = cmd[0]
+        try:
+            compiler_mtime = os.path.getmtime(compiler_path)
+        except OSError:
+            compiler_mtime = None
+        return self.cache.make_key(
+            source,
+            ' '.join(arg for arg in cmd if arg not in (output, _dep_path(output))),
+            compiler_mtime
+        )
+        
+    def _compile_jobs(self, jobs, optimization):
+        """
+        Run compile jobs [(source, output), ...] in a bounded process pool.
+        Objects found in the cache are copied instead of compiled.
+        Raises RuntimeError for the first failing source once all have finished.
+        """
+        pending = []
+        for source, output in jobs:
+            cmd, compiler_name = self._build_cmd(source, output, optimization)
+            self.dependencies[output] = None
+            
+            cache_key = None
+            if self.cache:
+                cache_key = self._cache_key(source, cmd, output)
+                deps = self.cache.fetch(cache_key, output)
+                if deps is not None:
+                    self.dependencies[output] = deps
+                    continue
+            
+            logger.log(INFO_VERBOSE, f"Compiling {os.path.basename(source)} with {compiler_name}...")
+            logger.debug(f"Command: {' '.join(cmd)}")
+            pending.append((source, output, cmd, cache_key))
+        
+        if pending:
+            self._run_compiles(pending)
+            
+        return [output for _, output in jobs]
+        
+    def _run_compiles(self, pending):
+        """
+        Run [(source, output, cmd, cache_key), ...] concurrently.
+        
+        When there are more sources than parallel jobs, gcc/g++ sources that
+        share a command line are compiled several per compiler invocation
+        (one driver start-up per batch instead of per file).
+        """
+        max_jobs = int(os.environ.get('P4JIT_JOBS', os.cpu_count() or 1))
+        max_jobs = max(1, min(max_jobs, len(pending)))
+        
+        units = self._batch_units(pending, max_jobs)
+        
+        if max_jobs == 1 or len(units) == 1:
+            results = [self._run_unit(unit) for unit in units]
+        else:
+            # Threads only wait on the compiler processes
+            with ThreadPoolExecutor(max_workers=max_jobs) as pool:
+                results = list(pool.map(self._run_unit, units))
+        
+        failures = [failure for unit_failures in results for failure in unit_failures]
+        for source, stderr in failures:
+            logger.error(f"Compilation failed:\n{stderr}")
+        if failures:
+            source, stderr = failures[0]
             raise RuntimeError(
-                f"Compilation failed for {os.path.basename(source)}:\n{result.stderr}"
+                f"Compilation failed for {os.path.basename(source)}:\n{stderr}"
             )
-            
-        return output
         
-    def link(self, obj_files, linker_script, output, use_firmware_elf=True):
+    @staticmethod
+    def _batch_units(pending, max_jobs):
+        """
+        Split pending jobs into at most max_jobs-sized work units per batchable
+        group. Jobs are batchable when their commands differ only in source and
+        output, and the object gcc writes (<stem>.o) is unique in the group.
+        """
+        if len(pending) <= max_jobs:
+            return [[job] for job in pending]
+        
+        groups = {}
+        units = []
+        for job in pending:
+            source, output, cmd, _ = job
+            if '-c' not in cmd:
+                # Plain assembler: one file per invocation
+                units.append([job])
+                continue
+            i = cmd.index('-c')
+            key = tuple(cmd[:i + 1] + cmd[i + 4:])
+            groups.setdefault(key, []).append(job)
+        
+        for jobs in groups.values():
+            stems = [os.path.splitext(os.path.basename(source))[0] for source, _, _, _ in jobs]
+            if len(set(stems)) != len(stems):
+                units.extend([job] for job in jobs)
+                continue
+            # Round-robin keeps every worker busy
+            n_units = min(max_jobs, len(jobs))
+            units.extend(jobs[k::n_units] for k in range(n_units))
+        return units
+        
+    def _run_unit(self, unit):
+        """
+        Compile one work unit (a single job or a batch).
+        Failed batches are retried per file so errors name the right source.
+        
+        Returns:
+            list: (source, stderr) for every failed source
+        """
+        if len(unit) == 1:
+            source, output, cmd, cache_key = unit[0]
+            result = _run_tool(cmd)
+            if result.returncode != 0:
+                return [(source, _stderr_text(result))]
+            self._finish_job(output, cache_key, _dep_path(output), os.getcwd())
+            return []
+        
+        # gcc -c a.c b.c writes a.o and b.o into the working directory
+        cmd = unit[0][2]
+        i = cmd.index('-c')
+        batch_cmd = cmd[:i + 1] + [os.path.abspath(source) for source, _, _, _ in unit] + cmd[i + 4:]
+        logger.debug(f"Batch command: {' '.join(batch_cmd)}")
+        
+        work_dir = tempfile.mkdtemp(prefix='batch_', dir=os.path.dirname(os.path.abspath(unit[0][1])))
+        try:
+            result = _run_tool(batch_cmd, cwd=work_dir)
+            if result.returncode != 0:
+                return [failure for job in unit for failure in self._run_unit([job])]
+            for source, output, _, cache_key in unit:
+                stem = os.path.splitext(os.path.basename(source))[0]
+                os.replace(os.path.join(work_dir, f'{stem}.o'), output)
+                self._finish_job(output, cache_key, os.path.join(work_dir, f'{stem}.d'), work_dir)
+            return []
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+    def _finish_job(self, output, cache_key, dep_file, cwd):
+        """Record the dependencies of a compiled object and cache it."""
+        deps = _read_dep_file(dep_file, cwd)
+        self.dependencies[output] = deps
+        if cache_key:
+            self.cache.store(cache_key, output, deps)
+        
+    def link(self, obj_files, linker_script, output, use_firmware_elf=True, optimization=None):
         """
         Link multiple object files with custom linker script.
+        With LTO enabled, code generation happens here, so the optimization
+        level is passed to the link as well.
         """
+        if optimization is None:
+            optimization = self.config['compiler']['optimization']
+        
         arch = self.config['compiler']['arch']
         abi = self.config['compiler']['abi']
         linker_flags = self.config['linker']['flags']
@@ -123,37 +424,70 @@ class Compiler:
             f'-Wa,-march={arch}' # Pass architecture to assembler (critical for LTO+xesppie)
         ] + linker_flags
         
+        if self.lto:
+            cmd += [f'-{optimization}', '-flto=auto', '-fuse-linker-plugin']
+            
         if self.config['linker']['garbage_collection']:
             cmd.append('-Wl,--gc-sections')
             
         logger.log(INFO_VERBOSE, f"Linking {len(obj_files)} object files...")
         logger.debug(f"Command: {' '.join(cmd)}")
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = _run_tool(cmd)
         
         if result.returncode != 0:
-            logger.error(f"Linking failed:\n{result.stderr}")
-            raise RuntimeError(f"Linking failed:\n{result.stderr}")
+            stderr = _stderr_text(result)
+            logger.error(f"Linking failed:\n{stderr}")
+            raise RuntimeError(f"Linking failed:\n{stderr}")
             
         return output
         
-    def extract_binary(self, elf_file, output):
+    def extract_binary(self, elf_file, output=None):
         """
         Extract raw binary from ELF file.
-        """
-        cmd = [
-            self.objcopy,
-            '-O', 'binary',
-            elf_file,
-            output
-        ]
         
-        logger.log(INFO_VERBOSE, f"Extracting binary to {os.path.basename(output)}...")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        Equivalent to 'objcopy -O binary', done in-process: every allocated
+        section with file contents is placed at its offset from the lowest
+        section address, gaps are zero-filled.
         
-        if result.returncode != 0:
-            logger.error(f"Binary extraction failed:\n{result.stderr}")
-            raise RuntimeError(f"Binary extraction failed:\n{result.stderr}")
+        Args:
+            elf_file (str): Path to ELF file
+            output (str): Optional path to also write the binary to
             
-        with open(output, 'rb') as f:
-            return f.read()
+        Returns:
+            bytearray: Raw binary image
+        """
+        try:
+            with open(elf_file, 'rb') as f:
+                elf = ELFFile(f)
+                loaded = [
+                    sec for sec in elf.iter_sections()
+                    if sec['sh_flags'] & SH_FLAGS.SHF_ALLOC
+                    and sec['sh_type'] != 'SHT_NOBITS'
+                    and sec['sh_size'] > 0
+                ]
+                
+                if not loaded:
+                    binary = bytearray()
+                else:
+                    start = min(sec['sh_addr'] for sec in loaded)
+                    end = max(sec['sh_addr'] + sec['sh_size'] for sec in loaded)
+                    binary = bytearray(end - start)
+                    view = memoryview(binary)
+                    for sec in loaded:
+                        # Read section contents straight into the image
+                        offset = sec['sh_addr'] - start
+                        f.seek(sec['sh_offset'])
+                        if f.readinto(view[offset:offset + sec['sh_size']]) != sec['sh_size']:
+                            raise ELFError(f"Section {sec.name} truncated")
+        except (OSError, ELFError) as e:
+            logger.error(f"Binary extraction failed: {e}")
+            raise RuntimeError(f"Binary extraction failed: {e}")
+        
+        logger.log(INFO_VERBOSE, f"Extracted {len(binary)} bytes from {os.path.basename(elf_file)}")
+        
+        if output:
+            with open(output, 'wb') as f:
+                f.write(binary)
+                
+        return binary
@@ -1,6 +1,7 @@
 import os
 from .signature_parser import SignatureParser
 from ..utils.logger import setup_logger, INFO_VERBOSE
+from ..utils.file_io import write_text
 
 logger = setup_logger(__name__)
 
@@ -23,62 +24,31 @@ class HeaderGenerator:
     
     def generate_header(self):
         """Generate complete header file content."""
-        parts = []
-        
-        parts.append(self._generate_header_guard_start())
-        parts.append(self._generate_header_comment())
-        parts.append(self._generate_typedefs())
-        parts.append(self._generate_function_declaration())
-        parts.append(self._generate_header_guard_end())
-        
-        return '\n'.join(parts)
-    
-    def _generate_header_guard_start(self):
-        """Generate header guard start."""
         guard_name = self.header_name.upper().replace('.', '_')
-        return f"""#ifndef {guard_name}
-#define {guard_name}
-"""
-    
-    def _generate_header_comment(self):
-        """Generate header comment."""
         func_name = self.signature['name']
-        return f"""// Auto-generated header for {func_name}
-// Source: {self.source_basename}
-"""
-    
-    def _generate_typedefs(self):
-        """Generate typedef section."""
-        # Include std_types.h which contains standard types and custom structs (like Point)
-        return '#include "std_types.h"\n'
-    
-    def _generate_function_declaration(self):
-        """Generate function declaration (prototype)."""
-        func_name = self.signature['name']
-        return_type = self.signature['return_type']
-        
-        params = []
-        for param in self.signature['parameters']:
-            param_type = param['type']
-            param_name = param['name']
-            params.append(f"{param_type} {param_name}")
-        
-        params_str = ', '.join(params) if params else 'void'
+        params_str = ', '.join(
+            f"{param['type']} {param['name']}" for param in self.signature['parameters']
+        ) or 'void'
         
         lines = [
+            f"#ifndef {guard_name}",
+            f"#define {guard_name}",
+            "",
+            f"// Auto-generated header for {func_name}",
+            f"// Source: {self.source_basename}",
+            "",
+            # std_types.h contains standard types and custom structs (like Point)
+            '#include "std_types.h"',
+            "",
             "// Function declaration",
-            f"{return_type} {func_name}({params_str});",
+            f"{self.signature['return_type']} {func_name}({params_str});",
+            "",
+            f"#endif // {guard_name}",
             ""
         ]
         
         return '\n'.join(lines)
     
-    def _generate_header_guard_end(self):
-        """Generate header guard end."""
-        guard_name = self.header_name.upper().replace('.', '_')
-        return f"""#endif // {guard_name}
-"""
-    
     def save_header(self, output_dir):
         """
         Save generated header to directory.
@@ -94,7 +64,6 @@ class HeaderGenerator:
         output_path = os.path.join(output_dir, self.header_name)
         
         logger.log(INFO_VERBOSE, f"Saving header file to {output_path}")
-        with open(output_path, 'w') as f:
-            f.write(header_content)
+        write_text(output_path, header_content)
         
         return output_path
@@ -1,9 +1,21 @@
 import os
+import re
 import tempfile
+import functools
 from ..utils.logger import setup_logger, INFO_VERBOSE
+from ..utils.file_io import write_text
 
 logger = setup_logger(__name__)
 
+# Template syntax is str.format compatible: {NAME} placeholders, {{ }} escapes
+_PLACEHOLDER_RE = re.compile(r'\{\{|\}\}|\{(\w+)\}')
+
+@functools.lru_cache(maxsize=8)
+def _load_template(template_path, mtime_ns):
+    """Read a linker script template (once per path/modification)."""
+    with open(template_path, 'r') as f:
+        return f.read()
+
 class LinkerGenerator:
     """Generates linker scripts from templates."""
     
@@ -14,10 +26,9 @@ class LinkerGenerator:
         Args:
             template_path (str): Path to linker script template
         """
-        with open(template_path, 'r') as f:
-            self.template = f.read()
-            
-    def generate(self, entry_point, base_address, memory_size, output_path=None):
+        self.template = _load_template(template_path, os.stat(template_path).st_mtime_ns)
+        
+    def generate(self, entry_point, base_address, memory_size, output_path=None, symbols=None):
         """
         Generate linker script from template.
         
@@ -26,23 +37,40 @@ class LinkerGenerator:
             base_address (int): Base memory address
             memory_size (str): Memory size (e.g., '128K')
             output_path (str): Optional path to save generated script
+            symbols (dict): Optional absolute symbols to define (name -> address)
             
         Returns:
             str: Path to generated linker script
         """
-        script_content = self.template.format(
-            ENTRY_POINT=entry_point,
-            BASE_ADDRESS=f'0x{base_address:08x}',
-            MEMORY_SIZE=memory_size
+        subs = {
+            'ENTRY_POINT': entry_point,
+            'BASE_ADDRESS': f'0x{base_address:08x}',
+            'MEMORY_SIZE': memory_size
+        }
+        script_content = _PLACEHOLDER_RE.sub(
+            lambda m: subs[m.group(1)] if m.group(1) else m.group()[0],
+            self.template
         )
+        if symbols:
+            script_content += ''.join(
+                f'\n{name} = 0x{address:08x};' for name, address in sorted(symbols.items())
+            ) + '\n'
         
         if output_path is None:
             fd, output_path = tempfile.mkstemp(suffix='.ld', prefix='linker_')
             os.close(fd)
+        else:
+            # Leave an identical existing script untouched (keeps its mtime)
+            try:
+                with open(output_path, 'r') as f:
+                    if f.read() == script_content:
+                        logger.debug(f"Linker script unchanged: {output_path}")
+                        return output_path
+            except OSError:
+                pass
             
         logger.log(INFO_VERBOSE, f"Generating linker script at {output_path}")
             
-        with open(output_path, 'w') as f:
-            f.write(script_content)
+        write_text(output_path, script_content)
             
         return output_path
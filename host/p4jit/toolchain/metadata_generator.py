@@ -1,19 +1,11 @@
-import json
 import os
+import itertools
 from ..utils.logger import setup_logger, INFO_VERBOSE
+from ..utils.json_writer import write_json
+from ..utils.c_types import is_64bit_type, param_slot_count
 
 logger = setup_logger(__name__)
 
-# Types that require 64-bit (2 slots)
-_64BIT_TYPES = {'int64_t', 'uint64_t', 'int64', 'uint64', 'double',
-               'long long', 'unsigned long long', 'long long int',
-               'unsigned long long int'}
-
-def _is_64bit_type(type_str: str) -> bool:
-    """Check if a type requires 64-bit (2 slots)."""
-    clean_type = type_str.replace('const', '').replace('volatile', '').strip()
-    return clean_type in _64BIT_TYPES
-
 class MetadataGenerator:
     """
     Generate signature.json metadata file with function signature and memory addresses.
@@ -27,46 +19,40 @@ class MetadataGenerator:
 
     def calculate_addresses(self):
         """Calculate memory addresses for arguments and return value, respecting 64-bit slot layout."""
-        addresses = {
-            'arguments': [],
-            'return': {}
-        }
-
-        current_slot = 0
-        for idx, param in enumerate(self.signature['parameters']):
-            # Calculate slot count based on type
-            if param['category'] == 'pointer':
-                slot_count = 1  # Pointers are 32-bit on this platform
-            elif _is_64bit_type(param['type']):
-                slot_count = 2
-            else:
-                slot_count = 1
-
-            addr = self.arg_address + (current_slot * 4)
-            addresses['arguments'].append({
-                'index': idx,
-                'slot': current_slot,
-                'slot_count': slot_count,
-                'name': param['name'],
-                'type': param['type'],
-                'category': param['category'],
-                'address': f"0x{addr:08x}"
-            })
-            current_slot += slot_count
+        params = self.signature['parameters']
+        
+        arguments = []
+        if params:
+            slot_counts = [param_slot_count(param) for param in params]
+            slot_offsets = list(itertools.accumulate(slot_counts, initial=0))
+            arg_base = self.arg_address
+            arguments = [
+                {
+                    'index': idx,
+                    'slot': slot,
+                    'slot_count': slot_count,
+                    'name': param['name'],
+                    'type': param['type'],
+                    'category': param['category'],
+                    'address': f"0x{arg_base + slot * 4:08x}"
+                }
+                for idx, (param, slot, slot_count) in enumerate(zip(params, slot_offsets, slot_counts))
+            ]
 
         # Return value: check if 64-bit
         return_type = self.signature['return_type']
-        return_slot_count = 2 if _is_64bit_type(return_type) else 1
+        return_slot_count = 2 if is_64bit_type(return_type) else 1
         return_slot = self.args_array_size - return_slot_count
-        return_addr = self.arg_address + (return_slot * 4)
-        addresses['return'] = {
-            'type': return_type,
-            'slot': return_slot,
-            'slot_count': return_slot_count,
-            'address': f"0x{return_addr:08x}"
+        
+        return {
+            'arguments': arguments,
+            'return': {
+                'type': return_type,
+                'slot': return_slot,
+                'slot_count': return_slot_count,
+                'address': f"0x{self.arg_address + return_slot * 4:08x}"
+            }
         }
-
-        return addresses
     
     def generate_metadata(self):
         """Generate complete metadata dictionary."""
@@ -95,24 +81,25 @@ class MetadataGenerator:
         
         return metadata
     
-    def save_json(self, output_dir):
+    def save_json(self, output_dir, metadata=None):
         """
         Save metadata as JSON file in output directory.
         
         Args:
             output_dir: Directory to save signature.json
+            metadata: Already generated metadata (generated if omitted)
             
         Returns:
             str: Path to generated signature.json file
         """
         os.makedirs(output_dir, exist_ok=True)
         
-        metadata = self.generate_metadata()
+        if metadata is None:
+            metadata = self.generate_metadata()
         
         output_path = os.path.join(output_dir, 'signature.json')
         
         logger.log(INFO_VERBOSE, f"Saving metadata to {output_path}")
-        with open(output_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        write_json(output_path, metadata)
         
         return output_path
@@ -1,12 +1,84 @@
 import re
 import os
 import sys
+import copy
+import logging
+import functools
+import hashlib
+import mmap
 from pycparser import c_parser, c_ast
-from pycparser.plyparser import ParseError
+from pycparser.c_parser import ParseError
 from ..utils.logger import setup_logger, INFO_VERBOSE
 
 logger = setup_logger(__name__)
 
+# CParser construction is expensive; one instance is reused. pycparser 2.x
+# ships prebuilt PLY tables (pycparser.lextab / pycparser.yacctab); they are
+# requested explicitly so the grammar is loaded, never regenerated or written
+# out. pycparser 3.x has a hand-written parser and ignores these arguments.
+_parser = None
+_PARSER_KWARGS = {
+    'lex_optimize': True,
+    'lextab': 'pycparser.lextab',
+    'yacc_optimize': True,
+    'yacctab': 'pycparser.yacctab',
+    'yacc_debug': False,
+}
+
+# Signatures keyed by (blake2b of the parsed prototype code, function name)
+_parsed_signatures = {}
+
+# Parsed signatures keyed by (source path, mtime_ns, std_types mtime_ns, function name)
+_signature_cache = {}
+
+# Common ESP-IDF/GCC attributes to strip from return type
+STRIP_ATTRIBUTES = [
+    'IRAM_ATTR', 'DRAM_ATTR', 'RTC_IRAM_ATTR', 'RTC_DATA_ATTR',
+    'EXT_RAM_ATTR', 'static', 'inline', 'extern',
+    'FORCE_INLINE_ATTR', 'NOINLINE_ATTR'
+]
+# One pass strips __attribute__((...)) and the whole-word attributes above
+_ATTRIBUTE_RE = re.compile(
+    r'__attribute__\s*\(\((?:[^()]|\([^()]*\))*\)\)|\b(?:' + '|'.join(map(re.escape, STRIP_ATTRIBUTES)) + r')\b'
+)
+
+_IDENT_BYTES = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_')
+
+@functools.lru_cache(maxsize=64)
+def _name_pattern(func_name):
+    """
+    Compiled bytes pattern matching "func_name(".
+    The pattern starts with the literal name so the regex engine can use its
+    fast literal search; the leading word boundary is checked by the caller.
+    """
+    return re.compile(re.escape(func_name.encode()) + rb'\s*\(')
+
+@functools.lru_cache(maxsize=128)
+def _classify(type_str):
+    """Parameter category for a type string (few distinct types recur)."""
+    if '*' in type_str or '[]' in type_str:
+        return 'pointer'
+    return 'value'
+
+def _decode(data):
+    return bytes(data).decode('utf-8', errors='replace')
+
+def _get_parser():
+    """Get the shared CParser instance."""
+    global _parser
+    if _parser is None:
+        _parser = c_parser.CParser(**_PARSER_KWARGS)
+    return _parser
+
+@functools.lru_cache(maxsize=4)
+def _read_std_types(config_path, mtime_ns):
+    """Read standard typedefs file (once per path and modification time)."""
+    if mtime_ns is None:
+        logger.warning(f"Standard types config not found at {config_path}")
+        return ""
+    with open(config_path, 'r') as f:
+        return f.read()
+
 class SignatureParser:
     """
     Parses C source files to extract function signatures using pycparser.
@@ -25,13 +97,11 @@ class SignatureParser:
         # host/p4jit/toolchain/signature_parser.py -> ../../../
         base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
         config_path = os.path.join(base_dir, 'config', 'std_types.h')
-        
         try:
-            with open(config_path, 'r') as f:
-                return f.read()
+            self._std_types_mtime = os.stat(config_path).st_mtime_ns
         except FileNotFoundError:
-            logger.warning(f"Standard types config not found at {config_path}")
-            return ""
+            self._std_types_mtime = None
+        return _read_std_types(config_path, self._std_types_mtime)
 
     def parse_function(self, function_name):
         """
@@ -45,13 +115,32 @@ class SignatureParser:
         """
         self.current_function = function_name
         
+        # Reuse previous result while the source file and typedefs are unchanged
+        source_path = os.path.abspath(self.source_file)
+        cache_key = (
+            source_path, os.stat(source_path).st_mtime_ns,
+            self._std_types_mtime, function_name
+        )
+        if cache_key in _signature_cache:
+            logger.debug(f"Using cached signature for '{function_name}'")
+            return copy.deepcopy(_signature_cache[cache_key])
+        
+        signature = self._parse_function(function_name)
+        _signature_cache[cache_key] = copy.deepcopy(signature)
+        return signature
+        
+    def _parse_function(self, function_name):
+        """Parse function signature (uncached)."""
         logger.log(INFO_VERBOSE, f"Parsing signature for '{function_name}' in {os.path.basename(self.source_file)}")
         
-        with open(self.source_file, 'r') as f:
-            source_code = f.read()
-            
-        # Extract the signature string using regex heuristic
-        signature_str = self._extract_signature_string(source_code, function_name)
+        # Extract the signature string using regex heuristic. The source is
+        # memory-mapped and searched as bytes; only the matched slices are decoded.
+        with open(self.source_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                signature_str = None
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source_code:
+                    signature_str = self._extract_signature_string(source_code, function_name)
         
         if not signature_str:
              logger.error(f"Function '{function_name}' not found in {self.source_file}")
@@ -60,11 +149,19 @@ class SignatureParser:
         # Combine standard types and the extracted signature
         full_code = self.std_types + "\n" + signature_str
         
-        # Save for debugging
-        self._save_debug_output(full_code)
+        # Save for debugging (opt-in; skipped on the normal path)
+        if logger.isEnabledFor(logging.DEBUG) or os.environ.get('P4JIT_DEBUG_SIG'):
+            self._save_debug_output(full_code)
+        
+        # Same prototype text (e.g. source touched but signature unchanged)
+        # gives the same signature; skip pycparser entirely
+        code_key = (hashlib.blake2b(full_code.encode(), digest_size=16).digest(), function_name)
+        if code_key in _parsed_signatures:
+            logger.debug(f"Using parsed signature for '{function_name}' (prototype unchanged)")
+            return copy.deepcopy(_parsed_signatures[code_key])
         
         # Parse with pycparser
-        parser = c_parser.CParser()
+        parser = _get_parser()
         try:
             ast = parser.parse(full_code, filename='<extracted_signature>')
         except Exception as e:
@@ -72,134 +169,104 @@ class SignatureParser:
             logger.debug(f"Code being parsed:\n{full_code}")
             raise
         
-        # Find the function declaration in the AST
-        # It will be the last node usually, or we search for it
-        for node in ast.ext:
+        # Find the function declaration in the AST. The prototype is appended
+        # after the typedefs, so it is the last node: search backwards
+        func_node = None
+        for node in reversed(ast.ext):
             if isinstance(node, c_ast.Decl) and node.name == function_name:
                  # Wrap in fake FuncDef for extraction logic compatibility
-                 fake_def = c_ast.FuncDef(decl=node, param_decls=None, body=None)
-                 return self._extract_signature_from_ast(fake_def)
+                 func_node = c_ast.FuncDef(decl=node, param_decls=None, body=None)
+                 break
             elif isinstance(node, c_ast.FuncDef) and node.decl.name == function_name:
-                 return self._extract_signature_from_ast(node)
+                 func_node = node
+                 break
+        
+        if func_node is not None:
+            # Only the extracted dict is kept, never the AST
+            signature = self._extract_signature_from_ast(func_node)
+            _parsed_signatures[code_key] = copy.deepcopy(signature)
+            return signature
                  
         logger.error(f"Parsed successfully but function '{function_name}' node not found in AST")
         raise ValueError(f"Parsed successfully but function '{function_name}' node not found in AST")
 
     def _extract_signature_string(self, source_code, func_name):
         """
-        Extract the function signature string (prototype) from source code.
+        Extract the function signature string (prototype) from source code
+        (bytes-like, e.g. an mmap of the file).
         Strategy:
-        1. Find the line containing the function name that looks like a definition.
-        2. Extract text before the name (return type), filtering out common attributes.
-        3. Extract text after the name (argument list) up to the closing parenthesis.
+        1. Find each occurrence of "func_name(" (one regex sweep over the source).
+        2. Skip comments and call sites; take the text before the name on that
+           line as return type, filtering out common attributes.
+        3. Extract the argument list up to the matching closing parenthesis.
         4. Construct a clean prototype: "ReturnType FunctionName(Args);"
         """
-        lines = source_code.splitlines()
-
-        # Build line offset table for precise positioning
-        line_offsets = [0]
-        for line in lines:
-            line_offsets.append(line_offsets[-1] + len(line) + 1)  # +1 for newline
-
-        # Common ESP-IDF/GCC attributes to strip from return type
-        STRIP_ATTRIBUTES = [
-            'IRAM_ATTR', 'DRAM_ATTR', 'RTC_IRAM_ATTR', 'RTC_DATA_ATTR',
-            'EXT_RAM_ATTR', '__attribute__', 'static', 'inline', 'extern',
-            'FORCE_INLINE_ATTR', 'NOINLINE_ATTR'
-        ]
-
-        for i, line in enumerate(lines):
-            # Skip comments
-            stripped = line.strip()
-            if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*'):
-                continue
-
-            if func_name not in line:
-                continue
-
-            # Find start of name - ensure it's a word boundary (not part of another identifier)
-            idx = line.find(func_name)
-            if idx == -1:
-                continue
-
-            # Check word boundary before (must be whitespace or start of line or non-alnum)
-            if idx > 0 and (line[idx-1].isalnum() or line[idx-1] == '_'):
-                continue
-
-            # Check word boundary after (must be '(' or whitespace)
-            after_idx = idx + len(func_name)
-            if after_idx < len(line) and line[after_idx].isalnum():
+        pattern = _name_pattern(func_name)
+        
+        for match in pattern.finditer(source_code):
+            name_start = match.start()
+            # Whole identifier only (not e.g. "my_add(" when looking for "add")
+            if name_start and source_code[name_start - 1] in _IDENT_BYTES:
                 continue
-
-            # Check if it's a call or definition - look for (
-            rest = line[after_idx:].strip()
-            if not rest.startswith('('):
+            line_start = source_code.rfind(b'\n', 0, name_start) + 1
+            
+            # Checked on the raw bytes; only a candidate prefix gets decoded
+            stripped = source_code[line_start:name_start].strip()
+            
+            # Skip comments
+            if stripped.startswith((b'//', b'/*', b'*')):
                 continue
-
-            # Check this isn't a call site (preceding text should look like return type)
-            return_type_part = line[:idx].strip()
-
+            
             # Skip if it looks like a call site (e.g., "if (", "return ", "= ")
-            if return_type_part.endswith(('if', 'while', 'for', 'switch', 'return', '=', '(', ',')):
+            if stripped.endswith((b'if', b'while', b'for', b'switch', b'return', b'=', b'(', b',')):
                 continue
-
+            
             # Strip common attributes from return type
-            clean_return_type = return_type_part
-            for attr in STRIP_ATTRIBUTES:
-                # Handle __attribute__((...)) specially
-                if attr == '__attribute__':
-                    import re
-                    clean_return_type = re.sub(r'__attribute__\s*\(\([^)]*\)\)', '', clean_return_type)
-                else:
-                    clean_return_type = clean_return_type.replace(attr, '')
+            clean_return_type = _ATTRIBUTE_RE.sub('', _decode(stripped))
             clean_return_type = ' '.join(clean_return_type.split())  # Normalize whitespace
-
+            
             if not clean_return_type:
                 continue
-
-            # Use line offset instead of find() to get correct position
-            line_start_offset = line_offsets[i]
-            combined_text = source_code[line_start_offset:]
-
-            # Simple parenthesis counter
-            balance = 0
-            args_end_idx = -1
-
-            # Find the first ( relative to combined_text
-            start_paren = combined_text.find('(')
-
-            if start_paren == -1:
-                continue
-
-            for j, char in enumerate(combined_text[start_paren:]):
-                if char == '(':
-                    balance += 1
-                elif char == ')':
-                    balance -= 1
-                    if balance == 0:
-                        args_end_idx = start_paren + j
-                        break
-
+            
+            # Balance parentheses from the opening one, hopping between
+            # ( and ) with find (memchr) instead of visiting every byte
+            start_paren = match.end() - 1
+            depth = 1
+            pos = start_paren + 1
+            while depth:
+                close = source_code.find(b')', pos)
+                if close == -1:
+                    break
+                nested = source_code.find(b'(', pos, close)
+                if nested != -1:
+                    depth += 1
+                    pos = nested + 1
+                else:
+                    depth -= 1
+                    pos = close + 1
+            args_end_idx = pos - 1 if depth == 0 else -1
+            
             if args_end_idx != -1:
-                args_part = combined_text[start_paren:args_end_idx+1]
-
+                args_part = _decode(source_code[start_paren:args_end_idx+1])
+                
                 # Construct prototype
                 prototype_str = f"{clean_return_type} {func_name}{args_part};"
                 logger.debug(f"Extracted Signature: {prototype_str}")
                 return prototype_str
-
+        
         return None
-
+        
     def _save_debug_output(self, content):
-        """Save the parsed content to a file for debugging."""
+        """
+        Save the parsed content to a file for debugging.
+        Called only at DEBUG log level or with P4JIT_DEBUG_SIG set.
+        """
         try:
             source_dir = os.path.dirname(os.path.abspath(self.source_file))
             test_root = os.path.dirname(source_dir) # Go up one level from 'source'
             build_dir = os.path.join(test_root, 'build')
+            os.makedirs(build_dir, exist_ok=True)
             
-            if not os.path.exists(build_dir):
-                os.makedirs(build_dir)
-                
             debug_path = os.path.join(build_dir, 'extracted_signature.c')
             with open(debug_path, 'w') as f:
                 f.write(content)
@@ -211,7 +278,9 @@ class SignatureParser:
         """Extract signature information from function AST node."""
         func_decl = func_node.decl
         
-        return_type = self._get_type_string(func_decl.type.type)
+        # Type and parameter names are interned: the same few strings recur
+        # across every signature and are used as dict keys downstream
+        return_type = sys.intern(self._get_type_string(func_decl.type.type))
         
         parameters = []
         if func_decl.type.args:
@@ -222,7 +291,7 @@ class SignatureParser:
                 if param_type == 'void':
                     continue
                     
-                param_info = self._extract_parameter(param)
+                param_info = self._extract_parameter(param, param_type)
                 parameters.append(param_info)
         
         return {
@@ -231,10 +300,12 @@ class SignatureParser:
             'parameters': parameters
         }
     
-    def _extract_parameter(self, param_node):
+    def _extract_parameter(self, param_node, param_type=None):
         """Extract parameter information from AST node."""
-        param_type = self._get_type_string(param_node.type)
-        param_name = param_node.name if param_node.name else 'unnamed'
+        if param_type is None:
+            param_type = self._get_type_string(param_node.type)
+        param_type = sys.intern(param_type)
+        param_name = sys.intern(param_node.name) if param_node.name else 'unnamed'
         category = self.classify_parameter(param_type)
         
         return {
@@ -245,17 +316,18 @@ class SignatureParser:
     
     def _get_type_string(self, type_node):
         """Convert type AST node to string representation."""
-        if isinstance(type_node, c_ast.TypeDecl):
-            type_name = self._get_base_type_name(type_node.type)
-            return type_name
-        elif isinstance(type_node, c_ast.PtrDecl):
-            inner_type = self._get_type_string(type_node.type)
-            return inner_type + '*'
-        elif isinstance(type_node, c_ast.ArrayDecl):
-            inner_type = self._get_type_string(type_node.type)
-            return inner_type + '[]'
-        else:
-            return 'unknown'
+        # Walk pointer/array declarators iteratively, outermost suffix last
+        suffix = ''
+        while True:
+            if isinstance(type_node, c_ast.PtrDecl):
+                suffix = '*' + suffix
+            elif isinstance(type_node, c_ast.ArrayDecl):
+                suffix = '[]' + suffix
+            elif isinstance(type_node, c_ast.TypeDecl):
+                return self._get_base_type_name(type_node.type) + suffix
+            else:
+                return 'unknown'
+            type_node = type_node.type
     
     def _get_base_type_name(self, type_node):
         """Get base type name from type node."""
@@ -270,10 +342,7 @@ class SignatureParser:
         """
         Classify parameter as 'value' or 'pointer'.
         """
-        if '*' in type_str or '[]' in type_str:
-            return 'pointer'
-        else:
-            return 'value'
+        return _classify(type_str)
     
     def validate_parameter_count(self, param_count, max_params):
         """
@@ -1,6 +1,7 @@
-import subprocess
-import re
 import os
+from elftools.common.exceptions import ELFError
+from elftools.elf.constants import SH_FLAGS
+from elftools.elf.elffile import ELFFile
 from ..utils.logger import setup_logger, INFO_VERBOSE
 
 logger = setup_logger(__name__)
@@ -10,14 +11,15 @@ class SymbolExtractor:
     
     def __init__(self, config):
         self.config = config
-        toolchain_path = config['toolchain']['path']
-        prefix = config['toolchain']['prefix']
-        self.readelf = os.path.join(toolchain_path, f"{prefix}-readelf")
-        self.nm = os.path.join(toolchain_path, f"{prefix}-nm")
         
     def extract_all_symbols(self, elf_file):
         """
-        Extract all symbols from ELF file using nm (most reliable).
+        Extract all symbols from ELF file.
+        
+        Reads .symtab in-process and classifies symbols the same way nm does:
+        symbols in executable sections are functions, symbols in other
+        allocated sections are data. Undefined and absolute symbols (e.g.
+        firmware symbols pulled in with -R) are skipped.
         
         Args:
             elf_file (str): Path to ELF file
@@ -25,83 +27,65 @@ class SymbolExtractor:
         Returns:
             list: List of symbol dictionaries
         """
-        # Use nm with size information
-        cmd = [self.nm, '--print-size', '--size-sort', elf_file]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            # Fallback to basic nm
-            logger.debug("nm --size-sort failed, falling back to basic nm")
-            cmd = [self.nm, elf_file]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                logger.error(f"Symbol extraction failed:\n{result.stderr}")
-                raise RuntimeError(f"Symbol extraction failed:\n{result.stderr}")
-            
         symbols = []
         
-        for line in result.stdout.split('\n'):
-            line = line.strip()
-            if not line:
-                continue
-            
-            parts = line.split()
-            
-            # Format can be:
-            # address size type name
-            # or
-            # address type name
-            
-            if len(parts) >= 3:
-                try:
-                    address = int(parts[0], 16)
+        try:
+            with open(elf_file, 'rb') as f:
+                elf = ELFFile(f)
+                symtab = elf.get_section_by_name('.symtab')
+                if symtab is None:
+                    logger.debug(f"No symbol table in {os.path.basename(elf_file)}")
+                    return symbols
+                
+                section_flags = [sec['sh_flags'] for sec in elf.iter_sections()]
+                
+                for sym in symtab.iter_symbols():
+                    name = sym.name
+                    shndx = sym['st_shndx']
+                    size = sym['st_size']
                     
-                    # Check if second field is size or type
-                    if len(parts) >= 4:
-                        # Has size: addr size type name
-                        size = int(parts[1], 16)
-                        type_char = parts[2]
-                        name = ' '.join(parts[3:])
-                    else:
-                        # No size: addr type name
-                        size = 0
-                        type_char = parts[1]
-                        name = ' '.join(parts[2:])
+                    # Zero-sized symbols are labels, not functions/objects
+                    if not name or not size or not isinstance(shndx, int):
+                        continue
+                    if sym['st_info']['type'] in ('STT_SECTION', 'STT_FILE'):
+                        continue
                     
-                    # Convert nm type to symbol type
-                    if type_char in ['T', 't']:
+                    flags = section_flags[shndx]
+                    if flags & SH_FLAGS.SHF_EXECINSTR:
                         sym_type = 'FUNC'
-                    elif type_char in ['D', 'd', 'B', 'b', 'R', 'r', 'C', 'c']:
+                    elif flags & SH_FLAGS.SHF_ALLOC:
                         sym_type = 'OBJECT'
                     else:
                         continue
                     
                     # Allow address 0 (needed for relative builds/first pass)
-                    if name:
-                        symbols.append({
-                            'name': name,
-                            'address': address,
-                            'size': size,
-                            'type': sym_type
-                        })
-                        
-                except (ValueError, IndexError):
-                    continue
-                    
+                    symbols.append({
+                        'name': name,
+                        'address': sym['st_value'],
+                        'size': size,
+                        'type': sym_type
+                    })
+        except (OSError, ELFError) as e:
+            logger.error(f"Symbol extraction failed: {e}")
+            raise RuntimeError(f"Symbol extraction failed: {e}")
+        
+        symbols.sort(key=lambda s: s['size'])
         return symbols
         
-    def get_function_address(self, elf_file, function_name):
+    def get_function_address(self, elf_file, function_name, symbols=None):
         """
         Get address of a specific function.
         
         Args:
             elf_file (str): Path to ELF file
             function_name (str): Name of function to find
+            symbols (list): Symbols already extracted from elf_file (optional)
             
         Returns:
             int: Address of function, or None if not found
         """
-        symbols = self.extract_all_symbols(elf_file)
+        if symbols is None:
+            symbols = self.extract_all_symbols(elf_file)
         
         # Look for exact match
         for symbol in symbols:
@@ -1,25 +1,33 @@
+import re
 from ..utils.logger import setup_logger, INFO_VERBOSE
 
 logger = setup_logger(__name__)
 
+_SIZE_RE = re.compile(r'^\s*(\d+)\s*([KMG]?)\s*$', re.IGNORECASE)
+_SIZE_MULTIPLIERS = {'': 1, 'K': 1024, 'M': 1024 * 1024, 'G': 1024 * 1024 * 1024}
+
 class Validator:
     """Validates binary and memory configurations."""
     
+    # Loadable address ranges [start, end): TCM, L2MEM and PSRAM
+    _VALID_RANGES = ((0x30100000, 0x50000000),)
+    
     def __init__(self, config):
         self.config = config
         self.max_size = self._parse_size(config['memory']['max_size'])
         self.alignment = config['memory']['alignment']
+        if self.alignment <= 0 or self.alignment & (self.alignment - 1):
+            raise ValueError(f"memory.alignment must be a power of two, got {self.alignment}")
+        self._alignment_mask = self.alignment - 1
         
     def _parse_size(self, size_str):
         """Parse size string like '128K' to bytes."""
-        size_str = size_str.strip().upper()
-        
-        if size_str.endswith('K'):
-            return int(size_str[:-1]) * 1024
-        elif size_str.endswith('M'):
-            return int(size_str[:-1]) * 1024 * 1024
-        else:
-            return int(size_str)
+        if isinstance(size_str, int):
+            return size_str
+        match = _SIZE_RE.match(size_str)
+        if not match:
+            raise ValueError(f"Invalid size: {size_str!r}")
+        return int(match.group(1)) * _SIZE_MULTIPLIERS[match.group(2).upper()]
             
     def validate_address(self, address):
         """
@@ -31,11 +39,11 @@ class Validator:
         Raises:
             ValueError: If address is invalid
         """
-        if address % self.alignment != 0:
+        if address & self._alignment_mask:
             logger.error(f"Address 0x{address:08x} not {self.alignment}-byte aligned")
             raise ValueError(f"Address 0x{address:08x} not {self.alignment}-byte aligned")
             
-        if address < 0x30100000 or address >= 0x50000000:
+        if not any(start <= address < end for start, end in self._VALID_RANGES):
             logger.error(f"Address 0x{address:08x} outside valid memory range")
             raise ValueError(f"Address 0x{address:08x} outside valid memory range")
             
@@ -83,14 +91,13 @@ class Validator:
         Raises:
             ValueError: If output is invalid
         """
-        total_size = 0
-        
-        for name, info in sections.items():
-            if info['address'] < base_address:
+        if sections:
+            name = min(sections, key=lambda n: sections[n]['address'])
+            if sections[name]['address'] < base_address:
                 logger.error(f"Section {name} below base address")
                 raise ValueError(f"Section {name} below base address")
                 
-            total_size += info['size']
+        total_size = sum(info['size'] for info in sections.values())
             
         if total_size > self.max_size:
             logger.error(f"Total size {total_size} exceeds max {self.max_size}")
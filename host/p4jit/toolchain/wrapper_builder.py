@@ -1,6 +1,9 @@
+import hashlib
+import json
 import os
+import shutil
 from .signature_parser import SignatureParser
-from .wrapper_generator import WrapperGenerator
+from .wrapper_generator import WrapperGenerator, ARGS_SYMBOL
 from .header_generator import HeaderGenerator
 from .metadata_generator import MetadataGenerator
 from ..utils.logger import setup_logger, INFO_VERBOSE
@@ -16,6 +19,128 @@ class WrapperBuilder:
     def __init__(self, builder, config):
         self.builder = builder
         self.config = config
+        
+        # Pass 1 results: (source, function, use_firmware_elf, inputs digest) ->
+        # (sizes, dependency digests); also kept in the compile cache directory
+        # across processes
+        self._probe_cache = {}
+        self._config_digest = None
+    
+    def _probe_key(self, source, function_name, use_firmware_elf):
+        """
+        Cache key covering the known inputs of a probe build: the files in
+        the source directory (all of them are compiled) and the firmware ELF
+        when it is linked against. Headers included from elsewhere are
+        checked against the build's dependency list (see _probe_dependencies).
+        The generated wrapper and header are left out; they follow from the
+        source, the function name and the addresses.
+        """
+        from .compile_cache import CompileCache
+        
+        source = os.path.abspath(source)
+        source_dir = os.path.dirname(source)
+        generated = {
+            self.config['wrapper']['template_file'],
+            os.path.splitext(os.path.basename(source))[0] + '.h',
+        }
+        inputs = sorted(
+            entry.path for entry in os.scandir(source_dir)
+            if entry.is_file() and not entry.name.startswith('.') and entry.name not in generated
+        )
+        
+        fw_stamp = None
+        fw_elf = self.config.get('linker', {}).get('firmware_elf')
+        if use_firmware_elf and fw_elf and os.path.exists(fw_elf):
+            st = os.stat(fw_elf)
+            fw_stamp = (st.st_size, st.st_mtime_ns)
+        
+        return (source, function_name, use_firmware_elf, fw_stamp,
+                CompileCache.digest_files(inputs))
+    
+    def probe_size(self, source, function_name, use_firmware_elf=True,
+                   base_address=0x03000004, arg_address=0x00030004):
+        """
+        Sizes needed to allocate a wrapped function before its final build
+        (Pass 1). The probe build is skipped when its inputs are unchanged
+        since the last probe of the same function, in this process or (with
+        the compile cache enabled) an earlier one. Every file the compiler
+        read for that probe must be unchanged too; probes whose dependency
+        list is unknown are not reused.
+        
+        Returns:
+            tuple: (code_size, args_bytes)
+        """
+        from .compile_cache import CompileCache
+        
+        key = self._probe_key(source, function_name, use_firmware_elf)
+        entry = self._probe_cache.get(key) or self._load_probe(key)
+        if entry is not None and CompileCache.digests_match(entry[1]):
+            sizes = entry[0]
+            logger.log(INFO_VERBOSE, f"Reusing probe sizes for '{function_name}': {sizes}")
+            self._probe_cache[key] = entry
+            return sizes
+        
+        binary = self.build_with_wrapper(
+            source=source,
+            function_name=function_name,
+            base_address=base_address,
+            arg_address=arg_address,
+            use_firmware_elf=use_firmware_elf
+        )
+        sizes = (binary.total_size, binary.metadata['addresses']['args_array_bytes'])
+        digests = self._probe_dependencies(source, binary.dependencies)
+        if digests is None:
+            logger.debug(f"Dependency list of '{function_name}' unknown, probe not recorded")
+            return sizes
+        # Keyed on the inputs as built (the build may have copied std_types.h)
+        key = self._probe_key(source, function_name, use_firmware_elf)
+        self._probe_cache[key] = (sizes, digests)
+        self._store_probe(key, sizes, digests)
+        return sizes
+    
+    def _probe_dependencies(self, source, dependencies):
+        """
+        Digests of the files a probe build read, minus the generated wrapper
+        and header (rewritten with other addresses by the final build).
+        
+        Returns:
+            dict: Path -> digest, or None if the list is unknown
+        """
+        from .compile_cache import CompileCache
+        
+        if dependencies is None:
+            return None
+        source_dir = os.path.dirname(os.path.abspath(source))
+        generated = {
+            os.path.join(source_dir, self.config['wrapper']['template_file']),
+            os.path.join(source_dir, os.path.splitext(os.path.basename(source))[0] + '.h'),
+        }
+        return CompileCache.file_digests(path for path in dependencies if path not in generated)
+    
+    def _probe_record_key(self, key):
+        """Persistent cache key: the probe inputs plus the toolchain configuration."""
+        if self._config_digest is None:
+            self._config_digest = hashlib.sha256(
+                json.dumps(self.config, sort_keys=True, default=str).encode()).hexdigest()
+        return hashlib.sha256(repr((key, self._config_digest)).encode()).hexdigest()
+    
+    def _load_probe(self, key):
+        """
+        (sizes, dependency digests) from an earlier process's probe, if the
+        compile cache is enabled.
+        """
+        cache = self.builder.compiler.cache
+        if cache is None:
+            return None
+        record = cache.load_record(self._probe_record_key(key))
+        if not isinstance(record, dict) or 'sizes' not in record:
+            return None
+        return tuple(record['sizes']), record.get('deps')
+    
+    def _store_probe(self, key, sizes, digests):
+        cache = self.builder.compiler.cache
+        if cache is not None:
+            cache.store_record(self._probe_record_key(key), {'sizes': list(sizes), 'deps': digests})
     
     def build_with_wrapper(self, source, function_name, base_address, 
                           arg_address, output_dir=None, use_firmware_elf=True):
@@ -38,9 +163,10 @@ class WrapperBuilder:
             logger.error(f"Failed to parse function signature: {e}")
             raise e
         
-        logger.log(INFO_VERBOSE, f"Signature parsed: {signature['name']} -> {signature['return_type']}")
-        for idx, param in enumerate(signature['parameters']):
-            logger.log(INFO_VERBOSE, f"  Arg[{idx}] {param['type']} {param['name']} ({param['category']})")
+        if logger.isEnabledFor(INFO_VERBOSE):
+            logger.log(INFO_VERBOSE, f"Signature parsed: {signature['name']} -> {signature['return_type']}")
+            for idx, param in enumerate(signature['parameters']):
+                logger.log(INFO_VERBOSE, f"  Arg[{idx}] {param['type']} {param['name']} ({param['category']})")
         
         # Validate argument count
         args_array_size = self.config['wrapper']['args_array_size']
@@ -71,12 +197,21 @@ class WrapperBuilder:
         std_types_src = os.path.join(project_root, 'config', 'std_types.h')
         std_types_dst = os.path.join(source_dir, 'std_types.h')
         
-        if os.path.exists(std_types_src):
-            import shutil
-            shutil.copy2(std_types_src, std_types_dst)
-            logger.debug(f"Copied std_types.h to {source_dir}")
-        else:
+        try:
+            src_stat = os.stat(std_types_src)
+        except FileNotFoundError:
             logger.warning(f"std_types.h not found at {std_types_src}")
+        else:
+            # copy2 keeps the mtime, so an up-to-date copy is left alone
+            try:
+                dst_stat = os.stat(std_types_dst)
+                up_to_date = (dst_stat.st_size == src_stat.st_size
+                              and dst_stat.st_mtime_ns == src_stat.st_mtime_ns)
+            except FileNotFoundError:
+                up_to_date = False
+            if not up_to_date:
+                shutil.copy2(std_types_src, std_types_dst)
+                logger.debug(f"Copied std_types.h to {source_dir}")
             
         # Generate wrapper
         logger.log(INFO_VERBOSE, "Generating wrapper C code...")
@@ -92,7 +227,8 @@ class WrapperBuilder:
             source=temp_c_path,
             entry_point=wrapper_entry,
             base_address=base_address,
-            use_firmware_elf=use_firmware_elf
+            use_firmware_elf=use_firmware_elf,
+            linker_symbols={ARGS_SYMBOL: arg_address}
         )
         
         # Generate metadata
@@ -100,10 +236,11 @@ class WrapperBuilder:
         metadata_gen = MetadataGenerator(
             signature, arg_address, base_address, args_array_size
         )
-        signature_path = metadata_gen.save_json(output_dir)
+        metadata = metadata_gen.generate_metadata()
+        signature_path = metadata_gen.save_json(output_dir, metadata)
         
         # Attach metadata to binary object
-        binary.metadata = metadata_gen.generate_metadata()
+        binary.metadata = metadata
         
         logger.info(f"Wrapper build complete. Metadata saved to {signature_path}")
         
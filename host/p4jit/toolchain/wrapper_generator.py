@@ -1,19 +1,20 @@
 import os
 from ..utils.logger import setup_logger, INFO_VERBOSE
+from ..utils.file_io import write_text
+from ..utils.c_types import is_64bit_type, param_slot_count
 
 logger = setup_logger(__name__)
 
+# Linker symbol at the args array; its address is assigned at link time, so
+# the wrapper source doesn't change with the args address
+ARGS_SYMBOL = '__p4jit_args'
+
 class WrapperGenerator:
     """
     Generate temp.c wrapper code for memory-mapped I/O argument passing.
     Supports 64-bit types (int64, uint64, double) using 2 consecutive 32-bit slots.
     """
 
-    # Types that require 64-bit (2 slots)
-    _64BIT_TYPES = {'int64_t', 'uint64_t', 'int64', 'uint64', 'double',
-                   'long long', 'unsigned long long', 'long long int',
-                   'unsigned long long int'}
-
     def __init__(self, config, signature_data, original_source, arg_address):
         self.config = config
         self.signature = signature_data
@@ -24,12 +25,6 @@ class WrapperGenerator:
         self.arg_address = arg_address
         self.args_array_size = config['wrapper']['args_array_size']
 
-    def _is_64bit_type(self, type_str: str) -> bool:
-        """Check if a type requires 64-bit (2 slots)."""
-        # Remove const/volatile qualifiers and whitespace
-        clean_type = type_str.replace('const', '').replace('volatile', '').strip()
-        return clean_type in self._64BIT_TYPES
-
     def _calculate_slot_layout(self):
         """
         Calculate slot indices for each parameter and return value.
@@ -39,20 +34,13 @@ class WrapperGenerator:
         current_slot = 0
 
         for param in self.signature['parameters']:
-            if param['category'] == 'pointer':
-                # Pointers are always 32-bit on this platform
-                slot_count = 1
-            elif self._is_64bit_type(param['type']):
-                slot_count = 2
-            else:
-                slot_count = 1
-
+            slot_count = param_slot_count(param)
             layout.append((current_slot, slot_count))
             current_slot += slot_count
 
         # Return value uses last 1 or 2 slots depending on type
         return_type = self.signature['return_type']
-        if return_type != 'void' and self._is_64bit_type(return_type):
+        if return_type != 'void' and is_64bit_type(return_type):
             return_slot_count = 2
         else:
             return_slot_count = 1
@@ -80,7 +68,7 @@ class WrapperGenerator:
     def calculate_return_index(self):
         """Calculate index for return value (last 1 or 2 slots in array)."""
         return_type = self.signature['return_type']
-        if return_type != 'void' and self._is_64bit_type(return_type):
+        if return_type != 'void' and is_64bit_type(return_type):
             # 64-bit return uses 2 slots, return the first of the two
             return self.args_array_size - 2
         else:
@@ -144,7 +132,8 @@ typedef int esp_err_t;
     
     def _generate_io_pointer(self):
         """Generate I/O pointer declaration."""
-        return f"""    volatile int32_t *io = (volatile int32_t *)0x{self.arg_address:08x};
+        return f"""    extern volatile int32_t {ARGS_SYMBOL}[];  // Args address, set by the linker script
+    volatile int32_t *io = {ARGS_SYMBOL};
 """
     
     def _generate_arg_reads(self):
@@ -210,7 +199,7 @@ typedef int esp_err_t;
         if return_type == 'void':
             return f"    // No return value (void function)\n"
 
-        is_64bit = self._is_64bit_type(return_type)
+        is_64bit = is_64bit_type(return_type)
         slot_info = f"slot {return_idx}" if not is_64bit else f"slots {return_idx}-{return_idx+1}"
         lines = [f"    // Write result ({return_type}) to {slot_info}"]
 
@@ -258,7 +247,6 @@ typedef int esp_err_t;
         output_path = os.path.join(output_dir, template_file)
         
         logger.log(INFO_VERBOSE, f"Saving wrapper code to {output_path}")
-        with open(output_path, 'w') as f:
-            f.write(wrapper_code)
+        write_text(output_path, wrapper_code)
         
         return output_path
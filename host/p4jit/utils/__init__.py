@@ -1 +1,5 @@
 from .logger import setup_logger, INFO_VERBOSE
+from .yaml_loader import load_yaml
+from .c_types import is_64bit_type, param_slot_count, slot_format, args_struct, slot_value
+from .json_writer import write_json
+from .file_io import atomic_write_bytes, write_text
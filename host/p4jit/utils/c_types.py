@@ -0,0 +1,68 @@
+import functools
+import struct
+
+# Types that require 64-bit (2 slots / 8 bytes in the args array)
+TYPES_64BIT = frozenset({'int64_t', 'uint64_t', 'int64', 'uint64', 'double',
+                         'long long', 'unsigned long long', 'long long int',
+                         'unsigned long long int'})
+
+
+@functools.lru_cache(maxsize=256)
+def is_64bit_type(type_str: str) -> bool:
+    """Check if a type requires 64-bit (2 slots)."""
+    # Remove const/volatile qualifiers and whitespace
+    clean_type = type_str.replace('const', '').replace('volatile', '').strip()
+    return clean_type in TYPES_64BIT
+
+
+def param_slot_count(param: dict) -> int:
+    """Number of 32-bit args array slots used by a signature parameter."""
+    # Pointers are always 32-bit on this platform
+    if param['category'] != 'pointer' and is_64bit_type(param['type']):
+        return 2
+    return 1
+
+
+def slot_format(param: dict) -> str:
+    """struct format character for a signature parameter in the args array."""
+    return _slot_format(param['type'], param['category'])
+
+
+@functools.lru_cache(maxsize=256)
+def _slot_format(type_str: str, category: str) -> str:
+    if category == 'pointer':
+        # Device address
+        return 'I'
+    unsigned = 'unsigned' in type_str or 'uint' in type_str
+    if is_64bit_type(type_str):
+        if 'double' in type_str:
+            return 'd'
+        return 'Q' if unsigned else 'q'
+    if 'float' in type_str:
+        return 'f'
+    return 'I' if unsigned else 'i'
+
+
+@functools.lru_cache(maxsize=128)
+def _args_struct(formats: str) -> struct.Struct:
+    return struct.Struct('<' + formats)
+
+
+def args_struct(parameters: list) -> struct.Struct:
+    """
+    Precompiled little-endian struct packing all parameters into their
+    consecutive args array slots (shared by signatures with the same layout).
+    """
+    return _args_struct(''.join(slot_format(param) for param in parameters))
+
+
+# Unsigned slots wrap like a C cast
+_SLOT_MASKS = {'I': 0xFFFFFFFF, 'Q': 0xFFFFFFFFFFFFFFFF}
+
+
+def slot_value(arg, fmt: str):
+    """Convert a Python/NumPy scalar to the value packed for a slot format."""
+    if fmt in 'fd':
+        return float(arg)
+    mask = _SLOT_MASKS.get(fmt)
+    return int(arg) & mask if mask else int(arg)
@@ -0,0 +1,51 @@
+import os
+import tempfile
+
+
+def atomic_write_bytes(path, data):
+    """
+    Write bytes to path atomically.
+
+    Data goes to a temp file in the same directory which then replaces
+    path, so readers never see a partially written file (e.g. after
+    Ctrl+C during a build).
+
+    Args:
+        path (str): Output file path
+        data (bytes): Content to write
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+    try:
+        # mkstemp creates 0600 files; use regular file permissions
+        os.chmod(tmp_path, 0o644)
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+        os.close(fd)
+        fd = None
+        os.replace(tmp_path, path)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        os.unlink(tmp_path)
+        raise
+
+
+def write_text(path, text):
+    """
+    Encode text as UTF-8 and write it atomically.
+
+    A file that already holds exactly this text is left alone, so neither
+    its mtime nor its directory's (see Builder source discovery) changes
+    when a generated file comes out the same.
+    """
+    data = text.encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(data) + 1) == data:
+                return
+    except OSError:
+        pass
+    atomic_write_bytes(path, data)
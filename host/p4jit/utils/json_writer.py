@@ -0,0 +1,23 @@
+import json
+from .file_io import atomic_write_bytes
+
+# orjson serializes in C; fall back to the stdlib when it is not installed
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, indent=2).encode()
+
+
+def write_json(path, obj):
+    """
+    Serialize obj as indented JSON and write it atomically.
+
+    Args:
+        path (str): Output file path
+        obj: JSON-serializable object
+    """
+    atomic_write_bytes(path, _dumps(obj))
@@ -0,0 +1,31 @@
+import copy
+import functools
+import os
+import yaml
+
+# libyaml-backed loader is several times faster; fall back to pure Python
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+
+@functools.lru_cache(maxsize=32)
+def _load_yaml_cached(path, mtime_ns):
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=_Loader)
+
+
+def load_yaml(path):
+    """
+    Load a YAML file, parsing it only once per modification.
+
+    Args:
+        path (str): Path to YAML file
+
+    Returns:
+        Parsed document. A fresh copy is returned on every call so callers
+        may mutate it freely.
+    """
+    path = os.path.abspath(path)
+    return copy.deepcopy(_load_yaml_cached(path, os.stat(path).st_mtime_ns))
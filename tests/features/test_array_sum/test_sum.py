@@ -46,18 +46,13 @@ print("3. Building JIT Function...")
 builder = Builder()
 source_file = os.path.join(os.path.dirname(__file__), 'source', 'sum_array.c')
 
-# Pass 1: Probe
+# Pass 1: Probe (sizes are reused while the sources are unchanged)
 print("   Pass 1: Probing...")
-temp_bin = builder.wrapper.build_with_wrapper(
+code_size, args_size = builder.wrapper.probe_size(
     source=source_file,
-    function_name='sum_array',
-    base_address=0x03000004,
-    arg_address=0x00030004
+    function_name='sum_array'
 )
 
-code_size = temp_bin.total_size
-args_size = temp_bin.metadata['addresses']['args_array_bytes']
-
 # Allocate Code & Args
 # Must be executable
 CAP_EXEC = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT 
@@ -5,12 +5,19 @@ typedef int esp_err_t;
 
 esp_err_t dsps_biquad_f32(const float *input, float *output, int len, float *coef, float *w)
 {
+    // Coefficients and state live in registers for the whole loop: output may
+    // alias coef/w as far as the compiler knows, so indexing them directly
+    // would reload all seven from memory (SPIRAM) on every sample
+    const float b0 = coef[0], b1 = coef[1], b2 = coef[2], a1 = coef[3], a2 = coef[4];
+    float w0 = w[0], w1 = w[1];
     for (int i = 0 ; i < len ; i++) {
-        float d0 = input[i] - coef[3] * w[0] - coef[4] * w[1];
-        output[i] = coef[0] * d0 +  coef[1] * w[0] + coef[2] * w[1];
-        w[1] = w[0];
-        w[0] = d0;
+        float d0 = input[i] - a1 * w0 - a2 * w1;
+        output[i] = b0 * d0 +  b1 * w0 + b2 * w1;
+        w1 = w0;
+        w0 = d0;
     }
+    w[0] = w0;
+    w[1] = w1;
     return ESP_OK;
 }
 
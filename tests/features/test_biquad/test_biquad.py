@@ -1,6 +1,5 @@
 import sys
 import os
-import struct
 import time
 import numpy as np
 import math
@@ -12,6 +11,13 @@ from p4jit.toolchain import Builder
 from p4jit.runtime import JITSession
 from p4jit.runtime.memory_caps import *
 
+# Numba compiles the reference filter when installed; without it the
+# reference runs as a plain Python loop
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 print("--- P4-JIT Biquad Filter Test (Verified) ---")
 
 # --- Python Implementation for Verification ---
@@ -39,14 +45,36 @@ def python_biquad(input_arr, coef, w):
     output[i] = coef[0] * d0 +  coef[1] * w[0] + coef[2] * w[1];
     w[1] = w[0];
     w[0] = d0;
+
+    The loop runs on plain Python floats; indexing the NumPy arrays per
+    sample would box a NumPy scalar for every operation.
     """
-    output_arr = np.zeros_like(input_arr)
-    for i in range(len(input_arr)):
-        d0 = input_arr[i] - coef[3] * w[0] - coef[4] * w[1]
-        output_arr[i] = coef[0] * d0 + coef[1] * w[0] + coef[2] * w[1]
-        w[1] = w[0]
-        w[0] = d0
-    return output_arr
+    b0, b1, b2, a1, a2 = coef.tolist()
+    w0, w1 = w.tolist()
+    output = []
+    for x in input_arr.tolist():
+        d0 = x - a1 * w0 - a2 * w1
+        output.append(b0 * d0 + b1 * w0 + b2 * w1)
+        w1 = w0
+        w0 = d0
+    w[0], w[1] = w0, w1
+    return np.array(output, dtype=input_arr.dtype)
+
+if njit is not None:
+    @njit(cache=True)
+    def python_biquad(input_arr, coef, w):
+        """Same recurrence over the arrays, compiled to machine code."""
+        output = np.empty_like(input_arr)
+        b0, b1, b2, a1, a2 = coef[0], coef[1], coef[2], coef[3], coef[4]
+        w0, w1 = w[0], w[1]
+        for i in range(input_arr.shape[0]):
+            d0 = input_arr[i] - a1 * w0 - a2 * w1
+            output[i] = b0 * d0 + b1 * w0 + b2 * w1
+            w1 = w0
+            w0 = d0
+        w[0] = w0
+        w[1] = w1
+        return output
 
 # ----------------------------------------------
 
@@ -92,23 +120,12 @@ w_lpf3 = np.zeros(2, dtype=np.float32)
 
 # --- Run Python Verification ---
 print("   Running Python Simulation...")
-py_buffer = readBufferFloat.copy()
-py_signal = py_buffer[4:4+Len]
-
-# Simulate 3 cascaded stages
-# Stage 1
-w1_py = np.zeros(2, dtype=np.float32)
-py_signal = python_biquad(py_signal, coeffs_lpf, w1_py)
-# Stage 2
-w2_py = np.zeros(2, dtype=np.float32)
-py_signal = python_biquad(py_signal, coeffs_lpf, w2_py)
-# Stage 3
-w3_py = np.zeros(2, dtype=np.float32)
-py_signal = python_biquad(py_signal, coeffs_lpf, w3_py)
-
-# Update buffer with result
-py_buffer[4:4+Len] = py_signal
-expected_result = py_buffer
+expected_result = readBufferFloat.copy()
+py_signal = expected_result[4:4+Len]  # View: stages write straight into the buffer
+
+# Simulate 3 cascaded stages, each starting from zero state
+for _ in range(3):
+    py_signal[:] = python_biquad(py_signal, coeffs_lpf, np.zeros(2, dtype=np.float32))
 
 # -------------------------------
 
@@ -118,24 +135,36 @@ builder = Builder()
 source_dir = os.path.join(os.path.dirname(__file__), 'source')
 main_source = os.path.join(source_dir, 'biquad.c')
 
-# Pass 1: Probe
+# Pass 1: Probe (sizes are reused while the sources are unchanged)
 print("   Pass 1: Probing...")
-temp_bin = builder.wrapper.build_with_wrapper(
+code_size, args_size = builder.wrapper.probe_size(
     source=main_source,
-    function_name='process_audio',
-    base_address=0x03000004,
-    arg_address=0x00030004
+    function_name='process_audio'
 )
 
-code_size = temp_bin.total_size
-args_size = temp_bin.metadata['addresses']['args_array_bytes']
+# The data arrays share one region (16-byte aligned offsets)
+def pack_arrays(arrays):
+    """
+    Lay all arrays out in one buffer, copied in as byte views (no tobytes()
+    temporaries). Returns the buffer and each array's offset in it.
+    """
+    offsets = np.cumsum([0] + [(arr.nbytes + 15) & ~15 for arr in arrays])
+    payload = np.zeros(int(offsets[-1]), dtype=np.uint8)
+    for arr, off in zip(arrays, offsets):
+        payload[off:off + arr.nbytes] = arr.reshape(-1).view(np.uint8)
+    return payload, [int(off) for off in offsets[:-1]]
+
+data_payload, data_offsets = pack_arrays(
+    [readBufferFloat, coeffs_lpf, w_lpf1, w_lpf2, w_lpf3])
 
-# Allocate Code & Args
-CAP_EXEC = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT 
-CAP_DATA = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT
+# Code, Args & Data share one SPIRAM block (one heap allocation)
+CAP_POOL = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT
 
-code_addr = session.device.allocate(code_size + 64, caps=CAP_EXEC, alignment=128)
-args_addr = session.device.allocate(args_size, caps=CAP_DATA, alignment=128)
+layout = [(code_size + 64, 128), (args_size, 128), (data_payload.nbytes, 16)]
+pool = session.device.create_pool(sum(size + align for size, align in layout), CAP_POOL, 128)
+code_addr, args_addr, addr_data = (pool.alloc(size, align) for size, align in layout)
+addr_readBuffer, addr_coeffs, addr_w1, addr_w2, addr_w3 = (
+    addr_data + off for off in data_offsets)
 
 print(f"   Code Allocated at: 0x{code_addr:08X}")
 print(f"   Args Allocated at: 0x{args_addr:08X}")
@@ -153,44 +182,34 @@ final_bin = builder.wrapper.build_with_wrapper(
 print("   Uploading binary...")
 remote_func = session.load_function(final_bin, args_addr, smart_args=False)
 
-# 4. Manual Memory Allocation
-print("4. Allocating Device Memory...")
-
-def allocate_and_write(arr):
-    size_bytes = arr.nbytes
-    addr = session.device.allocate(size_bytes, CAP_DATA, 16)
-    session.device.write_memory(addr, arr.tobytes())
-    return addr
-
-addr_readBuffer = allocate_and_write(readBufferFloat)
-addr_coeffs = allocate_and_write(coeffs_lpf)
-addr_w1 = allocate_and_write(w_lpf1)
-addr_w2 = allocate_and_write(w_lpf2)
-addr_w3 = allocate_and_write(w_lpf3)
+# 4. Upload Data
+print("4. Uploading Data...")
+# Not waited for: the acknowledgement is collected by the call below
+session.device.write_memory(addr_data, memoryview(data_payload), wait=False)
 
 # 5. Execute
 print("5. Executing process_audio on Device...")
 
-args_packed = struct.pack(
-    "<IiIIII", 
+# One 32-bit slot per argument, passed to the call as-is (no packing)
+args_packed = np.array([
     addr_readBuffer, 
-    int(readBufferLength), 
+    readBufferLength, 
     addr_coeffs, 
     addr_w1, 
     addr_w2, 
     addr_w3
-)
+], dtype=np.uint32)
 
-start_time = time.time()
+t0 = time.perf_counter_ns()
 remote_func(args_packed)
-end_time = time.time()
+dt_ns = time.perf_counter_ns() - t0
 
-print(f"   Time: {(end_time - start_time)*1000:.2f} ms")
+print(f"   Time: {dt_ns / 1e6:.3f} ms")
 
 # 6. Verify
 print("6. Verifying Result...")
-result_bytes = session.device.read_memory(addr_readBuffer, readBufferFloat.nbytes)
-result_array = np.frombuffer(result_bytes, dtype=np.float32)
+result_array = np.empty_like(readBufferFloat)
+session.device.read_memory_into(addr_readBuffer, result_array)
 
 print("   Input Signal (First 5):", input_signal[:5])
 print("   Python Result (First 5):", expected_result[4:9])
@@ -208,13 +227,7 @@ else:
 
 # 7. Cleanup
 print("7. Cleaning up...")
-session.device.free(code_addr)
-session.device.free(args_addr)
-session.device.free(addr_readBuffer)
-session.device.free(addr_coeffs)
-session.device.free(addr_w1)
-session.device.free(addr_w2)
-session.device.free(addr_w3)
+pool.free()
 session.device.disconnect()
 
 final_bin.disassemble("asm.txt", False)
@@ -4,7 +4,6 @@ import struct
 import time
 import numpy as np
 import math
-import matplotlib.pyplot as plt
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'host')))
@@ -13,6 +12,9 @@ from p4jit.toolchain import Builder
 from p4jit.runtime import JITSession
 from p4jit.runtime.memory_caps import *
 
+# process_audio args: readBufferFloat, readBufferLength, coeffs_lpf, w_lpf1, w_lpf2, w_lpf3
+BIQUAD_ARGS = struct.Struct("<IiIIII")
+
 print("--- P4-JIT Biquad Filter Test (Visual) ---")
 
 # --- Helper Functions ---
@@ -78,18 +80,13 @@ builder = Builder()
 source_dir = os.path.join(os.path.dirname(__file__), 'source')
 main_source = os.path.join(source_dir, 'biquad.c')
 
-# Pass 1: Probe
+# Pass 1: Probe (sizes are reused while the sources are unchanged)
 print("   Pass 1: Probing...")
-temp_bin = builder.wrapper.build_with_wrapper(
+code_size, args_size = builder.wrapper.probe_size(
     source=main_source,
-    function_name='process_audio',
-    base_address=0x03000004,
-    arg_address=0x00030004
+    function_name='process_audio'
 )
 
-code_size = temp_bin.total_size
-args_size = temp_bin.metadata['addresses']['args_array_bytes']
-
 # Allocate Code & Args
 CAP_EXEC = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT 
 CAP_DATA = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT
@@ -116,7 +113,7 @@ print("4. Allocating Device Memory...")
 def allocate_and_write(arr):
     size_bytes = arr.nbytes
     addr = session.device.allocate(size_bytes, CAP_DATA, 16)
-    session.device.write_memory(addr, arr.tobytes())
+    session.device.write_memory(addr, memoryview(arr).cast("B"))  # No tobytes() copy
     return addr
 
 addr_readBuffer = allocate_and_write(readBufferFloat)
@@ -128,8 +125,10 @@ addr_w3 = allocate_and_write(w_lpf3)
 # 5. Execute
 print("5. Executing process_audio on Device...")
 
-args_packed = struct.pack(
-    "<IiIIII", 
+# Packed into a preallocated buffer with the precompiled format
+args_packed = bytearray(BIQUAD_ARGS.size)
+BIQUAD_ARGS.pack_into(
+    args_packed, 0,
     addr_readBuffer, 
     int(readBufferLength), 
     addr_coeffs, 
@@ -138,16 +137,16 @@ args_packed = struct.pack(
     addr_w3
 )
 
-start_time = time.time()
+t0 = time.perf_counter_ns()
 remote_func(args_packed)
-end_time = time.time()
+dt_ns = time.perf_counter_ns() - t0
 
-print(f"   Time: {(end_time - start_time)*1000:.2f} ms")
+print(f"   Time: {dt_ns / 1e6:.3f} ms")
 
 # 6. Read Back Result
 print("6. Reading back result...")
-result_bytes = session.device.read_memory(addr_readBuffer, readBufferFloat.nbytes)
-result_array = np.frombuffer(result_bytes, dtype=np.float32)
+result_array = np.empty_like(readBufferFloat)
+session.device.read_memory_into(addr_readBuffer, result_array)  # No intermediate bytes
 output_signal = result_array[4:]
 
 # --- Python Implementation for Verification ---
@@ -187,6 +186,7 @@ else:
 
 # 8. Plotting
 print("8. Generating Plot...")
+import matplotlib.pyplot as plt  # only needed once the device run succeeded
 plt.figure(figsize=(10, 8))
 
 # Subplot 1: Input
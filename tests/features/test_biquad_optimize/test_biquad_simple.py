@@ -1,6 +1,5 @@
 import sys
 import os
-import struct
 import time
 import numpy as np
 
@@ -44,9 +43,8 @@ coeffs_lpf = np.array([
     0.4128018
 ], dtype=np.float32)
 
-w_lpf1 = np.array([0.0, 0.0], dtype=np.float32)
-w_lpf2 = np.array([0.0, 0.0], dtype=np.float32)
-w_lpf3 = np.array([0.0, 0.0], dtype=np.float32)
+# Filter state: one (w0, w1) row per stage, all three stages in one array
+w_lpf = np.zeros((3, 2), dtype=np.float32)
 
 print(f"   Buffer Length: {len(readBufferFloat)}")
 
@@ -56,25 +54,45 @@ builder = Builder()
 source_dir = os.path.join(os.path.dirname(__file__), 'source')
 main_source = os.path.join(source_dir, 'biquad.c')
 
-# Pass 1: Probe
+# Pass 1: Probe (sizes are reused while the sources are unchanged)
 print("   Pass 1: Probing...")
-temp_bin = builder.wrapper.build_with_wrapper(
+code_size, args_size = builder.wrapper.probe_size(
     source=main_source,
-    function_name='process_audio',
-    base_address=0x03000004,
-    arg_address=0x00030004
+    function_name='process_audio'
 )
 
-code_size = temp_bin.total_size
-args_size = temp_bin.metadata['addresses']['args_array_bytes']
-
-# Allocate Code & Args
+# Arrays sharing one block (16-byte aligned offsets)
+def pack_arrays(arrays):
+    """
+    Lay all arrays out in one buffer, copied in as byte views (no tobytes()
+    temporaries). Returns the buffer and each array's offset in it.
+    """
+    offsets = np.cumsum([0] + [(arr.nbytes + 15) & ~15 for arr in arrays])
+    payload = np.zeros(int(offsets[-1]), dtype=np.uint8)
+    for arr, off in zip(arrays, offsets):
+        payload[off:off + arr.nbytes] = arr.reshape(-1).view(np.uint8)
+    return payload, [int(off) for off in offsets[:-1]]
+
+# The small arrays (coefficients, filter state) go in one block
+hot_payload, hot_offsets = pack_arrays([coeffs_lpf, w_lpf])
+
+# Allocate Code, Args & Data with a single request (one round trip).
+# Args, coefficients and state are small and read on every call: internal
+# SRAM. Only the audio buffer (bulk data) is placed in PSRAM
 CAP_EXEC = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT 
-CAP_DATA = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT
+CAP_HOT = MALLOC_CAP_INTERNAL | MALLOC_CAP_8BIT
+CAP_BULK = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT
 
 # Add padding (+64) and alignment (128)
-code_addr = session.device.allocate(code_size + 64, caps=CAP_EXEC, alignment=128)
-args_addr = session.device.allocate(args_size, caps=CAP_DATA, alignment=128)
+code_addr, args_addr, addr_readBuffer, addr_hot = session.device.allocate_many([
+    (code_size + 64, CAP_EXEC, 128),
+    (args_size, CAP_HOT, 128),
+    (readBufferFloat.nbytes, CAP_BULK, 16),
+    (hot_payload.nbytes, CAP_HOT, 16),
+])
+addr_coeffs, addr_w = (addr_hot + off for off in hot_offsets)
+# Each stage's state pointer is a row of w_lpf
+addr_w1, addr_w2, addr_w3 = (addr_w + stage * w_lpf.strides[0] for stage in range(len(w_lpf)))
 
 print(f"   Code Allocated at: 0x{code_addr:08X}")
 print(f"   Args Allocated at: 0x{args_addr:08X}")
@@ -93,20 +111,13 @@ print("   Uploading binary...")
 # Load WITHOUT Smart Args to allow manual memory management
 remote_func = session.load_function(final_bin, args_addr, smart_args=False)
 
-# 4. Manual Memory Allocation for Arrays
-print("4. Allocating Device Memory for Arrays...")
-
-def allocate_and_write(arr):
-    size_bytes = arr.nbytes
-    addr = session.device.allocate(size_bytes, CAP_DATA, 16)
-    session.device.write_memory(addr, arr.tobytes())
-    return addr
-
-addr_readBuffer = allocate_and_write(readBufferFloat)
-addr_coeffs = allocate_and_write(coeffs_lpf)
-addr_w1 = allocate_and_write(w_lpf1)
-addr_w2 = allocate_and_write(w_lpf2)
-addr_w3 = allocate_and_write(w_lpf3)
+# 4. Upload Arrays
+print("4. Uploading Data...")
+# One write per block; the acknowledgements are collected by the next
+# command (at the latest the call's args write, which then raises any
+# device-side write error) instead of waited for here
+session.device.write_memory(addr_readBuffer, memoryview(readBufferFloat).cast("B"), wait=False)
+session.device.write_memory(addr_hot, memoryview(hot_payload), wait=False)
 
 print(f"   readBuffer: 0x{addr_readBuffer:08X}")
 
@@ -115,42 +126,43 @@ print("5. Executing process_audio...")
 
 # Pack arguments manually:
 # process_audio(float *readBufferFloat, int readBufferLength, float *coeffs_lpf, float *w_lpf1, float *w_lpf2, float *w_lpf3)
-# Pointers are passed as 32-bit integers (uint32)
-# Length is int32
-args_packed = struct.pack(
-    "<IiIIII", 
-    addr_readBuffer, 
-    int(readBufferLength), 
-    addr_coeffs, 
-    addr_w1, 
-    addr_w2, 
-    addr_w3
-)
-
-start_time = time.time()
+# One record mirroring the args layout: pointers are passed as 32-bit
+# integers (uint32), length is int32. Fields are filled by name and the
+# record is passed to the call as-is (no format string, no bytes copy)
+args_dtype = np.dtype([
+    ('readBufferFloat', '<u4'),
+    ('readBufferLength', '<i4'),
+    ('coeffs_lpf', '<u4'),
+    ('w_lpf1', '<u4'),
+    ('w_lpf2', '<u4'),
+    ('w_lpf3', '<u4'),
+])
+args_packed = np.zeros(1, dtype=args_dtype)
+args_packed['readBufferFloat'] = addr_readBuffer
+args_packed['readBufferLength'] = readBufferLength
+args_packed['coeffs_lpf'] = addr_coeffs
+args_packed['w_lpf1'] = addr_w1
+args_packed['w_lpf2'] = addr_w2
+args_packed['w_lpf3'] = addr_w3
+
+t0 = time.perf_counter_ns()
 remote_func(args_packed)
-end_time = time.time()
+dt_ns = time.perf_counter_ns() - t0
 
-print(f"   Time: {(end_time - start_time)*1000:.2f} ms")
+print(f"   Time: {dt_ns / 1e6:.3f} ms")
 
 # 6. Read Back Result
 print("6. Reading back result...")
 # Read back the modified readBufferFloat
-result_bytes = session.device.read_memory(addr_readBuffer, readBufferFloat.nbytes)
-result_array = np.frombuffer(result_bytes, dtype=np.float32)
+result_array = np.empty_like(readBufferFloat)
+session.device.read_memory_into(addr_readBuffer, result_array)  # No intermediate bytes
 
 print("   Original Buffer (First 10):", readBufferFloat[:10])
 print("   Modified Buffer (First 10):", result_array[:10])
 
 # 7. Cleanup
 print("7. Cleaning up...")
-session.device.free(code_addr)
-session.device.free(args_addr)
-session.device.free(addr_readBuffer)
-session.device.free(addr_coeffs)
-session.device.free(addr_w1)
-session.device.free(addr_w2)
-session.device.free(addr_w3)
+session.device.free_many([code_addr, args_addr, addr_readBuffer, addr_hot])
 session.device.disconnect()
 
 
@@ -41,19 +41,14 @@ builder = Builder()
 source_dir = os.path.join(os.path.dirname(__file__), 'source')
 main_source = os.path.join(source_dir, 'main.c')
 
-# Pass 1: Probe
+# Pass 1: Probe (sizes are reused while the sources are unchanged)
 print("   Pass 1: Probing...")
 # Builder will automatically discover math_utils.c and data_processor.c!
-temp_bin = builder.wrapper.build_with_wrapper(
+code_size, args_size = builder.wrapper.probe_size(
     source=main_source,
-    function_name='complex_c_test',
-    base_address=0x03000004,
-    arg_address=0x00030004
+    function_name='complex_c_test'
 )
 
-code_size = temp_bin.total_size
-args_size = temp_bin.metadata['addresses']['args_array_bytes']
-
 # Allocate Code & Args
 CAP_EXEC = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT 
 CAP_DATA = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT
@@ -102,16 +97,12 @@ print(f"   Time: {(end_time - start_time)*1000:.2f} ms")
 #   val = (int)v
 # sum += val
 
-# Manual calculation
-expected_sum = 0
-for val in [10, 20, 30, 40, 50]:
-    v = float(val) * 1.5
-    v = v * v
-    v = v + 5.0
-    v = abs(v)
-    expected_sum += int(v)
-
-expected_result = np.int32(expected_sum)
+# Same steps over the whole (original) input at once; the casts truncate like int()
+v = np.array([10, 20, 30, 40, 50], dtype=np.float64) * 1.5
+v = v * v
+v = v + 5.0
+v = np.abs(v)
+expected_result = np.int32(v.astype(np.int32).sum())
 
 if result == expected_result:
     print(f"SUCCESS: Result is {result}")
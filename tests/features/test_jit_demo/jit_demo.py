@@ -10,6 +10,8 @@ from p4jit.toolchain import Builder
 from p4jit.runtime import JITSession
 from p4jit.runtime.memory_caps import *
 
+ARGS = struct.Struct('<ii')
+F32 = struct.Struct('<f')
 
 print("--- P4-JIT Demo ---")
 
@@ -31,20 +33,12 @@ builder = Builder()
 source_file = os.path.join(os.path.dirname(__file__), 'source', 'compute.c')
 
 # Compile with wrapper to get size (fake addresses)
-temp_bin = builder.wrapper.build_with_wrapper(
+code_size, args_size = builder.wrapper.probe_size(
     source=source_file,
     function_name='compute_sum',
     base_address=0x01003008,
     arg_address=0x03001008
 )
-
-code_size = temp_bin.total_size
-# DEBUG: Print metadata keys
-print(f"DEBUG: Metadata keys: {temp_bin.metadata.keys()}")
-if 'addresses' in temp_bin.metadata:
-    print(f"DEBUG: Addresses keys: {temp_bin.metadata['addresses'].keys()}")
-
-args_size = temp_bin.metadata['addresses']['args_array_bytes']
 print(f"   Code Size: {code_size} bytes")
 print(f"   Args Size: {args_size} bytes")
 
@@ -61,7 +55,8 @@ CAP_DATA = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT
 # requires more instructions/literal pool space than the placeholder (0x00...) used in Pass 1.
 # Use 128-byte alignment for cache friendliness (P4 cache line size)
 code_addr = session.device.allocate(code_size + 64, caps=CAP_EXEC, alignment=128)
-args_addr = session.device.allocate(args_size, caps=CAP_DATA, alignment=128)
+# (kept by the session, so a reloaded compute_sum gets the same args block)
+args_addr = session.args_buffer('compute_sum', args_size, caps=CAP_DATA, alignment=128)
 
 print(f"   Code Allocated at: 0x{code_addr:08X}")
 print(f"   Args Allocated at: 0x{args_addr:08X}")
@@ -84,7 +79,7 @@ print("6. Executing compute_sum(10, 20)...")
 # User manually packs arguments (int32, int32) -> bytes
 # The wrapper expects an array of int32s.
 # int a = args[0], int b = args[1]
-args_data = struct.pack('<ii', 10, 20) 
+args_data = ARGS.pack(10, 20)
 
 start_time = time.time()
 result = remote_func(args_data)
@@ -95,7 +90,7 @@ end_time = time.time()
 # We need to read this manually as CMD_EXEC returns the wrapper's status (0/ESP_OK).
 result_addr = args_addr + (31 * 4)
 result_bytes = session.device.read_memory(result_addr, 4)
-result = struct.unpack('<f', result_bytes)[0]
+result = F32.unpack_from(result_bytes)[0]
 
 print(f"   Result: {result}")
 print(f"   Time: {(end_time - start_time)*1000:.2f} ms")
@@ -105,8 +100,27 @@ if result == 30:
 else:
     print(f"FAILURE: Expected 30, got {result}")
 
+# 7. Reload into fresh code memory, keeping the args buffer
+print("7. Reloading compute_sum...")
+session.device.free(code_addr)
+code_addr = session.device.allocate(code_size + 64, caps=CAP_EXEC, alignment=128)
+assert session.args_buffer('compute_sum', args_size, caps=CAP_DATA, alignment=128) == args_addr
+final_bin = builder.wrapper.build_with_wrapper(
+    source=source_file,
+    function_name='compute_sum',
+    base_address=code_addr,
+    arg_address=args_addr
+)
+# Replaces remote_func: both would share the args block
+remote_func = session.load_function(final_bin, args_addr)
+remote_func(ARGS.pack(5, 7))
+result = F32.unpack_from(session.device.read_memory(result_addr, 4))[0]
+print(f"   Result: {result}")
+if result != 12:
+    print(f"FAILURE: Expected 12 after reload, got {result}")
+
 # Cleanup
-print("7. Cleaning up...")
+print("8. Cleaning up...")
 session.device.free(code_addr)
 session.device.free(args_addr)
 session.device.disconnect()
@@ -38,12 +38,12 @@ except Exception as e:
 print("Building (Pass 1)...")
 source_file = os.path.join(os.path.dirname(__file__), 'source', 'hello.c')
 try:
-    temp_bin = builder.wrapper.build_with_wrapper(
+    code_size, args_size = builder.wrapper.probe_size(
         source=source_file, 
         function_name="hello_world",
+        use_firmware_elf=True,
         base_address=0, 
-        arg_address=0,
-        use_firmware_elf=True
+        arg_address=0
     )
 except RuntimeError as e:
     print(f"Build failed: {e}")
@@ -54,9 +54,9 @@ except RuntimeError as e:
 CAP_EXEC = MALLOC_CAP_INTERNAL 
 CAP_DATA = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT
 
-print(f"Allocating {temp_bin.total_size} bytes for code...")
-code_addr = session.device.allocate(temp_bin.total_size + 64, CAP_EXEC, 128)
-args_addr = session.device.allocate(128, CAP_DATA, 128)
+print(f"Allocating {code_size} bytes for code...")
+code_addr = session.device.allocate(code_size + 64, CAP_EXEC, 128)
+args_addr = session.device.allocate(args_size, CAP_DATA, 128)
 print(f"Code allocated at: 0x{code_addr:08x}")
 
 # 6. Build (Pass 2 - Final)
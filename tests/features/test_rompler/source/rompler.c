@@ -9,6 +9,14 @@
 #define PI_4    0.78539816339744830961566084581988f
 #define FOUR_OVER_PI    1.2732395447351626861510701069801f
 
+// Filter state block passed to the Rompler_ApplyToLargeBuffer* entry points
+// (offsets in floats; coeffs and each state start on a 16-byte boundary)
+#define ROMPLER_STATE_COEFFS    0   // 5 floats
+#define ROMPLER_STATE_W1        8   // 2 floats
+#define ROMPLER_STATE_W2        12  // 2 floats
+#define ROMPLER_STATE_W3        16  // 2 floats
+#define ROMPLER_STATE_FLOATS    20
+
 
 static inline uint32_t rdcycle(void) {
     uint32_t cycles;
@@ -139,19 +147,19 @@ void Rompler_ProcessOneBlock(float *readBufferFloat,
  * @param largeAudioBuffer Pointer to the FULL audio data (Must have 4 floats padding at start).
  * @param totalSamples     Total size of the buffer (including padding).
  * @param phaseIncrement   Playback pitch.
- * @param coeffs_lpf       External array of 5 floats.
- * @param w_lpf1           External array of 2 floats (state).
- * @param w_lpf2           External array of 2 floats (state).
- * @param w_lpf3           External array of 2 floats (state).
+ * @param state            Filter state block of ROMPLER_STATE_FLOATS floats:
+ *                         LPF coeffs and the three cascade states (w1, w2, w3).
  */
 uint32_t Rompler_ApplyToLargeBuffer(float* largeAudioBuffer, 
                                 uint32_t totalSamples, 
                                 float phaseIncrement,
-                                float* coeffs_lpf,
-                                float* w_lpf1,
-                                float* w_lpf2,
-                                float* w_lpf3) 
+                                float* state) 
 {
+    float* coeffs_lpf = &state[ROMPLER_STATE_COEFFS];
+    float* w_lpf1 = &state[ROMPLER_STATE_W1];
+    float* w_lpf2 = &state[ROMPLER_STATE_W2];
+    float* w_lpf3 = &state[ROMPLER_STATE_W3];
+
     // Internal variables to simulate the exact length calculations
     float readBufferPhase = 0.0f;
     const uint32_t outputBlockSize = 32; // Fixed project constant
@@ -266,11 +274,13 @@ void Rompler_ProcessBlock2(float *readBufferFloat,
 uint32_t Rompler_ApplyToLargeBuffer2(float* largeAudioBuffer, 
                                     uint32_t totalSamples, 
                                     float phaseIncrement,
-                                    float* coeffs_lpf,
-                                    float* w_lpf1,
-                                    float* w_lpf2,
-                                    float* w_lpf3) 
+                                    float* state) 
 {
+    float* coeffs_lpf = &state[ROMPLER_STATE_COEFFS];
+    float* w_lpf1 = &state[ROMPLER_STATE_W1];
+    float* w_lpf2 = &state[ROMPLER_STATE_W2];
+    float* w_lpf3 = &state[ROMPLER_STATE_W3];
+
     float readBufferPhase = 0.0f;
     const uint32_t outputBlockSize = 32;
     uint32_t currentReadPos = 4; 
@@ -357,11 +367,13 @@ void Rompler_ProcessBlock3(float *readBufferFloat,
 uint32_t Rompler_ApplyToLargeBuffer3(float* largeAudioBuffer, 
                                     uint32_t totalSamples, 
                                     float phaseIncrement,
-                                    float* coeffs_lpf,
-                                    float* w_lpf1,
-                                    float* w_lpf2,
-                                    float* w_lpf3) 
+                                    float* state) 
 {
+    float* coeffs_lpf = &state[ROMPLER_STATE_COEFFS];
+    float* w_lpf1 = &state[ROMPLER_STATE_W1];
+    float* w_lpf2 = &state[ROMPLER_STATE_W2];
+    float* w_lpf3 = &state[ROMPLER_STATE_W3];
+
     float readBufferPhase = 0.0f;
     const uint32_t outputBlockSize = 32;
     uint32_t currentReadPos = 4; 
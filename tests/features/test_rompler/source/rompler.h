@@ -7,6 +7,6 @@
 #include "std_types.h"
 
 // Function declaration
-uint32_t Rompler_ApplyToLargeBuffer3(float* largeAudioBuffer, uint32_t totalSamples, float phaseIncrement, float* coeffs_lpf, float* w_lpf1, float* w_lpf2, float* w_lpf3);
+uint32_t Rompler_ApplyToLargeBuffer3(float* largeAudioBuffer, uint32_t totalSamples, float phaseIncrement, float* state);
 
 #endif // ROMPLER_H
@@ -1,11 +1,12 @@
 // Auto-generated wrapper for Rompler_ApplyToLargeBuffer3
 // Generated by esp32-jit wrapper system
 // Args array size: 32 slots (128 bytes)
-// Arguments: 7 (slots 0-6)
+// Arguments: 4 (slots 0-3)
 // Return value: slot 31
 
 
 #include <stdint.h>
+#include <string.h>  // For memcpy (strict aliasing safe type punning)
 #include "rompler.h"  // Include generated header
 
 // Wrapper function to handle argument unpacking and return value
@@ -17,31 +18,25 @@ typedef int esp_err_t;
 
 
 esp_err_t call_remote(void) {
-    volatile int32_t *io = (volatile int32_t *)0x4ff27100;
+    extern volatile int32_t __p4jit_args[];  // Args address, set by the linker script
+    volatile int32_t *io = __p4jit_args;
 
-    // Argument 0: POINTER type float*
+    // Argument 0: POINTER type float* (slot 0, 1 slot(s))
     float* largeAudioBuffer = (float*) io[0];
 
-    // Argument 1: VALUE type uint32_t
-    uint32_t totalSamples = *(uint32_t*)& io[1];
+    // Argument 1: VALUE type uint32_t (slot 1, 1 slot(s))
+    uint32_t totalSamples;
+    memcpy(&totalSamples, &io[1], sizeof(uint32_t));
 
-    // Argument 2: VALUE type float
-    float phaseIncrement = *(float*)& io[2];
+    // Argument 2: VALUE type float (slot 2, 1 slot(s))
+    float phaseIncrement;
+    memcpy(&phaseIncrement, &io[2], sizeof(float));
 
-    // Argument 3: POINTER type float*
-    float* coeffs_lpf = (float*) io[3];
-
-    // Argument 4: POINTER type float*
-    float* w_lpf1 = (float*) io[4];
-
-    // Argument 5: POINTER type float*
-    float* w_lpf2 = (float*) io[5];
-
-    // Argument 6: POINTER type float*
-    float* w_lpf3 = (float*) io[6];
+    // Argument 3: POINTER type float* (slot 3, 1 slot(s))
+    float* state = (float*) io[3];
 
     // Call original function: Rompler_ApplyToLargeBuffer3
-    uint32_t result = Rompler_ApplyToLargeBuffer3(largeAudioBuffer, totalSamples, phaseIncrement, coeffs_lpf, w_lpf1, w_lpf2, w_lpf3);
+    uint32_t result = Rompler_ApplyToLargeBuffer3(largeAudioBuffer, totalSamples, phaseIncrement, state);
 
     // Write result (uint32_t) to slot 31
     *(uint32_t*)&io[31] = result;
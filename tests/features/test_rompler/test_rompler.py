@@ -2,10 +2,10 @@ import os
 import sys
 import struct
 import math
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import matplotlib.pyplot as plt
 import time
-import pandas as pd
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'host')))
@@ -14,6 +14,20 @@ from p4jit.toolchain import Builder
 from p4jit.runtime import JITSession
 from p4jit.runtime.memory_caps import MALLOC_CAP_SPIRAM, MALLOC_CAP_8BIT, MALLOC_CAP_INTERNAL
 
+# PNG plots are slow to render; opt in with --plots or ROMPLER_PLOTS=1
+PLOTS = '--plots' in sys.argv or bool(os.environ.get('ROMPLER_PLOTS'))
+
+# Rompler args: audio_buf, size, phase_inc, state
+ROMPLER_ARGS = struct.Struct("<IIfI")
+
+# Filter state block (see ROMPLER_STATE_* in rompler.c): coeffs at 0,
+# w1/w2/w3 at 32/48/64 bytes
+ROMPLER_STATE_BYTES = 80
+U32 = struct.Struct("<I")
+
+# Host-side reference computations overlap with device round-trips
+REFERENCE_POOL = ThreadPoolExecutor(max_workers=4)
+
 # ==========================================
 # PYTHON REFERENCE IMPLEMENTATION
 # ==========================================
@@ -36,29 +50,80 @@ def python_biquad_gen_lpf(f, qFactor):
 
     return np.array([b0/a0, b1/a0, b2/a0, a1/a0, a2/a0], dtype=np.float32)
 
-def python_biquad_process(input_data, coeffs, w):
-    output = np.zeros_like(input_data)
-    for i in range(len(input_data)):
-        d0 = input_data[i] - coeffs[3] * w[0] - coeffs[4] * w[1]
-        output[i] = coeffs[0] * d0 + coeffs[1] * w[0] + coeffs[2] * w[1]
-        w[1] = w[0]
-        w[0] = d0
-    return output
+# Recursion matrices, keyed by (coeffs bytes, length)
+_biquad_matrices = {}
+
+def _biquad_recursion_matrix(coeffs, n):
+    """
+    Lower-triangular Toeplitz matrix of the impulse response of the
+    feedback part 1 / (1 + a1 z^-1 + a2 z^-2), so that d = T @ x.
+    """
+    key = (coeffs.tobytes(), n)
+    T = _biquad_matrices.get(key)
+    if T is None:
+        a1, a2 = float(coeffs[3]), float(coeffs[4])
+        h = np.zeros(n)
+        h[0] = 1.0
+        if n > 1:
+            h[1] = -a1
+        for i in range(2, n):
+            h[i] = -a1 * h[i - 1] - a2 * h[i - 2]
+        idx = np.arange(n)
+        lag = idx[:, None] - idx[None, :]
+        T = np.where(lag >= 0, h[np.maximum(lag, 0)], 0.0)
+        _biquad_matrices[key] = T
+    return T
 
-def python_rompler_process(large_audio_buffer, total_samples, phase_increment):
+def python_biquad_process(input_data, coeffs, w, out=None):
+    """
+    Direct Form II biquad, w = [d[n-1], d[n-2]] updated in place.
+    The recursion is evaluated as one matrix product instead of a
+    per-sample loop; the initial state enters as an equivalent input.
+    The result is written to out if given (may be input_data itself).
+    """
+    n = len(input_data)
+    if out is None:
+        out = np.empty_like(input_data)
+    if n == 0:
+        return out
+    b0, b1, b2, a1, a2 = (float(c) for c in coeffs)
+    w0, w1 = float(w[0]), float(w[1])
+    
+    x = input_data.astype(np.float64)
+    x[0] += -a1 * w0 - a2 * w1
+    if n > 1:
+        x[1] += -a2 * w0
+    d = _biquad_recursion_matrix(coeffs, n) @ x
+    
+    # Feedforward over [d[-2], d[-1], d[0], ...]
+    dd = np.concatenate(([w1, w0], d))
+    out[:] = b0 * dd[2:] + b1 * dd[1:-1] + b2 * dd[:-2]
+    
+    w[0] = dd[-1]
+    w[1] = dd[-2]
+    return out
+
+def python_rompler_process(large_audio_buffer, total_samples, phase_increment, out=None):
     # Simulate the exact logic of the C code
     read_buffer_phase = 0.0
     output_block_size = 32
     current_read_pos = 4
     
-    # State variables
-    coeffs_lpf = np.zeros(5, dtype=np.float32)
+    # State variables; the anti-alias filter only depends on the pitch,
+    # so it is designed once rather than per chunk
+    f_anti_alias = 0.5 / phase_increment
+    use_lpf = f_anti_alias < 0.5
+    coeffs_lpf = python_biquad_gen_lpf(f_anti_alias, 0.5) if use_lpf else None
     w_lpf1 = np.zeros(2, dtype=np.float32)
     w_lpf2 = np.zeros(2, dtype=np.float32)
     w_lpf3 = np.zeros(2, dtype=np.float32)
     
-    # Make a copy to work on
-    buffer_copy = large_audio_buffer.copy()
+    # Make a copy to work on (into out, if a workspace is given)
+    if out is None:
+        buffer_copy = large_audio_buffer.copy()
+    else:
+        buffer_copy = out
+        np.copyto(buffer_copy, large_audio_buffer)
     
     STOPPED = 0
     READFIRST = 1
@@ -85,14 +150,12 @@ def python_rompler_process(large_audio_buffer, total_samples, phase_increment):
             buffer_copy[base + 2] = 0.1   * buffer_copy[base + 4]
             buffer_copy[base + 3] = 0.5   * buffer_copy[base + 4]
             
-        f_anti_alias = 0.5 / phase_increment
-        if f_anti_alias < 0.5:
-            coeffs_lpf = python_biquad_gen_lpf(f_anti_alias, 0.5)
+        if use_lpf:
+            # Filter the chunk in place through the three cascaded stages
             chunk = buffer_copy[current_read_pos : current_read_pos + read_buffer_length]
-            chunk = python_biquad_process(chunk, coeffs_lpf, w_lpf1)
-            chunk = python_biquad_process(chunk, coeffs_lpf, w_lpf2)
-            chunk = python_biquad_process(chunk, coeffs_lpf, w_lpf3)
-            buffer_copy[current_read_pos : current_read_pos + read_buffer_length] = chunk
+            python_biquad_process(chunk, coeffs_lpf, w_lpf1, out=chunk)
+            python_biquad_process(chunk, coeffs_lpf, w_lpf2, out=chunk)
+            python_biquad_process(chunk, coeffs_lpf, w_lpf3, out=chunk)
 
         current_read_pos += read_buffer_length
         
@@ -101,6 +164,34 @@ def python_rompler_process(large_audio_buffer, total_samples, phase_increment):
             
     return buffer_copy
 
+@functools.lru_cache(maxsize=8)
+def build_chirp_buffer(sample_rate, duration, f0, f1, padding):
+    """Padded chirp input buffer (read-only, shared by all suites)."""
+    total_samples = int(sample_rate * duration)
+    dt = duration / (total_samples - 1)
+    k = (f1 - f0) / duration
+    
+    # Linear chirp, phase 2*pi*(f0*t + k*t^2/2) sampled at t = n*dt, built
+    # in float32 by accumulating the exact per-sample phase increments
+    full_buffer_ref = np.zeros(total_samples + padding, dtype=np.float32)
+    phase = full_buffer_ref[padding:]
+    np.multiply(np.arange(total_samples, dtype=np.float32), np.float32(k * dt), out=phase)
+    phase += np.float32(f0 - 0.5 * k * dt)
+    phase *= np.float32(2 * np.pi * dt)
+    phase[0] = 0.0
+    np.cumsum(phase, out=phase)
+    np.sin(phase, out=phase)
+    full_buffer_ref.flags.writeable = False
+    return full_buffer_ref
+
+@functools.lru_cache(maxsize=32)
+def python_rompler_reference(chirp_params, phase_increment):
+    """Python reference output; it doesn't depend on the implementation under test."""
+    full_buffer_ref = build_chirp_buffer(*chirp_params)
+    output = python_rompler_process(full_buffer_ref, len(full_buffer_ref), phase_increment)
+    output.flags.writeable = False
+    return output
+
 # ==========================================
 # TEST RUNNER
 # ==========================================
@@ -115,11 +206,9 @@ def run_test_suite(session, builder, function_name, label):
     # 1. Build (Pass 1)
     print("Building (Pass 1)...")
     try:
-        temp_bin = builder.wrapper.build_with_wrapper(
+        code_size, _ = builder.wrapper.probe_size(
             source=source_file, 
             function_name=function_name,
-            base_address=0x03000004,
-            arg_address=0x00030004,
             use_firmware_elf=True 
         )
     except RuntimeError as e:
@@ -130,11 +219,26 @@ def run_test_suite(session, builder, function_name, label):
     CAP_EXEC = MALLOC_CAP_INTERNAL 
     CAP_DATA = MALLOC_CAP_INTERNAL # User requested SRAM for data
     
+    # Signal and data region layout: the audio buffer is followed by the
+    # filter state block, so a test case resets both with one write
+    SAMPLE_RATE = 48000
+    DURATION_SEC = 0.05
+    TOTAL_SAMPLES = int(SAMPLE_RATE * DURATION_SEC)
+    PADDING = 4
+    BUFFER_SIZE = TOTAL_SAMPLES + PADDING
+    
+    audio_bytes = (BUFFER_SIZE * 4 + 15) & ~15
+    region_size = audio_bytes + ROMPLER_STATE_BYTES
+    
     padding = 64
-    alloc_size = temp_bin.total_size + padding
-    print(f"Allocating {alloc_size} bytes for code...")
-    code_addr = session.device.allocate(alloc_size, CAP_EXEC, 128)
-    args_addr = session.device.allocate(128, CAP_DATA, 128)
+    alloc_size = code_size + padding
+    print(f"Allocating {alloc_size} bytes for code, {region_size} bytes for data...")
+    code_addr, args_addr, audio_buf_addr = session.device.allocate_many([
+        (alloc_size, CAP_EXEC, 128),
+        (128, CAP_DATA, 128),
+        (region_size, CAP_DATA, 16),
+    ])
+    state_addr = audio_buf_addr + audio_bytes
     
     # 3. Build (Pass 2)
     print("Building (Pass 2)...")
@@ -151,26 +255,13 @@ def run_test_suite(session, builder, function_name, label):
     remote_func = session.load_function(final_bin, args_addr)
     
     # 5. Prepare Data
-    SAMPLE_RATE = 48000
-    DURATION_SEC = 0.05
-    TOTAL_SAMPLES = int(SAMPLE_RATE * DURATION_SEC)
-    PADDING = 4
-    BUFFER_SIZE = TOTAL_SAMPLES + PADDING
-    
-    t = np.linspace(0, DURATION_SEC, TOTAL_SAMPLES)
     f0, f1 = 100, 5000
-    k = (f1 - f0) / DURATION_SEC
-    input_signal = np.sin(2 * np.pi * (f0 * t + 0.5 * k * t**2)).astype(np.float32)
-    
-    full_buffer_ref = np.zeros(BUFFER_SIZE, dtype=np.float32)
-    full_buffer_ref[PADDING:] = input_signal
+    chirp_params = (SAMPLE_RATE, DURATION_SEC, f0, f1, PADDING)
+    full_buffer_ref = build_chirp_buffer(*chirp_params)
     
-    # Allocate Buffers
-    audio_buf_addr = session.device.allocate(BUFFER_SIZE * 4, CAP_DATA, 16)
-    coeffs_addr = session.device.allocate(5 * 4, CAP_DATA, 16)
-    w1_addr = session.device.allocate(2 * 4, CAP_DATA, 16)
-    w2_addr = session.device.allocate(2 * 4, CAP_DATA, 16)
-    w3_addr = session.device.allocate(2 * 4, CAP_DATA, 16)
+    # Initial region contents: input signal, zeroed state block
+    region_init = bytearray(region_size)
+    region_init[:BUFFER_SIZE * 4] = memoryview(full_buffer_ref).cast("B")
     
     test_cases = [
         {"name": "No Pitch Shift", "phase_inc": 1.0},
@@ -179,44 +270,53 @@ def run_test_suite(session, builder, function_name, label):
         {"name": "Extreme Pitch", "phase_inc": 4.0},
     ]
     
+    # Compute the Python references in the background while the device runs
+    references = {
+        case['phase_inc']: REFERENCE_POOL.submit(python_rompler_reference, chirp_params, case['phase_inc'])
+        for case in test_cases
+    }
+    
     results = []
+    args_buf = bytearray(ROMPLER_ARGS.size)
+    
+    # Error scratch reused by every case; only the plots need a per-case copy
+    diff_tmp = np.empty(TOTAL_SAMPLES, dtype=np.float32)
     
     for case in test_cases:
         print(f"  Running: {case['name']} (Inc={case['phase_inc']})...", end='')
         
-        # Reset Memory
-        session.device.write_memory(audio_buf_addr, full_buffer_ref.tobytes())
-        session.device.write_memory(coeffs_addr, b'\x00' * 20)
-        session.device.write_memory(w1_addr, b'\x00' * 8)
-        session.device.write_memory(w2_addr, b'\x00' * 8)
-        session.device.write_memory(w3_addr, b'\x00' * 8)
+        # Reset Memory; the acknowledgement is collected by the args write,
+        # so packing the args overlaps the transfer (and a failed reset
+        # still raises before the function runs)
+        session.device.write_memory(audio_buf_addr, region_init, wait=False)
         
         # Execute
-        args = struct.pack("<IIfIIII", 
-                           audio_buf_addr, BUFFER_SIZE, case['phase_inc'], 
-                           coeffs_addr, w1_addr, w2_addr, w3_addr)
+        ROMPLER_ARGS.pack_into(args_buf, 0,
+                               audio_buf_addr, BUFFER_SIZE, case['phase_inc'], state_addr)
         
         start_time = time.time()
-        remote_func(args)
+        remote_func(args_buf)
         host_time_ms = (time.time() - start_time) * 1000
         
         # Read Cycles
         cycles_bytes = session.device.read_memory(args_addr + 124, 4)
-        cycles = struct.unpack("<I", cycles_bytes)[0]
+        cycles = U32.unpack_from(cycles_bytes)[0]
         p4_exec_us = cycles / 360.0
         
-        # Read Result
-        res_bytes = session.device.read_memory(audio_buf_addr, BUFFER_SIZE * 4)
-        p4_output = np.frombuffer(res_bytes, dtype=np.float32)[PADDING:]
+        # Read Result (the padding in front of the signal isn't compared)
+        # Received straight into a new array per case (each one is kept in results)
+        p4_output = np.empty(TOTAL_SAMPLES, dtype=np.float32)
+        session.device.read_memory_into(audio_buf_addr + PADDING * 4, p4_output)
         
         # Python Ref
-        py_full_out = python_rompler_process(full_buffer_ref, BUFFER_SIZE, case['phase_inc'])
+        py_full_out = references[case['phase_inc']].result()
         py_output = py_full_out[PADDING:]
         
         # Compare
-        diff = np.abs(p4_output - py_output)
-        max_err = np.max(diff)
-        mse = np.mean(diff**2)
+        np.subtract(p4_output, py_output, out=diff_tmp)
+        np.abs(diff_tmp, out=diff_tmp)
+        max_err = diff_tmp.max()
+        mse = np.dot(diff_tmp, diff_tmp) / TOTAL_SAMPLES
         
         print(f" Done. Time: {p4_exec_us:.2f} us, MaxErr: {max_err:.6f}")
         
@@ -225,7 +325,7 @@ def run_test_suite(session, builder, function_name, label):
             "phase_inc": case['phase_inc'],
             "p4_out": p4_output,
             "py_out": py_output,
-            "diff": diff,
+            "diff": diff_tmp.copy() if PLOTS else None,
             "max_err": max_err,
             "mse": mse,
             "cycles": cycles,
@@ -234,13 +334,7 @@ def run_test_suite(session, builder, function_name, label):
         })
         
     # Cleanup
-    session.device.free(code_addr)
-    session.device.free(args_addr)
-    session.device.free(audio_buf_addr)
-    session.device.free(coeffs_addr)
-    session.device.free(w1_addr)
-    session.device.free(w2_addr)
-    session.device.free(w3_addr)
+    session.device.free_many((code_addr, args_addr, audio_buf_addr))
     
     return {
         "label": label,
@@ -250,6 +344,8 @@ def run_test_suite(session, builder, function_name, label):
     }
 
 def generate_plots(suite_results):
+    import matplotlib.pyplot as plt
+    
     for suite in suite_results:
         label = suite['label']
         results = suite['results']
@@ -285,6 +381,8 @@ def generate_plots(suite_results):
         plt.savefig(os.path.join(os.path.dirname(__file__), f"rompler_{safe_label}.png"))
 
 def generate_table_plot(df):
+    import matplotlib.pyplot as plt
+    
     # Create a figure to plot the table
     fig, ax = plt.subplots(figsize=(12, 10)) 
     ax.axis('off')
@@ -326,6 +424,8 @@ def generate_table_plot(df):
     print(f"Performance table saved to: {plot_path}")
 
 def test_rompler_comparison():
+    import pandas as pd
+    
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
     builder = Builder()
     
@@ -352,7 +452,8 @@ def test_rompler_comparison():
     if res_asm_single: suites.append(res_asm_single)
     
     # Generate Plots
-    generate_plots(suites)
+    if PLOTS:
+        generate_plots(suites)
     
     # Generate Comparison Table
     print("\n" + "="*80)
@@ -379,47 +480,31 @@ def test_rompler_comparison():
         print("No results to process.")
         return
 
-    # Separate results
-    results_c = [d for d in data if d['Implementation'] == "C Implementation"]
-    results_asm = [d for d in data if d['Implementation'] == "ASM Implementation"]
-    results_asm_single = [d for d in data if d['Implementation'] == "ASM (Single Biquad)"]
-    
-    if results_c and results_asm and results_asm_single:
-        df_c = pd.DataFrame(results_c).set_index('Test Case')
-        df_asm = pd.DataFrame(results_asm).set_index('Test Case')
-        df_asm_single = pd.DataFrame(results_asm_single).set_index('Test Case')
-        
-        # Build Summary DataFrame
-        summary = pd.DataFrame()
-        summary['Phase Inc'] = df_c['Phase Inc']
-        summary['C Time (us)'] = df_c['Time (us)']
-        summary['ASM (Fused) Time (us)'] = df_asm['Time (us)']
-        summary['ASM (Single) Time (us)'] = df_asm_single['Time (us)']
-        
-        # Calculate Improvement % (Fused vs Single)
-        summary['Fused vs Single (%)'] = ((summary['ASM (Single) Time (us)'] - summary['ASM (Fused) Time (us)']) / summary['ASM (Single) Time (us)'] * 100)
-        
-        summary['C Cycles'] = df_c['Cycles']
-        summary['ASM (Fused) Cycles'] = df_asm['Cycles']
-        summary['ASM (Single) Cycles'] = df_asm_single['Cycles']
-        
-        summary['C Size (B)'] = df_c['Binary Size']
-        summary['ASM (Fused) Size (B)'] = df_asm['Binary Size']
-        summary['ASM (Single) Size (B)'] = df_asm_single['Binary Size']
-        
-        summary['Max Error'] = df_asm['Max Error'] # Assuming similar error profile
-        
-        # Transpose for vertical table
-        summary_T = summary.T
-        
-        print(summary_T.to_string())
+    # One pivot: rows are test cases, columns (metric, implementation).
+    # pivot_table sorts both axes, so the run order is restored afterwards.
+    metrics = ['Time (us)', 'Cycles', 'Binary Size', 'Max Error']
+    labels = [suite['label'] for suite in suites]
+    df = pd.DataFrame(data)
+    summary = df.pivot_table(index='Test Case', columns='Implementation',
+                             values=metrics, aggfunc='first')
+    summary = summary.reindex(index=pd.unique(df['Test Case']),
+                              columns=pd.MultiIndex.from_product([metrics, labels]))
+    summary.columns = [f"{label} {metric}" for metric, label in summary.columns]
+    summary.insert(0, 'Phase Inc', df.groupby('Test Case', sort=False)['Phase Inc'].first())
+    
+    # Improvement % (Fused vs Single), next to the times
+    if "ASM Implementation" in labels and "ASM (Single Biquad)" in labels:
+        fused = summary["ASM Implementation Time (us)"]
+        single = summary["ASM (Single Biquad) Time (us)"]
+        summary.insert(1 + len(labels), 'Fused vs Single (%)', (single - fused) / single * 100)
+    
+    # Transpose for vertical table
+    summary_T = summary.T
+    
+    print(summary_T.to_string())
+    if PLOTS:
         generate_table_plot(summary_T)
         
-    else:
-        print("Could not compare all implementations (missing data).")
-        df = pd.DataFrame(data)
-        print(df.to_string())
-        
     # Disassemble the ASM binaries for inspection
     if res_asm:
         print("\nDisassembling ASM (Fused) binary...")
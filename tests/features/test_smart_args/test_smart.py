@@ -38,26 +38,23 @@ print("3. Building JIT Function...")
 builder = Builder()
 source_file = os.path.join(os.path.dirname(__file__), 'source', 'smart_test.c')
 
-# Pass 1: Probe
+# Pass 1: Probe (sizes are reused while the sources are unchanged)
 print("   Pass 1: Probing...")
-temp_bin = builder.wrapper.build_with_wrapper(
+code_size, args_size = builder.wrapper.probe_size(
     source=source_file,
-    function_name='smart_test',
-    base_address=0x03000004,
-    arg_address=0x00030004
+    function_name='smart_test'
 )
 
-code_size = temp_bin.total_size
-args_size = temp_bin.metadata['addresses']['args_array_bytes']
-
 # Allocate Code & Args
 # Must be executable
 CAP_EXEC = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT 
 CAP_DATA = MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT
 
-# Add padding (+64) and alignment (128)
-code_addr = session.device.allocate(code_size + 64, caps=CAP_EXEC, alignment=128)
-args_addr = session.device.allocate(args_size, caps=CAP_DATA, alignment=128)
+# Add padding (+64) and alignment (128); both blocks in one ALLOC request
+code_addr, args_addr = session.device.allocate_many([
+    (code_size + 64, CAP_EXEC, 128),
+    (args_size, CAP_DATA, 128),
+])
 
 print(f"   Code Allocated at: 0x{code_addr:08X}")
 print(f"   Args Allocated at: 0x{args_addr:08X}")
@@ -99,6 +96,5 @@ else:
 
 # Cleanup
 print("5. Cleaning up...")
-session.device.free(code_addr)
-session.device.free(args_addr)
+session.device.free_many([code_addr, args_addr])
 session.device.disconnect()
@@ -17,6 +17,7 @@ so the compiler needs to see your custom types there.
 */
 """
 
+import array
 import struct
 import os
 import sys
@@ -80,11 +81,11 @@ def test_advanced():
 
     # 6. Read & Unpack Result
     # The result is at args_addr + (31 * 4) = args_addr + 124
+    # Read straight into a one-float buffer ('f')
     result_addr = func.args_addr + 124
-    raw_result_bytes = device.read_memory(result_addr, 4)
-
-    # Unpack bytes as float ('f')
-    result = struct.unpack("<f", raw_result_bytes)[0]
+    result_buf = array.array('f', [0.0])
+    device.read_memory_into(result_addr, result_buf)
+    result = result_buf[0]
 
     print(f"Struct Sum: {result}") # Should be 10.5 + 20 + (-5) + 100 = 125.5
     
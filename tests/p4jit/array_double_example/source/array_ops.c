@@ -9,10 +9,28 @@
  * @return Sum of all elements after doubling
  */
 int double_and_sum(int* array, int length) {
-    int sum = 0;
-    for (int i = 0; i < length; i++) {
+    int sum0 = 0, sum1 = 0, sum2 = 0, sum3 = 0;
+    int i = 0;
+    
+    // Four elements per iteration with independent partial sums, so the
+    // adds do not wait on each other; the tail is handled one by one
+    for (; i + 4 <= length; i += 4) {
+        int a = array[i] * 2;
+        int b = array[i + 1] * 2;
+        int c = array[i + 2] * 2;
+        int d = array[i + 3] * 2;
+        array[i] = a;
+        array[i + 1] = b;
+        array[i + 2] = c;
+        array[i + 3] = d;
+        sum0 += a;
+        sum1 += b;
+        sum2 += c;
+        sum3 += d;
+    }
+    for (; i < length; i++) {
         array[i] = array[i] * 2;
-        sum += array[i];
+        sum0 += array[i];
     }
-    return sum;
+    return (sum0 + sum1) + (sum2 + sum3);
 }
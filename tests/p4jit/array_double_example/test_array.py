@@ -8,6 +8,7 @@ import numpy as np
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'host')))
 
 from p4jit import P4JIT 
+from p4jit.utils import write_text
 
 # ==========================================
 # Step 1: Define C Code
@@ -23,12 +24,30 @@ C_CODE = r"""
  * @return Sum of all elements after doubling
  */
 int double_and_sum(int* array, int length) {
-    int sum = 0;
-    for (int i = 0; i < length; i++) {
+    int sum0 = 0, sum1 = 0, sum2 = 0, sum3 = 0;
+    int i = 0;
+    
+    // Four elements per iteration with independent partial sums, so the
+    // adds do not wait on each other; the tail is handled one by one
+    for (; i + 4 <= length; i += 4) {
+        int a = array[i] * 2;
+        int b = array[i + 1] * 2;
+        int c = array[i + 2] * 2;
+        int d = array[i + 3] * 2;
+        array[i] = a;
+        array[i + 1] = b;
+        array[i + 2] = c;
+        array[i + 3] = d;
+        sum0 += a;
+        sum1 += b;
+        sum2 += c;
+        sum3 += d;
+    }
+    for (; i < length; i++) {
         array[i] = array[i] * 2;
-        sum += array[i];
+        sum0 += array[i];
     }
-    return sum;
+    return (sum0 + sum1) + (sum2 + sum3);
 }
 """
 
@@ -46,8 +65,8 @@ def test_array_double_and_sum_smart():
         
     source_file_path = os.path.join(source_dir, "array_ops.c")
     
-    with open(source_file_path, "w") as f:
-        f.write(C_CODE)
+    # Left untouched when unchanged, so reruns don't rescan or rewrite the source dir
+    write_text(source_file_path, C_CODE)
         
     print(f"Created C source file at: {source_file_path}")
 
@@ -80,8 +99,9 @@ def test_array_double_and_sum_smart():
     # ==========================================
     
     # Calculate Expected Results BEFORE execution (since array is modified in-place)
-    expected_sum = sum([x * 2 for x in np_array])
-    expected_values = np.array([x * 2 for x in np_array], dtype=np.int32)
+    # (np_array * 2 is a new array, so the call cannot change it)
+    expected_values = np_array * 2
+    expected_sum = int(expected_values.sum())
     
     # We pass the arguments naturally.
     # P4JIT will handle allocation, copying, and pointer passing.
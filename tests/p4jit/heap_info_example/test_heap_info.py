@@ -14,8 +14,7 @@ def test_heap_info():
     jit = P4JIT()
     
     # 1. Get Initial Stats
-    jit.get_heap_stats(print_s=True)
-    stats_initial = jit.get_heap_stats(print_s=False) # Capture for comparison
+    stats_initial = jit.get_heap_stats(print_s=True) # Printed and kept for comparison
         
     # 2. Allocate Memory
     print("\n[Allocating 10KB SPIRAM...]")
@@ -6,6 +6,7 @@ import numpy as np
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'host')))
 
 from p4jit import P4JIT
+from p4jit.utils import write_text
 
 def create_c_source():
     source_code = """
@@ -30,8 +31,8 @@ int array_add_accumulate(int32_t *arr, int len) {
 """
     source_dir = os.path.join(os.path.dirname(__file__), 'source')
     os.makedirs(source_dir, exist_ok=True)
-    with open(os.path.join(source_dir, 'array_add.c'), 'w') as f:
-        f.write(source_code)
+    # Skipped when the file already holds this code
+    write_text(os.path.join(source_dir, 'array_add.c'), source_code)
     return os.path.join(source_dir, 'array_add.c')
 
 def main():
@@ -9,6 +9,18 @@
  * @return The gain factor used (just to return something)
  */
 float apply_gain(uint8_t* data, int len, float gain) {
+    // Gains exact in Q8.8 (e.g. 1.5 = 384/256) run on the integer unit:
+    // (x * g) >> 8 equals the truncated float product for every 8-bit x
+    float gain_q8 = gain * 256.0f;
+    if (gain_q8 >= 0.0f && gain_q8 <= 65535.0f && gain_q8 == (float)(int32_t)gain_q8) {
+        uint32_t g = (uint32_t)gain_q8;
+        for(int i=0; i<len; i++) {
+            uint32_t val = ((uint32_t)data[i] * g) >> 8;
+            data[i] = (uint8_t)(val > 255 ? 255 : val);
+        }
+        return gain;
+    }
+    
     for(int i=0; i<len; i++) {
         // Simple clipping logic
         float val = (float)data[i] * gain;
@@ -24,7 +24,9 @@ def test_workflow():
 
     # 2. Prepare Data
     # Create a large array to process
-    input_data = np.random.randint(0, 100, 1024, dtype=np.uint8) # 0-100 to allow gain without instant clipping
+    # PCG64 Generator (seeded, so runs are reproducible); 0-100 to allow gain without instant clipping
+    rng = np.random.default_rng(0)
+    input_data = rng.integers(0, 100, 1024, dtype=np.uint8)
     gain = np.float32(1.5)
     
     print(f"Input (first 5): {input_data[:5]}")
@@ -48,17 +48,15 @@ def test_types():
     builder = Builder()
     source_file = os.path.join(os.path.dirname(__file__), 'source', 'types_test.c')
     
-    # Pass 1: Probe
-    temp_bin = builder.wrapper.build_with_wrapper(
+    # Pass 1: Probe (sizes are reused while the sources are unchanged)
+    code_size, args_size = builder.wrapper.probe_size(
         source=source_file,
-        function_name='test_all_types',
-        base_address=0x03000004,
-        arg_address=0x00030004
+        function_name='test_all_types'
     )
     
     # Allocate
-    code_addr = session.device.allocate(temp_bin.total_size + 64, caps=1, alignment=16) # Exec
-    args_addr = session.device.allocate(temp_bin.metadata['addresses']['args_array_bytes'], caps=2, alignment=16) # Data
+    code_addr = session.device.allocate(code_size + 64, caps=1, alignment=16) # Exec
+    args_addr = session.device.allocate(args_size, caps=2, alignment=16) # Data
     
     # Pass 2: Final
     final_bin = builder.wrapper.build_with_wrapper(
@@ -80,8 +78,9 @@ def test_types():
     print(f"   Result: {result}")
     
     # 6. Verify
-    expected_sum = int(val_a) + int(val_b) + int(val_c) + int(val_d) + int(val_e) + int(val_f) + np.sum(array_data)
-    expected_sum = np.int32(expected_sum) # Simulate C int32 overflow/wrap behavior if any
+    # Same casts as the C code (the float truncates), summed in int32 so it wraps like C
+    scalars = np.array([val_a, val_b, val_c, val_d, val_e, val_f.astype(np.int32)], dtype=np.int32)
+    expected_sum = np.concatenate((scalars, array_data)).sum(dtype=np.int32)
     
     print(f"   Expected: {expected_sum}")
     